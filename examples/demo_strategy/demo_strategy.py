@@ -17,15 +17,13 @@ from datetime import datetime
 from time import sleep
 from typing import Dict, List
 
-import pandas as pd
-from finta import TA
-
 from qtrader.core.portfolio import Portfolio
 from qtrader.core.constants import Direction, Offset, OrderType, TradeMode, OrderStatus
 from qtrader.core.data import Bar
 from qtrader.core.engine import Engine
 from qtrader.core.security import Stock, Security
 from qtrader.core.strategy import BaseStrategy
+from qtrader.indicators import MACD
 
 
 class DemoStrategy(BaseStrategy):
@@ -60,11 +58,14 @@ class DemoStrategy(BaseStrategy):
                 self.sleep_time = 5
 
     def init_strategy(self):
-        self.ohlcv = {}
-        for gateway_name in self.engine.gateways:
-            self.ohlcv[gateway_name] = {}
-            for security in self.engine.gateways[gateway_name].securities:
-                self.ohlcv[gateway_name][security] = []
+        # MACD of each security, updated bar by bar
+        self.macd = {}
+        for gateway_name in self.securities:
+            self.macd[gateway_name] = MACD(
+                self.securities[gateway_name],
+                period_fast=12,
+                period_slow=26,
+                signal=9)
 
     def on_bar(self, cur_data: Dict[str, Dict[Security, Bar]]):
 
@@ -85,42 +86,20 @@ class DemoStrategy(BaseStrategy):
             self.engine.log.info(f"{position}")
 
             # send orders
+            macd = self.macd[gateway_name]
             for security in cur_data[gateway_name]:
                 if security not in self.securities[gateway_name]:
                     continue
                 bar = cur_data[gateway_name][security]
-                # Collect bar data (only keep latest 20 records)
-                self.ohlcv[gateway_name][security].append(bar)
-                if len(self.ohlcv[gateway_name][security]) > 20:
-                    self.ohlcv[gateway_name][security].pop(0)
-
-                open_ts = [b.open for b in
-                           self.ohlcv[gateway_name][security]]
-                high_ts = [b.high for b in
-                           self.ohlcv[gateway_name][security]]
-                low_ts = [b.low for b in
-                          self.ohlcv[gateway_name][security]]
-                close_ts = [b.close for b in
-                            self.ohlcv[gateway_name][security]]
-
-                ohlc = pd.DataFrame({
-                    "open": open_ts,
-                    "high": high_ts,
-                    "low": low_ts,
-                    "close": close_ts
-                })
-                macd = TA.MACD(
-                    ohlc,
-                    period_fast=12,
-                    period_slow=26,
-                    signal=9)
-
-                if len(macd) < 2:
+                if bar.close is None:
+                    continue
+                prev_macd = macd[security]
+                cur_macd = macd.update_security(security, bar.close)
+                cur_signal = macd.signal[macd.index[security]]
+
+                if macd.count[macd.index[security]] < 2:
                     continue
 
-                prev_macd = macd.iloc[-2]["MACD"]
-                cur_macd = macd.iloc[-1]["MACD"]
-                cur_signal = macd.iloc[-1]["SIGNAL"]
                 signal = None
                 if prev_macd > cur_signal > cur_macd > 0:
                     signal = "SELL"
@@ -132,6 +132,7 @@ if __name__ == "__main__":
     event_engine.run()
 
     result_path = recorder.save_csv()
+    strategy.save_actions(result_path)
 
     if "analysis" in plugins:
         plot_pnl = plugins["analysis"].plot_pnl
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# @Time    : 19/10/2026 11:20 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: main_vector_demo.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+##########################################################################
+#
+#                 Demo strategy (vectorized backtest)
+#
+# Usage: python main_vector_demo.py [result_csv_of_main_demo]
+#
+# The MACD signals of DemoStrategy are computed for all bars at once, and
+# the portfolio value is computed with NumPy. If the csv saved by
+# main_demo.py is given, the results are validated against it.
+##########################################################################
+import sys
+import time
+
+from qtrader_config import LOCAL_PACKAGE_PATHS
+from qtrader_config import ADD_LOCAL_PACKAGE_PATHS_TO_SYSPATH
+if ADD_LOCAL_PACKAGE_PATHS_TO_SYSPATH:
+    for pth in LOCAL_PACKAGE_PATHS:
+        if pth not in sys.path:
+            sys.path.insert(0, pth)
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from qtrader.core.constants import Exchange
+from qtrader.core.security import Futures
+from qtrader.core.vector_backtest import get_bar_panel
+from qtrader.core.vector_backtest import signals_to_positions
+from qtrader.core.vector_backtest import run_vector_backtest
+from qtrader.core.vector_backtest import validate_vector_backtest
+from qtrader.gateways import BacktestGateway
+from qtrader.gateways.cqg import CQGFees
+
+
+def demo_signals(close: pd.Series) -> pd.Series:
+    """Signals of DemoStrategy: MACD(12, 26, 9) of all the bars received
+    (1: buy, -1: sell, 0: no signal)"""
+    x = close.dropna()
+    macd = x.ewm(span=12).mean() - x.ewm(span=26).mean()
+    signal = macd.ewm(span=9).mean()
+    prev_macd = macd.shift()
+    signals = np.zeros(len(x))
+    signals[(prev_macd > signal) & (signal > macd) & (macd > 0)] = -1
+    signals[(prev_macd < signal) & (signal < macd) & (macd < 0)] = 1
+    return pd.Series(signals, index=x.index).reindex(close.index).fillna(0)
+
+
+if __name__ == "__main__":
+
+    stock_list = [
+        Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+                exchange=Exchange.NYMEX, expiry_date="20220828"),
+        Futures(code="FUT.SI", lot_size=5000, security_name="SIN2",
+                exchange=Exchange.NYMEX, expiry_date="20220727"),
+    ]
+    gateway = BacktestGateway(
+        securities=stock_list,
+        start=datetime(2021, 3, 15, 15, 0, 0),
+        end=datetime(2021, 3, 17, 23, 0, 0),
+        gateway_name="Backtest",
+        fees=CQGFees
+    )
+
+    t0 = time.time()
+    panel = get_bar_panel(gateway)
+    signals = panel["close"].apply(demo_signals)
+    positions = signals_to_positions(signals, quantity=1)
+    result = run_vector_backtest(
+        securities=stock_list,
+        close=panel["close"],
+        positions=positions,
+        init_capital=1000000,
+        fees=CQGFees)
+    print(f"Vectorized backtest finished in {time.time() - t0:.3f}s")
+    print(result.tail())
+
+    if len(sys.argv) > 1:
+        comparison = validate_vector_backtest(result, sys.argv[1])
+        print(f"Validated against {sys.argv[1]} on "
+              f"{comparison.shape[0]} records.")
@@ -41,6 +41,15 @@ DATA_MODEL = {
     "kline": "Bar",
 }
 
+# parsed csv data are cached here (set to None to disable the cache)
+DATA_CACHE_PATH = ".qtrader_cache/data"
+
+# number of continuous futures contracts kept in memory (0 to disable)
+CONTINUOUS_CONTRACT_CACHE_SIZE = 0
+
+# number of resampled data cached on disk for each security
+RESAMPLED_CACHE_SIZE = 8
+
 ACTIVATED_PLUGINS = ["analysis"]
 
 LOCAL_PACKAGE_PATHS = [
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Time    : 21/10/2026 9:40 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: action_log.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import ast
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Union
+
+import pandas as pd
+
+from qtrader.core.security import Security
+
+
+class ActionLog:
+    """Columnar log of the actions of a strategy.
+
+    Each action is a dict such as {"sec": "FUT.GC", "side": "LONG",
+    "offset": "OPEN", "qty": 1, "close": 1750.5, "no": 3}, and is stored as
+    one row of typed columns (see COLUMNS), so that it can be saved and
+    analyzed without parsing strings.
+    """
+
+    COLUMNS = (
+        "datetime", "gateway", "security", "direction", "offset", "qty",
+        "price", "fee", "no")
+    # keys of the action dicts (if different from the column names)
+    KEYS = {"security": "sec", "direction": "side", "price": "close"}
+
+    def __init__(self):
+        self.columns: Dict[str, List[Any]] = {c: [] for c in self.COLUMNS}
+
+    def __len__(self) -> int:
+        return len(self.columns["datetime"])
+
+    def append(
+            self,
+            cur_datetime: datetime,
+            gateway_name: str,
+            action: Dict[str, Any]
+    ):
+        """Append an action of the gateway at the datetime"""
+        self.columns["datetime"].append(cur_datetime)
+        self.columns["gateway"].append(gateway_name)
+        for column in self.COLUMNS[2:]:
+            value = action.get(self.KEYS.get(column, column))
+            if isinstance(value, Enum):
+                value = value.value
+            elif isinstance(value, Security):
+                value = value.code
+            self.columns[column].append(value)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Actions as a DataFrame (one row per action, in time order)"""
+        return self._to_frame(self.columns)
+
+    def save_csv(self, path: str) -> str:
+        self.to_frame().to_csv(path, index=False)
+        return path
+
+    @classmethod
+    def read_csv(cls, path: str) -> pd.DataFrame:
+        return cls._to_frame(pd.read_csv(path))
+
+    @classmethod
+    def from_records(
+            cls,
+            actions: Iterable[Union[str, List[str]]],
+            datetimes: Iterable[datetime],
+            gateway_names: List[str]
+    ) -> pd.DataFrame:
+        """Actions parsed from the `action` column of results saved by
+        BarEventEngineRecorder, i.e., str([get_action(gw) for gw in
+        gateways]) at each datetime (or the list itself, as saved by
+        ParquetRecorder)"""
+        log = cls()
+        for action, cur_datetime in zip(actions, datetimes):
+            if isinstance(action, str):
+                if "{" not in action:
+                    continue
+                action = ast.literal_eval(action)
+            for gateway_name, gateway_action in zip(gateway_names, action):
+                if not gateway_action:
+                    continue
+                for a in gateway_action.split("|"):
+                    if "{" in a:
+                        log.append(
+                            cur_datetime, gateway_name, ast.literal_eval(a))
+        return log.to_frame()
+
+    @classmethod
+    def _to_frame(cls, columns) -> pd.DataFrame:
+        df = pd.DataFrame({c: columns[c] for c in cls.COLUMNS})
+        df["datetime"] = pd.to_datetime(df["datetime"])
+        for column in ("qty", "price", "fee"):
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+        return df
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+# @Time    : 20/10/2026 2:20 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: bar_panel.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+from typing import List, Sequence
+
+import numpy as np
+
+from qtrader.core.data import Bar
+from qtrader.core.security import Security
+
+
+class BarPanel:
+    """Latest bars of the securities of a gateway, in a preallocated NumPy
+    array of shape (securities, 2 * lookback, fields).
+
+    Each bar is written twice, `lookback` rows apart, so that the latest
+    `lookback` bars of a security are always contiguous rows of the array:
+    rolling windows are returned as views (no copy), and an update is two
+    row assignments (no allocation).
+
+    Bars with missing values (e.g., no data at the time step) are skipped,
+    i.e., the window of a security holds the latest bars received for it.
+    """
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+
+    def __init__(
+            self,
+            securities: List[Security],
+            lookback: int,
+            fields: Sequence[str] = FIELDS
+    ):
+        if lookback < 1:
+            raise ValueError(f"lookback must be positive, got {lookback}.")
+        self.securities = list(securities)
+        self.lookback = lookback
+        self.fields = tuple(fields)
+        self.security_index = {
+            security: i for i, security in enumerate(self.securities)}
+        self.field_index = {field: j for j, field in enumerate(self.fields)}
+        num_securities = len(self.securities)
+        self.values = np.full(
+            (num_securities, 2 * lookback, len(self.fields)), np.nan)
+        self.datetimes = np.full(
+            (num_securities, 2 * lookback), np.datetime64("NaT"),
+            dtype="datetime64[us]")
+        # number of bars received by each security
+        self.counts = np.zeros(num_securities, dtype=int)
+
+    def update(self, security: Security, bar: Bar):
+        """Append the bar of a security (ignored if its values are
+        missing)"""
+        i = self.security_index.get(security)
+        if i is None or bar is None or bar.close is None:
+            return
+        row = [getattr(bar, field) for field in self.fields]
+        k = self.counts[i] % self.lookback
+        self.values[i, k] = row
+        self.values[i, k + self.lookback] = row
+        self.datetimes[i, k] = bar.datetime
+        self.datetimes[i, k + self.lookback] = bar.datetime
+        self.counts[i] += 1
+
+    def _rows(self, i: int, size: int = None) -> slice:
+        """Rows of the latest `size` bars of the i-th security"""
+        count = self.counts[i]
+        size = min(size or self.lookback, self.lookback, count)
+        # the latest bar is at row (count - 1) % lookback + lookback
+        end = (count - 1) % self.lookback + self.lookback + 1 if count else 0
+        return slice(end - size, end)
+
+    def window(
+            self,
+            security: Security,
+            field: str = None,
+            size: int = None
+    ) -> np.ndarray:
+        """Latest bars of the security (oldest first), as a view of the panel.
+
+        The view is overwritten as new bars arrive; copy it to keep the
+        values. Fewer than `size` rows are returned if fewer bars have been
+        received.
+
+        :param security: security
+        :param field: one of the fields (all fields if None)
+        :param size: number of bars (default: lookback)
+        :return: array of shape (size,) for a field, or (size, fields)
+        """
+        i = self.security_index[security]
+        rows = self._rows(i, size)
+        if field is None:
+            return self.values[i, rows]
+        return self.values[i, rows, self.field_index[field]]
+
+    def window_datetimes(
+            self,
+            security: Security,
+            size: int = None
+    ) -> np.ndarray:
+        """Datetimes of the bars in `window` (a view)"""
+        i = self.security_index[security]
+        return self.datetimes[i, self._rows(i, size)]
+
+    def latest(self, field: str) -> np.ndarray:
+        """Value of the field in the latest bar of each security (nan if no
+        bar has been received)"""
+        rows = (self.counts - 1) % self.lookback + self.lookback
+        latest = self.values[
+            np.arange(len(self.securities)), rows, self.field_index[field]]
+        latest[self.counts == 0] = np.nan
+        return latest
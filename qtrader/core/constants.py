@@ -61,6 +61,20 @@ class OrderStatus(Enum):
     FAILED = "FAILED"
 
 
+# Orders in these status can still be filled or cancelled
+ACTIVE_ORDER_STATUS = (
+    OrderStatus.SUBMITTING,
+    OrderStatus.SUBMITTED,
+    OrderStatus.PART_FILLED)
+
+
+class AdjustMethod(Enum):
+    """Price adjustment of continuous futures contracts"""
+    RATIO = "RATIO"             # multiply historical prices by roll ratios
+    DIFFERENCE = "DIFFERENCE"   # shift historical prices by roll gaps
+    NONE = "NONE"               # no adjustment
+
+
 class Exchange(Enum):
     """Exchanges"""
     SEHK = "SEHK"           # Stock Exchange of Hong Kong
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# @Time    : 18/10/2026 10:12 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: continuous_contract.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Tuple, Hashable
+
+import numpy as np
+import pandas as pd
+
+from qtrader.core.constants import AdjustMethod
+from qtrader.core.security import Security
+
+# Number of continuous contracts kept in memory (the least recently used is
+# evicted first); the cache is disabled unless it is set in qtrader_config.py
+try:
+    from qtrader_config import CONTINUOUS_CONTRACT_CACHE_SIZE
+except ImportError:
+    CONTINUOUS_CONTRACT_CACHE_SIZE = 0
+
+PRICE_COLS = ("open", "high", "low", "close")
+
+
+class ContinuousContractCache:
+    """LRU cache of continuous contracts (adjusted data and roll schedule),
+    keyed by (security, adjust method, cache key of the data). A copy of the
+    cached data is returned, so that callers are free to modify it."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries: Dict[
+            Tuple, Tuple[pd.DataFrame, pd.DataFrame]] = OrderedDict()
+
+    def get(self, key: Tuple) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        data, roll_schedule = entry
+        return data.copy(), roll_schedule
+
+    def put(
+            self,
+            key: Tuple,
+            data: pd.DataFrame,
+            roll_schedule: pd.DataFrame
+    ):
+        if self.max_size <= 0:
+            return
+        self.entries[key] = (data.copy(), roll_schedule)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+_cache = ContinuousContractCache(CONTINUOUS_CONTRACT_CACHE_SIZE)
+
+# Roll schedule of the latest continuous contract built for each (security,
+# adjust method), for inspection
+_roll_schedules: Dict[Tuple[Security, AdjustMethod], pd.DataFrame] = {}
+
+
+def get_roll_schedule(
+        data: pd.DataFrame,
+        time_col: str = "time_key"
+) -> pd.DataFrame:
+    """Find the rolls of a futures time series (a roll happens whenever the
+    `ticker` changes between two consecutive bars).
+
+    Each row of the schedule describes one roll:
+    - from_datetime/to_datetime: last bar of the old contract, and first bar
+      of the new contract;
+    - from_ticker/to_ticker, from_close/to_close: tickers and close prices of
+      the two bars;
+    - ratio/difference: price ratio and price gap between the two bars.
+    """
+    ticker = data["ticker"].to_numpy()
+    close = data["close"].to_numpy(dtype=float)
+    times = data[time_col].to_numpy()
+    to_idx = np.flatnonzero(ticker[1:] != ticker[:-1]) + 1
+    from_idx = to_idx - 1
+    return pd.DataFrame({
+        "from_datetime": times[from_idx],
+        "to_datetime": times[to_idx],
+        "from_ticker": ticker[from_idx],
+        "to_ticker": ticker[to_idx],
+        "from_close": close[from_idx],
+        "to_close": close[to_idx],
+        "ratio": close[to_idx] / close[from_idx],
+        "difference": close[to_idx] - close[from_idx],
+    })
+
+
+def get_adjustment_factors(
+        times: np.ndarray,
+        roll_schedule: pd.DataFrame,
+        method: AdjustMethod = AdjustMethod.RATIO
+) -> np.ndarray:
+    """Cumulative adjustment factor of each timestamp in `times`.
+
+    A bar is adjusted by every roll that happens after it, i.e., by all rolls
+    whose `from_datetime` is not earlier than the bar. The factors are
+    multiplicative for RATIO, and additive for DIFFERENCE/NONE. Since the
+    factors only depend on the timestamps, they can be applied to any slice
+    of the data.
+    """
+    if method == AdjustMethod.RATIO:
+        adj = roll_schedule["ratio"].to_numpy(dtype=float)
+        cum_adj = np.append(np.cumprod(adj[::-1])[::-1], 1.0)
+    elif method == AdjustMethod.DIFFERENCE:
+        adj = roll_schedule["difference"].to_numpy(dtype=float)
+        cum_adj = np.append(np.cumsum(adj[::-1])[::-1], 0.0)
+    elif method == AdjustMethod.NONE:
+        cum_adj = np.zeros(roll_schedule.shape[0] + 1)
+    else:
+        raise ValueError(f"Adjust method {method} is NOT valid!")
+    roll_times = roll_schedule["from_datetime"].to_numpy(dtype=times.dtype)
+    return cum_adj[np.searchsorted(roll_times, times, side="left")]
+
+
+def get_pending_adjustment(
+        roll_schedule: pd.DataFrame,
+        cur_datetime: datetime,
+        method: AdjustMethod = AdjustMethod.RATIO
+) -> float:
+    """Adjustment factor of the rolls that have not happened yet at
+    `cur_datetime` (the first bar of the new contract is after it).
+
+    Prices adjusted with the whole roll schedule are adjusted as of
+    `cur_datetime` once this factor is removed (divided for RATIO, and
+    subtracted for DIFFERENCE/NONE): it is the same for every bar up to
+    `cur_datetime`.
+    """
+    if roll_schedule is None or method == AdjustMethod.NONE:
+        return 1.0 if method == AdjustMethod.RATIO else 0.0
+    pending = roll_schedule[roll_schedule["to_datetime"] > cur_datetime]
+    if method == AdjustMethod.RATIO:
+        return float(np.prod(pending["ratio"].to_numpy(dtype=float)))
+    elif method == AdjustMethod.DIFFERENCE:
+        return float(np.sum(pending["difference"].to_numpy(dtype=float)))
+    raise ValueError(f"Adjust method {method} is NOT valid!")
+
+
+def adjust_prices(
+        data: pd.DataFrame,
+        roll_schedule: pd.DataFrame,
+        method: AdjustMethod = AdjustMethod.RATIO,
+        time_col: str = "time_key"
+) -> pd.DataFrame:
+    """Apply the adjustment factors of the roll schedule to the prices
+    (open, high, low, close) of the data."""
+    if method == AdjustMethod.NONE or roll_schedule.empty:
+        return data
+    factors = get_adjustment_factors(
+        data[time_col].to_numpy(), roll_schedule, method)
+    data = data.copy()
+    for col in PRICE_COLS:
+        if method == AdjustMethod.RATIO:
+            data[col] = data[col].to_numpy(dtype=float) * factors
+        else:
+            data[col] = data[col].to_numpy(dtype=float) + factors
+    return data
+
+
+def build_continuous_contract(
+        security: Security,
+        data: pd.DataFrame,
+        method: AdjustMethod = AdjustMethod.RATIO,
+        time_col: str = "time_key",
+        cache_key: Hashable = None
+) -> pd.DataFrame:
+    """Build continuous contract of a futures security.
+
+    :param cache_key: identifies the data (e.g., the data files and the time
+        range loaded). If it is given and CONTINUOUS_CONTRACT_CACHE_SIZE > 0,
+        repeated loading of the same data is not recomputed.
+    """
+    if data.empty:
+        return data
+    cached = None
+    if cache_key is not None:
+        cached = _cache.get((security, method, cache_key))
+    if cached is not None:
+        adjusted_data, roll_schedule = cached
+    else:
+        roll_schedule = get_roll_schedule(data, time_col=time_col)
+        adjusted_data = adjust_prices(
+            data, roll_schedule, method=method, time_col=time_col)
+        if cache_key is not None:
+            _cache.put(
+                (security, method, cache_key), adjusted_data, roll_schedule)
+    _roll_schedules[(security, method)] = roll_schedule
+    return adjusted_data
+
+
+def get_cached_roll_schedule(
+        security: Security,
+        method: AdjustMethod = AdjustMethod.RATIO
+) -> pd.DataFrame:
+    """Roll schedule (roll dates and factors) of the latest continuous
+    contract built for the security, for inspection."""
+    return _roll_schedules.get((security, method))
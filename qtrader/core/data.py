@@ -16,22 +16,55 @@ this file. If not, please write to: josephchenhk@gmail.com
 """
 
 import os
+import json
+import time
+import bisect
+import hashlib
 import importlib
 import warnings
+import dataclasses
+from pathlib import Path
 from dataclasses import dataclass
 from datetime import datetime
 from datetime import time as Time
 from datetime import date as Date
 from datetime import timedelta
-from typing import List, Any
+from typing import List, Dict, Any, Iterator, Callable
+import numpy as np
 import pandas as pd
 
-from qtrader.core.constants import Exchange
+from qtrader.core.constants import Exchange, AdjustMethod
+from qtrader.core.continuous_contract import build_continuous_contract
+from qtrader.core.continuous_contract import get_roll_schedule
+from qtrader.core.continuous_contract import adjust_prices
+from qtrader.core.resample import resample_bars
+from qtrader.core.resample import get_interval_minutes
 from qtrader.core.security import Stock, Security
 from qtrader.core.utility import get_kline_dfield_from_seconds
-from qtrader.core.utility import read_row_from_csv
+from qtrader.core.utility import read_rows_from_csv
 from qtrader_config import DATA_PATH, TIME_STEP, BAR_CONVENTION
 
+# Parsed csv files are cached (one file per csv) under this folder; set
+# `DATA_CACHE_PATH = None` in qtrader_config.py to disable the cache
+try:
+    from qtrader_config import DATA_CACHE_PATH
+except ImportError:
+    DATA_CACHE_PATH = ".qtrader_cache/data"
+
+# Number of resampled data kept on disk for each security (the least
+# recently used are removed when a new one is written)
+try:
+    from qtrader_config import RESAMPLED_CACHE_SIZE
+except ImportError:
+    RESAMPLED_CACHE_SIZE = 8
+
+# Parquet is preferred if pyarrow is available, otherwise fall back to pickle
+try:
+    import pyarrow  # noqa: F401
+    DATA_CACHE_FORMAT = "parquet"
+except ImportError:
+    DATA_CACHE_FORMAT = "pkl"
+
 
 @dataclass
 class Bar:
@@ -181,13 +214,481 @@ def _get_data_path(security: Security, dtype: str, **kwargs) -> str:
     return data_path
 
 
+class DataManifest:
+    """Index of the csv files in a data folder.
+
+    Each csv file has an entry with its date (parsed from the file name),
+    mtime and size; the number of rows, first/last timestamps, header layout
+    and principal contract are filled in once the file has been loaded. The
+    manifest is persisted in the data cache folder, and is updated
+    incrementally: only files that are added, removed or modified since the
+    last scan are touched. Dated files are kept sorted, so that the files
+    within a date range are selected with a binary search.
+    """
+
+    def __init__(self, data_path: str):
+        self.data_path = data_path
+        self.dir_mtime_ns = None
+        self.entries = {}
+        self.dates = []
+        self.dated_files = []
+        self.dirty = False
+        if DATA_CACHE_PATH:
+            key = hashlib.md5(
+                os.path.abspath(data_path).encode("utf-8")).hexdigest()
+            self.manifest_file = Path(DATA_CACHE_PATH).joinpath(
+                "manifest", f"{key}.json")
+            self._load()
+        else:
+            self.manifest_file = None
+
+    def _load(self):
+        """Load the persisted manifest (if any)"""
+        if not self.manifest_file.exists():
+            return
+        try:
+            with open(self.manifest_file, "r") as f:
+                manifest = json.load(f)
+            self.dir_mtime_ns = manifest["dir_mtime_ns"]
+            self.entries = manifest["entries"]
+        except Exception:
+            # corrupted manifest, it will be rebuilt
+            self.dir_mtime_ns = None
+            self.entries = {}
+        self._sort()
+
+    def _sort(self):
+        """Sort the dated files by date"""
+        dated_entries = sorted(
+            (entry["date"], file_name)
+            for file_name, entry in self.entries.items()
+            if entry["date"] is not None)
+        self.dates = [d for d, _ in dated_entries]
+        self.dated_files = [f for _, f in dated_entries]
+
+    def save(self):
+        """Persist the manifest if it has been modified"""
+        if not self.dirty or self.manifest_file is None:
+            return
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.manifest_file.with_name(
+                f"{self.manifest_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(dict(dir_mtime_ns=self.dir_mtime_ns,
+                               entries=self.entries), f)
+            os.replace(tmp_file, self.manifest_file)
+            self.dirty = False
+        except Exception as e:
+            warnings.warn(f"Failed to save manifest of {self.data_path}: {e}")
+
+    def refresh(self):
+        """Rescan the folder if it has been changed (files added or removed)
+        since the last scan, and renew the entries of the files modified in
+        place (which does not change the mtime of the folder)."""
+        dir_mtime_ns = os.stat(self.data_path).st_mtime_ns
+        if dir_mtime_ns == self.dir_mtime_ns:
+            file_names = list(self.entries)
+        else:
+            file_names = [f for f in os.listdir(self.data_path) if ".csv" in f]
+        entries = {}
+        modified = dir_mtime_ns != self.dir_mtime_ns
+        for file_name in file_names:
+            try:
+                stat = os.stat(f"{self.data_path}/{file_name}")
+            except FileNotFoundError:
+                modified = True
+                continue
+            entry = self.entries.get(file_name)
+            if (
+                entry is None
+                or entry["mtime_ns"] != stat.st_mtime_ns
+                or entry["size"] != stat.st_size
+            ):
+                entry = self._new_entry(file_name, stat)
+                modified = True
+            entries[file_name] = entry
+        if not modified:
+            return
+        self.entries = entries
+        self.dir_mtime_ns = dir_mtime_ns
+        self.dirty = True
+        self._sort()
+
+    @staticmethod
+    def _new_entry(file_name: str, stat: os.stat_result) -> Dict[str, Any]:
+        """New manifest entry of a csv file (stats are not known yet)"""
+        try:
+            date = datetime.strptime(
+                file_name[-14:].replace(".csv", ""), "%Y-%m-%d"
+            ).strftime("%Y-%m-%d")
+        except ValueError:
+            date = None
+        return dict(
+            date=date,
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            rows=None,
+            first_time=None,
+            last_time=None,
+            header=None,
+            principal_contract=None)
+
+    def update_stats(
+            self,
+            file_name: str,
+            stat: os.stat_result,
+            data: pd.DataFrame
+    ):
+        """Fill in the stats of a csv file that has just been loaded"""
+        entry = self.entries.get(file_name)
+        if (
+            entry is not None
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and entry["size"] == stat.st_size
+            and entry["rows"] is not None
+        ):
+            return
+        if (
+            entry is None
+            or entry["mtime_ns"] != stat.st_mtime_ns
+            or entry["size"] != stat.st_size
+        ):
+            entry = self._new_entry(file_name, stat)
+            self.entries[file_name] = entry
+            self._sort()
+        time_col = data.columns[0] if "time_key" not in data else "time_key"
+        header = read_rows_from_csv(f"{self.data_path}/{file_name}", 1)
+        entry["rows"] = int(data.shape[0])
+        if data.shape[0] > 0:
+            entry["first_time"] = str(data[time_col].min())
+            entry["last_time"] = str(data[time_col].max())
+        entry["header"] = (
+            "single" if header and "open" in header[0] else "multi")
+        principal_contract = data.attrs.get("principal_contract")
+        if principal_contract is None and "ticker" in data.columns:
+            principal_contract = data["ticker"].mode().iloc[0]
+        entry["principal_contract"] = (
+            None if principal_contract is None else str(principal_contract))
+        self.dirty = True
+
+    def get_files(self, start: Date = None, end: Date = None) -> List[str]:
+        """Dated csv files within [start, end], sorted by date"""
+        lo = 0
+        hi = len(self.dates)
+        if start is not None:
+            lo = bisect.bisect_left(self.dates, start.strftime("%Y-%m-%d"))
+        if end is not None:
+            hi = bisect.bisect_right(self.dates, end.strftime("%Y-%m-%d"))
+        return self.dated_files[lo:hi]
+
+
+# Manifests of the data folders that have been visited in this process
+_manifests: Dict[str, DataManifest] = {}
+
+
+def _get_manifest(data_path: str, refresh: bool = True) -> DataManifest:
+    """Manifest of a data folder, refreshed unless `refresh` is False (the
+    folder is scanned once per `_get_data` call, when the files are
+    selected, not once per file loaded)"""
+    manifest = _manifests.get(data_path)
+    if manifest is None:
+        manifest = DataManifest(data_path)
+        _manifests[data_path] = manifest
+        refresh = True
+    if refresh:
+        manifest.refresh()
+    return manifest
+
+
+def _get_file_stats(data_files: List[str]) -> List[tuple]:
+    """(file, mtime, size) of the files, taken from the manifests of their
+    folders if they have just been scanned"""
+    file_stats = []
+    for data_file in data_files:
+        data_path, file_name = os.path.split(data_file)
+        manifest = _manifests.get(data_path)
+        entry = None if manifest is None else manifest.entries.get(file_name)
+        if entry is None:
+            stat = os.stat(data_file)
+            file_stats.append((data_file, stat.st_mtime_ns, stat.st_size))
+        else:
+            file_stats.append((data_file, entry["mtime_ns"], entry["size"]))
+    return file_stats
+
+
+def _save_manifests():
+    """Persist all modified manifests"""
+    for manifest in _manifests.values():
+        manifest.save()
+
+
 def _get_data_files(security: Security, dtype: str, **kwargs) -> List[str]:
     """Fetch csv files"""
     data_path = _get_data_path(security, dtype, **kwargs)
     if not os.path.exists(data_path):
         raise FileNotFoundError(f"Data was NOT found in {data_path}!")
-    data_files = [f for f in os.listdir(data_path) if ".csv" in f]
-    return data_files
+    return list(_get_manifest(data_path).entries.keys())
+
+
+def _get_data_files_in_range(
+        security: Security,
+        start: datetime,
+        end: datetime,
+        dtype: str,
+        **kwargs
+) -> List[str]:
+    """Paths of the csv files that cover the time range given (daily bars are
+    stored in a single file)"""
+    if kwargs.get('interval') == '1day':
+        data_path = _get_data_path(security, dtype, interval='1day')
+        return [f"{data_path}/ohlcv.csv"]
+    data_path = _get_data_path(security, dtype, **kwargs)
+    if not os.path.exists(data_path):
+        raise FileNotFoundError(f"Data was NOT found in {data_path}!")
+    manifest = _get_manifest(data_path)
+    return [f"{data_path}/{data_file}"
+            for data_file in manifest.get_files(start.date(), end.date())]
+
+
+def _read_data_file(data_file: str) -> pd.DataFrame:
+    """Read a csv data file. Two header layouts are supported:
+
+    1. a single header row (`time_key`, `open`, `high`, ...);
+    2. two header rows (contract, field), in which case only the principal
+       contract (the one with the largest volume) is kept.
+    """
+    header = read_rows_from_csv(data_file, 2)
+    if len(header) > 0 and 'open' in header[0]:
+        data = pd.read_csv(data_file)
+    elif len(header) > 1 and 'open' in header[1]:
+        data = pd.read_csv(data_file, header=[0, 1], index_col=[0])
+        # get only the principal contract
+        levels = [lvl for lvl in set(data.columns.get_level_values(0))
+                  if lvl != 'meta']
+        volumes = {lvl: data.xs(lvl, level=0, axis=1).dropna()['volume'].sum()
+                   for lvl in levels}
+        principal_level = max(volumes, key=volumes.get)
+        data = data.xs(principal_level, level=0, axis=1).reset_index()
+        data.attrs["principal_contract"] = principal_level
+    else:
+        raise ValueError(f"Header of {data_file} is NOT recognized!")
+    return data
+
+
+def _get_cache_file(data_file: str, stat: os.stat_result) -> Path:
+    """Cache file of a csv data file, keyed by its path, mtime and size."""
+    key = hashlib.md5(os.path.abspath(data_file).encode("utf-8")).hexdigest()
+    return Path(DATA_CACHE_PATH).joinpath(
+        key, f"{stat.st_mtime_ns}_{stat.st_size}.{DATA_CACHE_FORMAT}")
+
+
+def _load_data_file(data_file: str) -> pd.DataFrame:
+    """Load a csv data file via the on-disk cache. The csv file is parsed only
+    if it has not been cached yet, or it has been modified since it was
+    cached."""
+    # only the file loaded is looked up (the manifest of the folder has been
+    # refreshed when the files were selected)
+    stat = os.stat(data_file)
+    data = _load_data_file_from_cache(data_file, stat)
+    data_path, file_name = os.path.split(data_file)
+    _get_manifest(data_path, refresh=False).update_stats(
+        file_name, stat, data)
+    return data
+
+
+def _load_data_file_from_cache(
+        data_file: str,
+        stat: os.stat_result
+) -> pd.DataFrame:
+    """Load a csv data file from the on-disk cache, (re)building the cache
+    if it is missing or stale."""
+    if not DATA_CACHE_PATH:
+        return _read_data_file(data_file)
+    cache_file = _get_cache_file(data_file, stat)
+    if cache_file.exists():
+        try:
+            if DATA_CACHE_FORMAT == "parquet":
+                return pd.read_parquet(cache_file)
+            return pd.read_pickle(cache_file)
+        except Exception:
+            # corrupted cache file, rebuild it below
+            pass
+    data = _read_data_file(data_file)
+    try:
+        # remove stale cache of the same csv file
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        for stale_file in cache_file.parent.iterdir():
+            if stale_file.name != cache_file.name:
+                stale_file.unlink()
+        # write to a temporary file first, so that readers never see a
+        # partially written cache file
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        if DATA_CACHE_FORMAT == "parquet":
+            data.to_parquet(tmp_file, index=False)
+        else:
+            data.to_pickle(tmp_file)
+        os.replace(tmp_file, cache_file)
+    except Exception as e:
+        warnings.warn(f"Failed to cache {data_file}: {e}")
+    return data
+
+
+def _cache_data_files(data_files: List[str]) -> int:
+    """Parse csv files into the on-disk cache. This is meant to be run in
+    worker processes: nothing but the number of files is sent back, the
+    parsed data is read from the cache afterwards."""
+    for data_file in data_files:
+        _load_data_file(data_file)
+    _save_manifests()
+    return len(data_files)
+
+
+def _filter_data(
+        data: pd.DataFrame,
+        security: Security,
+        start: datetime,
+        end: datetime
+) -> pd.DataFrame:
+    """Sort the (minute) data by time, and keep only the rows within the time
+    range given"""
+    time_col = 'time_key'
+    data = data.sort_values(by=[time_col])
+    if BAR_CONVENTION.get(security.code) == 'start':
+        start -= timedelta(minutes=int(TIME_STEP/60/1000))
+    start_str = start.strftime("%Y-%m-%d %H:%M:%S")
+    end_str = end.strftime("%Y-%m-%d %H:%M:%S")
+    data = data[(data[time_col] >= start_str)
+                & (data[time_col] <= end_str)]
+    data[time_col] = pd.to_datetime(data[time_col])
+    data = data.dropna()
+    data.reset_index(drop=True, inplace=True)
+    return data
+
+
+def _needs_resampling(security: Security, dtype: str, **kwargs) -> bool:
+    """Whether the bars of the interval given are not stored on disk, and
+    have to be resampled from the 1-minute bars"""
+    interval = kwargs.get('interval')
+    if dtype != 'kline' or interval is None or interval == '1min':
+        return False
+    if os.path.exists(_get_data_path(security, dtype, **kwargs)):
+        return False
+    return os.path.exists(_get_data_path(security, dtype, interval='1min'))
+
+
+def _get_resampled_data(
+        security: Security,
+        start: datetime,
+        end: datetime,
+        dtype: str,
+        **kwargs
+) -> pd.DataFrame:
+    """Resample the 1-minute bars to the interval given (respecting the
+    `trading_sessions` and BAR_CONVENTION of the security). Futures prices
+    are adjusted before resampling, so that no bar mixes two contracts. The
+    resampled bars are cached on disk, keyed by the 1-minute files they are
+    built from."""
+    time_col = 'time_key'
+    interval = kwargs['interval']
+    trading_sessions = kwargs.get('trading_sessions')
+    adjust_method = kwargs.get('adjust_method', AdjustMethod.RATIO)
+    bar_convention = BAR_CONVENTION.get(security.code, 'end')
+    # one more day ahead, so that the first periods are complete even if
+    # their sessions cross midnight
+    base_kwargs = dict(kwargs, interval='1min')
+    data_files = _get_data_files_in_range(
+        security, start - timedelta(days=1), end, dtype, **base_kwargs)
+    if not data_files:
+        raise ValueError(
+            f"There is no historical data for {security.code} within time range"
+            f": [{start} - {end}]!")
+
+    cache_file = None
+    if DATA_CACHE_PATH:
+        fingerprint = _get_file_stats(data_files)
+        fingerprint.append((interval, bar_convention, adjust_method.name,
+                            str(trading_sessions)))
+        key = hashlib.md5(repr(fingerprint).encode("utf-8")).hexdigest()
+        cache_file = Path(DATA_CACHE_PATH).joinpath(
+            "resampled", security.code, f"{key}.{DATA_CACHE_FORMAT}")
+    data = None
+    if cache_file is not None and cache_file.exists():
+        try:
+            if DATA_CACHE_FORMAT == "parquet":
+                data = pd.read_parquet(cache_file)
+            else:
+                data = pd.read_pickle(cache_file)
+            _mark_used(cache_file)
+        except Exception:
+            # corrupted cache file, rebuild it below
+            data = None
+    if data is None:
+        data = pd.concat([_load_data_file(f) for f in data_files])
+        data[time_col] = pd.to_datetime(data[time_col])
+        data = data.sort_values(by=[time_col]).dropna()
+        data.reset_index(drop=True, inplace=True)
+        if 'ticker' in data.columns:
+            data = adjust_prices(
+                data=data,
+                roll_schedule=get_roll_schedule(data, time_col=time_col),
+                method=adjust_method,
+                time_col=time_col)
+        data = resample_bars(
+            data=data,
+            interval=interval,
+            trading_sessions=trading_sessions,
+            bar_convention=bar_convention,
+            time_col=time_col)
+        if cache_file is not None:
+            try:
+                cache_file.parent.mkdir(parents=True, exist_ok=True)
+                tmp_file = cache_file.with_name(
+                    f"{cache_file.name}.{os.getpid()}.tmp")
+                if DATA_CACHE_FORMAT == "parquet":
+                    data.to_parquet(tmp_file, index=False)
+                else:
+                    data.to_pickle(tmp_file)
+                os.replace(tmp_file, cache_file)
+                _mark_used(cache_file)
+                _prune_resampled_cache(cache_file)
+            except Exception as e:
+                warnings.warn(
+                    f"Failed to cache resampled data of {security.code}: {e}")
+    data = data[(data[time_col] >= start - timedelta(
+        minutes=get_interval_minutes(interval)
+        if bar_convention == 'start' else 0))
+        & (data[time_col] <= end)]
+    data = data.reset_index(drop=True)
+    if data.empty:
+        raise ValueError(
+            f"There is no historical data for {security.code} within time range"
+            f": [{start} - {end}]!")
+    return data
+
+
+def _mark_used(cache_file: Path):
+    """Set the mtime of a cache file to now (with the full precision of the
+    clock, the mtime given by the file system may be coarser)"""
+    now = time.time_ns()
+    os.utime(cache_file, ns=(now, now))
+
+
+def _prune_resampled_cache(cache_file: Path):
+    """Keep only the RESAMPLED_CACHE_SIZE most recently used resampled data
+    of a security (e.g., the windows of the historical bars move forward
+    during a backtest, and each one is cached)"""
+    cache_files = sorted(
+        (f for f in cache_file.parent.iterdir()
+         if f.suffix == cache_file.suffix and f != cache_file),
+        key=lambda f: f.stat().st_mtime_ns,
+        reverse=True)
+    for stale_file in cache_files[max(RESAMPLED_CACHE_SIZE - 1, 0):]:
+        try:
+            stale_file.unlink()
+        except FileNotFoundError:
+            # removed by another process
+            pass
 
 
 def _get_data(
@@ -200,126 +701,179 @@ def _get_data(
 ) -> pd.DataFrame:
     """Get historical data"""
     time_col = 'time_key'
+    if _needs_resampling(security, dtype, **kwargs):
+        # higher intervals that are not stored on disk are resampled from
+        # the 1-minute bars (already adjusted for futures rolls)
+        full_data = _get_resampled_data(security, start, end, dtype, **kwargs)
+        _save_manifests()
+        return full_data
     if kwargs.get('interval') and 'min' in kwargs.get('interval'):
-        # Get all csv files of the security given
-        data_files = _get_data_files(security, dtype, **kwargs)
-        # Filter out the data that is within the time range given
-        data_files_in_range = []
-        for data_file in data_files:
-            dt = datetime.strptime(
-                data_file[-14:].replace(".csv", ""), "%Y-%m-%d").date()
-            if start.date() <= dt <= end.date():
-                data_files_in_range.append(data_file)
-        # Aggregate the data to a dataframe
-        full_data = pd.DataFrame()
-        for data_file in sorted(data_files_in_range):
-            data_path = _get_data_path(security, dtype)
-            if 'open' in read_row_from_csv(f"{data_path}/{data_file}", 1):
-                data = pd.read_csv(f"{data_path}/{data_file}")
-            elif 'open' in read_row_from_csv(f"{data_path}/{data_file}", 2):
-                data = pd.read_csv(f"{data_path}/{data_file}", header=[0,1], index_col=[0])
-                # get only the principal contract
-                levels = [lvl for lvl in set(data.columns.get_level_values(0)) if lvl!='meta']
-                volumes = {lvl: data.xs(lvl, level=0, axis=1).dropna()['volume'].sum() for lvl in levels}
-                principal_level = max(volumes, key=volumes.get)
-                data = data.xs(principal_level, level=0, axis=1).reset_index()
-            # # Confirm the time column could be parsed into datetime
-            # try:
-            #     datetime.strptime(data.iloc[0][time_col], "%Y-%m-%d %H:%M:%S")
-            #
-            # except BaseException:
-            #     raise ValueError(
-            #         f"{time_col} data {data.iloc[0][time_col]} can not convert to datetime")
-            full_data = pd.concat([full_data, data])
+        # Aggregate the data within the time range to a dataframe
+        data_files = _get_data_files_in_range(
+            security, start, end, dtype, **kwargs)
+        data = [_load_data_file(data_file) for data_file in data_files]
+        full_data = pd.concat(data) if data else pd.DataFrame()
         if full_data.empty:
             raise ValueError(
                 f"There is no historical data for {security.code} within time range"
                 f": [{start} - {end}]!")
-        full_data = full_data.sort_values(by=[time_col])
-        if BAR_CONVENTION.get(security.code) == 'start':
-            start -= timedelta(minutes=int(TIME_STEP/60/1000))
-        start_str = start.strftime("%Y-%m-%d %H:%M:%S")
-        end_str = end.strftime("%Y-%m-%d %H:%M:%S")
-        full_data = full_data[(full_data[time_col] >= start_str)
-                              & (full_data[time_col] <= end_str)]
-        full_data["time_key"] = pd.to_datetime(full_data["time_key"])
-        full_data = full_data.dropna()
-        full_data.reset_index(drop=True, inplace=True)
+        full_data = _filter_data(full_data, security, start, end)
     elif kwargs.get('interval') == '1day':
-        data_path = _get_data_path(security, dtype, interval='1day')
-        if 'open' in read_row_from_csv(f"{data_path}/ohlcv.csv", 1):
-            data = pd.read_csv(f"{data_path}/ohlcv.csv")
-        elif 'open' in read_row_from_csv(f"{data_path}/ohlcv.csv", 2):
-            data = pd.read_csv(f"{data_path}/ohlcv.csv", header=[0, 1], index_col=[0])
-            # get only the principal contract
-            levels = [lvl for lvl in set(data.columns.get_level_values(0)) if lvl != 'meta']
-            volumes = {lvl: data.xs(lvl, level=0, axis=1).dropna()['volume'].sum() for lvl in levels}
-            principal_level = max(volumes, key=volumes.get)
-            data = data.xs(principal_level, level=0, axis=1).reset_index()
+        data_files = _get_data_files_in_range(
+            security, start, end, dtype, **kwargs)
+        data = _load_data_file(data_files[0])
         full_data = data
         full_data['time_key'] = pd.to_datetime(data['time_key'])
 
-    # build continuous contracts for futures
-    #
-    # | idx |     full_data   |  full_data.shift(1)  | full_data.shift(-1) |  switch1  |  switch2  |
-    # |-----|-----------------|----------------------|---------------------|-----------|-----------|
-    # |  0  |       1         |        NaN           |         1           |     Y     |           |
-    # |  1  |       1         |         1            |         2           |           |     Y     |
-    # |  2  |       2         |         1            |         2           |     Y     |           |
-    # |  3  |       2         |         2            |         2           |           |           |
-    # |  4  |       2         |         2            |         3           |           |     Y     |
-    # |  5  |       3         |         2            |         4           |     Y     |     Y     |
-    # |  6  |       4         |         3            |        NaN          |     Y     |     Y     |
-    # |-----|-----------------|----------------------|---------------------|-----------|-----------|
-    #
-    # we need to find even number of rows, where for each consecutive two rows, the second row with `switch1=Y`, and
-    # first row with `switch2=Y`. In the above example, this means we want to get the following rows (the `roll`):
-    #
-    # | idx |     full_data   |  full_data.shift(1)  | full_data.shift(-1) |  switch1  |  switch2  |
-    # |-----|-----------------|----------------------|---------------------|-----------|-----------|
-    # |  1  |       1         |         1            |         2           |           |     Y     |
-    # |  2  |       2         |         1            |         2           |     Y     |           |
-    # |-----|-----------------|----------------------|---------------------|-----------|-----------|
-    # |  4  |       2         |         2            |         3           |           |     Y     |
-    # |  5  |       3         |         2            |         4           |     Y     |           |
-    # |-----|-----------------|----------------------|---------------------|-----------|-----------|
-    # |  5  |       3         |         2            |         4           |           |     Y     |
-    # |  6  |       4         |         3            |        NaN          |     Y     |           |
-    # |-----|-----------------|----------------------|---------------------|-----------|-----------|
-    #
-    # where row 5 has been used twice.
-
+    # build continuous contracts for futures (historical prices are adjusted
+    # at each roll, i.e., whenever the `ticker` changes)
     if 'ticker' in full_data.columns:
-        switch1 = (full_data['ticker'] != full_data['ticker'].shift(1)).astype(int)
-        switch2 = (full_data['ticker'] != full_data['ticker'].shift(-1)).astype(int)
-        if switch1[switch1>0].empty:
-            roll = pd.DataFrame()
-        else:
-            switch_rows = []
-            for i in switch1[switch1>0].index:
-                if i == 0:
-                    continue
-                if switch2.loc[i-1] == 1:
-                    switch_rows.extend([i-1, i])
-            roll = full_data.loc[switch_rows]
-        assert roll.shape[0] % 2 == 0, 'roll records should be an even number'
-        # get adjustment factors and corresponding indices
-        adj_factors = []
-        adj_indices = []
-        for i in range(1, len(roll), 2):
-            factor = roll.iloc[i]['close'] / roll.iloc[i - 1]['close']
-            adj_factors.append(factor)
-            adj_indices.append(roll.iloc[[i-1]].index[0])
-        # Adjust historical prices and make continuous data
-        for idx, factor in zip(adj_indices, adj_factors):
-            # print(idx, factor)
-            full_data.loc[:idx, 'close'] *= factor
-            full_data.loc[:idx, 'open'] *= factor
-            full_data.loc[:idx, 'high'] *= factor
-            full_data.loc[:idx, 'low'] *= factor
+        full_data = build_continuous_contract(
+            security=security,
+            data=full_data,
+            method=kwargs.get('adjust_method', AdjustMethod.RATIO),
+            time_col=time_col,
+            cache_key=_get_data_key(data_files, start, end))
+    _save_manifests()
     return full_data
 
 
+def _get_data_key(
+        data_files: List[str],
+        start: datetime,
+        end: datetime
+) -> tuple:
+    """Identify the data loaded from the files within [start, end] (a file
+    modified on disk gives a new key)"""
+    return (start, end) + tuple(_get_file_stats(data_files))
+
+
+def _get_data_summary(
+        security: Security,
+        start: datetime,
+        end: datetime,
+        dtype: str,
+        **kwargs
+) -> Dict[str, Any]:
+    """Scan the (minute) data within the time range file by file, and collect
+    the trading days and the timestamps, as well as the roll schedule of
+    futures. Only one file is held in memory at a time."""
+    time_col = 'time_key'
+    trading_days = set()
+    datetimes = []
+    roll_boundaries = []
+    data_files = _get_data_files_in_range(security, start, end, dtype, **kwargs)
+    for data_file in data_files:
+        data = _filter_data(_load_data_file(data_file), security, start, end)
+        if data.empty:
+            continue
+        trading_days.update(data[time_col].dt.strftime("%Y-%m-%d").unique())
+        datetimes.append(data[time_col].to_numpy())
+        if 'ticker' in data.columns:
+            roll_boundaries.append(_get_roll_boundaries(data))
+    if len(trading_days) == 0:
+        raise ValueError(
+            f"There is no historical data for {security.code} within time range"
+            f": [{start} - {end}]!")
+    roll_schedule = None
+    if roll_boundaries:
+        roll_schedule = get_roll_schedule(
+            pd.concat(roll_boundaries, ignore_index=True), time_col=time_col)
+    _save_manifests()
+    return dict(
+        trading_days=sorted(trading_days),
+        datetimes=list(pd.DatetimeIndex(
+            np.concatenate(datetimes)).to_pydatetime()),
+        roll_schedule=roll_schedule)
+
+
+def _get_roll_boundaries(data: pd.DataFrame) -> pd.DataFrame:
+    """Rolls only depend on consecutive rows with different tickers, so it
+    is enough to keep the first/last rows and the rows around each ticker
+    change"""
+    ticker = data['ticker'].to_numpy()
+    switch = np.flatnonzero(ticker[1:] != ticker[:-1])
+    rows = np.unique(np.concatenate(
+        [[0, len(data) - 1], switch, switch + 1]))
+    return data.iloc[rows]
+
+
+def _get_roll_schedule(
+        security: Security,
+        start: datetime,
+        end: datetime,
+        dtype: str,
+        **kwargs
+) -> pd.DataFrame:
+    """Roll schedule of the futures data loaded by `_get_data` for the time
+    range, i.e., the rolls its prices are adjusted with (resampled bars are
+    adjusted with the rolls of the whole 1-minute files they are built
+    from). Only one file is held in memory at a time.
+
+    :return: the roll schedule, or None if the data have no tickers
+    """
+    time_col = 'time_key'
+    if _needs_resampling(security, dtype, **kwargs):
+        data_files = _get_data_files_in_range(
+            security, start - timedelta(days=1), end, dtype,
+            **dict(kwargs, interval='1min'))
+        time_range = None
+    elif kwargs.get('interval') == '1day':
+        data_files = _get_data_files_in_range(
+            security, start, end, dtype, **kwargs)
+        time_range = None
+    else:
+        data_files = _get_data_files_in_range(
+            security, start, end, dtype, **kwargs)
+        time_range = (start, end)
+    roll_boundaries = []
+    for data_file in data_files:
+        data = _load_data_file(data_file)
+        if 'ticker' not in data.columns:
+            continue
+        if time_range is not None:
+            data = _filter_data(data, security, *time_range)
+        else:
+            data = data.copy()
+            data[time_col] = pd.to_datetime(data[time_col])
+            data = data.sort_values(by=[time_col]).dropna()
+        if not data.empty:
+            roll_boundaries.append(_get_roll_boundaries(data))
+    _save_manifests()
+    if not roll_boundaries:
+        return None
+    data = pd.concat(roll_boundaries).sort_values(by=[time_col])
+    return get_roll_schedule(data.reset_index(drop=True), time_col=time_col)
+
+
+def _get_data_chunks(
+        security: Security,
+        start: datetime,
+        end: datetime,
+        dtype: str,
+        read_ahead_days: int = 1,
+        roll_schedule: pd.DataFrame = None,
+        **kwargs
+) -> Iterator[pd.DataFrame]:
+    """Load the (minute) data lazily, `read_ahead_days` day files at a time.
+    The next chunk is read only when the previous one has been consumed.
+    Futures prices are adjusted with the roll schedule of the whole time
+    range (see `_get_data_summary`)."""
+    data_files = _get_data_files_in_range(security, start, end, dtype, **kwargs)
+    for i in range(0, len(data_files), read_ahead_days):
+        data = pd.concat([_load_data_file(data_file)
+                          for data_file in data_files[i:i + read_ahead_days]])
+        data = _filter_data(data, security, start, end)
+        if data.empty:
+            continue
+        if 'ticker' in data.columns and roll_schedule is not None:
+            data = adjust_prices(
+                data=data,
+                roll_schedule=roll_schedule,
+                method=kwargs.get('adjust_method', AdjustMethod.RATIO))
+        yield data
+
+
 def _get_data_iterator(
         security: Stock,
         full_data: pd.DataFrame,
@@ -334,15 +888,164 @@ def _get_data_iterator(
         "The first column in `full_data` must be a `*time*` column, but "
         f"{time_col} was given."
     )
-    for _, row in full_data.iterrows():
-        cur_time = row[time_col].to_pydatetime()
-        kwargs = {"datetime": cur_time, "security": security}
-        for col in full_data.columns:
-            if col == time_col:
-                continue
-            kwargs[col] = row[col]
-        data = data_cls(**kwargs)
-        yield data
+    fields = [col for col in full_data.columns if col != time_col]
+    # Extract the columns as arrays of python objects in bulk, instead of
+    # converting the values row by row
+    datetimes = pd.DatetimeIndex(full_data[time_col]).to_pydatetime()
+    columns = [full_data[col].tolist() for col in fields]
+    # If the columns are in the same order as the fields of the data class,
+    # the data objects can be constructed with positional arguments
+    cls_fields = [f.name for f in dataclasses.fields(data_cls)]
+    if fields == cls_fields[2:2 + len(fields)]:
+        for cur_time, *values in zip(datetimes, *columns):
+            yield data_cls(cur_time, security, *values)
+    else:
+        for cur_time, *values in zip(datetimes, *columns):
+            yield data_cls(
+                datetime=cur_time,
+                security=security,
+                **dict(zip(fields, values)))
+
+
+class DataSeries:
+    """Data of a security sorted by time (e.g., bars), which supports lookups
+    of the latest data at any time with a binary search. The data objects
+    are built on demand from the columns."""
+
+    def __init__(
+            self,
+            security: Stock,
+            full_data: pd.DataFrame,
+            class_name: str
+    ):
+        # `class_name` could be Bar, CapitalDistribution, Quote, Orderbook, etc
+        self.security = security
+        self.data_cls = getattr(importlib.import_module(
+            "qtrader.core.data"), class_name)
+        time_col = full_data.columns[0]
+        assert "time" in time_col or "Time" in time_col, (
+            "The first column in `full_data` must be a `*time*` column, but "
+            f"{time_col} was given."
+        )
+        self.fields = [col for col in full_data.columns if col != time_col]
+        self.datetimes = list(
+            pd.DatetimeIndex(full_data[time_col]).to_pydatetime())
+        self.columns = [full_data[col].tolist() for col in self.fields]
+        cls_fields = [f.name for f in dataclasses.fields(self.data_cls)]
+        self.positional = self.fields == cls_fields[2:2 + len(self.fields)]
+        # the data object built last time (consecutive lookups usually hit
+        # the same index)
+        self._last_idx = None
+        self._last_data = None
+
+    def __len__(self) -> int:
+        return len(self.datetimes)
+
+    def __getitem__(self, idx: int) -> Any:
+        if idx < 0:
+            idx += len(self.datetimes)
+        if idx == self._last_idx:
+            return self._last_data
+        values = [column[idx] for column in self.columns]
+        if self.positional:
+            data = self.data_cls(self.datetimes[idx], self.security, *values)
+        else:
+            data = self.data_cls(
+                datetime=self.datetimes[idx],
+                security=self.security,
+                **dict(zip(self.fields, values)))
+        self._last_idx = idx
+        self._last_data = data
+        return data
+
+    def index(self, cur_datetime: datetime, strict: bool = False) -> int:
+        """Number of data points at (or strictly before if `strict`) the
+        datetime"""
+        if strict:
+            return bisect.bisect_left(self.datetimes, cur_datetime)
+        return bisect.bisect_right(self.datetimes, cur_datetime)
+
+    def get(self, cur_datetime: datetime, strict: bool = False) -> Any:
+        """Latest data at (or strictly before if `strict`) the datetime"""
+        idx = self.index(cur_datetime, strict)
+        if idx == 0:
+            return None
+        return self[idx - 1]
+
+    def get_next(self, cur_datetime: datetime, strict: bool = False) -> Any:
+        """Earliest data after the datetime (the counterpart of `get`)"""
+        idx = self.index(cur_datetime, strict)
+        if idx == len(self.datetimes):
+            return None
+        return self[idx]
+
+
+class DataStream:
+    """Same lookups as `DataSeries`, over data that are loaded chunk by chunk
+    (see `_get_data_chunks`). Only the current chunk and the one ahead are
+    held in memory; looking up a datetime before the current chunk restarts
+    the stream from the beginning."""
+
+    def __init__(
+            self,
+            security: Stock,
+            data_chunks: Callable[[], Iterator[pd.DataFrame]],
+            class_name: str
+    ):
+        self.security = security
+        self.data_chunks = data_chunks
+        self.class_name = class_name
+        self._reset()
+
+    def _reset(self):
+        """Start over from the first chunk"""
+        self._chunks = self.data_chunks()
+        self._series = None
+        self._last = None  # last data of the chunks before the current one
+        self._ahead = self._read_chunk()
+
+    def _read_chunk(self) -> DataSeries:
+        """Next non-empty chunk (None if exhausted)"""
+        for data in self._chunks:
+            series = DataSeries(self.security, data, self.class_name)
+            if len(series) > 0:
+                return series
+        return None
+
+    def _advance(self, cur_datetime: datetime, strict: bool):
+        """Move forward to the chunk that covers the datetime"""
+        if self._last is not None and (
+            self._last.datetime >= cur_datetime if strict
+            else self._last.datetime > cur_datetime
+        ):
+            # rewind
+            self._reset()
+        while self._ahead is not None and self._ahead.index(
+                cur_datetime, strict) > 0:
+            if self._series is not None:
+                self._last = self._series[-1]
+            self._series = self._ahead
+            self._ahead = self._read_chunk()
+
+    def get(self, cur_datetime: datetime, strict: bool = False) -> Any:
+        """Latest data at (or strictly before if `strict`) the datetime"""
+        self._advance(cur_datetime, strict)
+        if self._series is not None:
+            data = self._series.get(cur_datetime, strict)
+            if data is not None:
+                return data
+        return self._last
+
+    def get_next(self, cur_datetime: datetime, strict: bool = False) -> Any:
+        """Earliest data after the datetime (the counterpart of `get`)"""
+        self._advance(cur_datetime, strict)
+        if self._series is not None:
+            data = self._series.get_next(cur_datetime, strict)
+            if data is not None:
+                return data
+        if self._ahead is not None:
+            return self._ahead[0]
+        return None
 
 
 def _load_historical_bars_in_reverse(
@@ -352,16 +1055,9 @@ def _load_historical_bars_in_reverse(
 ) -> List[str]:
     """Load historical csv data in reversed order."""
     data_path = _get_data_path(security, "kline", interval=interval)
-    csv_files = os.listdir(data_path)
-    csv_files = [f for f in csv_files if ".csv" in f]
-    hist_csv_files = []
-    for f in csv_files:
-        if "_" in f:
-            hist_csv_files.append(f)
-        else:
-            if datetime.strptime(
-                    f, "%Y-%m-%d.csv").date() <= cur_datetime.date():
-                hist_csv_files.append(f)
+    manifest = _get_manifest(data_path)
+    hist_csv_files = set(f for f in manifest.entries if "_" in f)
+    hist_csv_files.update(manifest.get_files(end=cur_datetime.date()))
     hist_csv_files = sorted(hist_csv_files, reverse=True)
     return hist_csv_files
 
@@ -32,5 +32,5 @@ class Deal:
     updated_time: datetime = None
     filled_avg_price: float = 0
     filled_quantity: int = 0
-    dealid: str = ""
-    orderid: str = ""
+    dealid: int = None
+    orderid: int = None
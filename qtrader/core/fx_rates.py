@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+# @Time    : 20/10/2026 10:15 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: fx_rates.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+
+from qtrader.core.security import Security
+
+
+def split_currency_pair(pair: str) -> Tuple[str, str]:
+    """Base and quote currencies of a pair such as 'USDHKD' (None if the pair
+    is not made of two 3-letter codes)"""
+    if len(pair) != 6:
+        return None
+    return pair[:3], pair[3:]
+
+
+class FXRateMatrix:
+    """Exchange rates between all currencies of the currency tickers, cached
+    per time step.
+
+    A ticker (e.g., 'CASH.IDEALPRO.USDHKD') quotes the number of units of
+    the quote currency (HKD) for 1 unit of the base currency (USD). Rates of
+    pairs with a ticker are taken from the bar of that ticker only (directly,
+    or inverted). The other rates are triangulated: the bars of all tickers
+    are then read, and the matrix of rates is built once for the time step,
+    by walking a spanning tree of each group of connected currencies from
+    its most connected currency (a rate may chain through several other
+    currencies, e.g., rate(EUR, JPY) = rate(EUR, USD) * rate(USD, JPY)).
+    """
+
+    def __init__(
+            self,
+            currencies: List[Security],
+            get_price: Callable[[Security, datetime], float],
+            get_key: Callable[[datetime], Hashable] = None
+    ):
+        """
+        :param currencies: currency tickers
+        :param get_price: price (close of the recent bar) of a ticker as of
+            a datetime, None if not available
+        :param get_key: time step of a datetime (prices are read once per
+            time step); the datetime itself by default
+        """
+        self.get_price = get_price
+        self.get_key = get_key
+        # parse the ticker codes only once
+        self.pairs: Dict[str, Security] = {}
+        self.legs: Dict[Security, Tuple[str, str]] = {}
+        for currency in currencies:
+            pair = currency.code.split('.')[-1]
+            self.pairs[pair] = currency
+            legs = split_currency_pair(pair)
+            if legs is not None:
+                self.legs[currency] = legs
+        counts = Counter(c for legs in self.legs.values() for c in legs)
+        # the most connected currency comes first (root of the spanning tree
+        # of its group)
+        self.index: Dict[str, int] = {
+            c: i for i, (c, _) in enumerate(counts.most_common())}
+        self.key = None
+        self.cur_datetime = None
+        self.rates: np.ndarray = None
+        # prices read in the current time step (None if not available)
+        self.direct_rates: Dict[str, float] = {}
+
+    def update(self, cur_datetime: datetime):
+        """Start a new time step (if the datetime is not in the current one)"""
+        key = cur_datetime if self.get_key is None else self.get_key(
+            cur_datetime)
+        if key == self.key and self.cur_datetime is not None:
+            return
+        self.key = key
+        self.cur_datetime = cur_datetime
+        self.direct_rates = {}
+        self.rates = None
+
+    def _get_direct_rate(self, pair: str) -> float:
+        """Price of the ticker of a pair in the current time step (read at
+        most once)"""
+        if pair not in self.direct_rates:
+            price = self.get_price(self.pairs[pair], self.cur_datetime)
+            self.direct_rates[pair] = price if price else None
+        return self.direct_rates[pair]
+
+    def _build(self):
+        """Build the matrix of rates of the current time step"""
+        # units of each currency per unit of the first currency of its
+        # connected component (nan if not reachable)
+        num_currencies = len(self.index)
+        units = np.full(num_currencies, np.nan)
+        component = np.full(num_currencies, -1)
+        edges = []
+        for base, quote in self.legs.values():
+            price = self._get_direct_rate(f"{base}{quote}")
+            if price is not None:
+                edges.append((self.index[base], self.index[quote], price))
+        for root in range(num_currencies):
+            if component[root] >= 0:
+                continue
+            component[root] = root
+            units[root] = 1.0
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                for base, quote, price in edges:
+                    if base == node and component[quote] < 0:
+                        units[quote] = units[base] * price
+                        component[quote] = root
+                        stack.append(quote)
+                    elif quote == node and component[base] < 0:
+                        units[base] = units[quote] / price
+                        component[base] = root
+                        stack.append(base)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = units[None, :] / units[:, None]
+        rates[component[:, None] != component[None, :]] = np.nan
+        self.rates = rates
+
+    def get_rate(self, base: str, quote: str, cur_datetime: datetime) -> float:
+        """Units of quote currency per unit of base currency as of the
+        datetime (None if not available)"""
+        if base == quote:
+            return 1.0
+        self.update(cur_datetime)
+        # the bar of a ticker of the pair takes precedence
+        if f"{base}{quote}" in self.pairs:
+            rate = self._get_direct_rate(f"{base}{quote}")
+            if rate is not None:
+                return rate
+        if f"{quote}{base}" in self.pairs:
+            rate = self._get_direct_rate(f"{quote}{base}")
+            if rate is not None:
+                return 1. / rate
+        if base not in self.index or quote not in self.index:
+            return None
+        if self.rates is None:
+            self._build()
+        rate = self.rates[self.index[base], self.index[quote]]
+        if np.isnan(rate):
+            return None
+        return float(rate)
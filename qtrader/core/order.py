@@ -37,4 +37,4 @@ class Order:
     filled_avg_price: float = 0
     filled_quantity: int = 0
     status: OrderStatus = OrderStatus.UNKNOWN
-    orderid: str = ""
+    orderid: int = None
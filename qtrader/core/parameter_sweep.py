@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+# @Time    : 19/10/2026 2:15 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: parameter_sweep.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import itertools
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Tuple, Type
+
+import pandas as pd
+
+from qtrader.core.balance import AccountBalance
+from qtrader.core.engine import Engine
+from qtrader.core.event_engine import BarEventEngine
+from qtrader.core.event_engine import BarEventEngineRecorder
+from qtrader.core.portfolio import Portfolio
+from qtrader.core.position import Position
+from qtrader.core.security import Security
+from qtrader.core.strategy import BaseStrategy
+from qtrader.gateways import BacktestGateway
+
+# Gateway loaded by the parent process. Forked workers inherit it (the
+# data are shared copy-on-write instead of being sent to each worker)
+_shared_gateway: BacktestGateway = None
+
+
+class ParameterSweep:
+    """Run a strategy with different sets of parameters on the same data.
+
+    The data of the BacktestGateway are loaded once; each set of parameters
+    is run with its own BarEventEngine, in a process pool if `max_workers` >
+    1. The parameters are passed to the strategy as `init_strategy_params`,
+    i.e., they are available as `self.params[gateway_name][security_code]`
+    in the strategy.
+
+    Where processes are forked (Linux), workers share the gateway loaded by
+    the parent. Otherwise (spawn), each worker loads the gateway again from
+    the on-disk data cache (see DATA_CACHE_PATH), without parsing the csv
+    files.
+    """
+
+    def __init__(
+            self,
+            strategy_class: Type[BaseStrategy],
+            securities: List[Security],
+            start: datetime,
+            end: datetime,
+            init_capital: float,
+            gateway_name: str = "Backtest",
+            gateway_kwargs: Dict[str, Any] = None,
+            strategy_kwargs: Dict[str, Any] = None,
+            recorded_fields: List[str] = None,
+            max_workers: int = 1
+    ):
+        """
+        :param strategy_class: strategy to run (a BaseStrategy subclass)
+        :param securities: securities traded by the strategy
+        :param start: start of the data loaded
+        :param end: end of the data loaded
+        :param init_capital: initial cash of each run
+        :param gateway_name: name of the backtest gateway
+        :param gateway_kwargs: other params of BacktestGateway (e.g., fees,
+            trading_sessions)
+        :param strategy_kwargs: other params of the strategy (e.g.,
+            strategy_account, strategy_trading_sessions)
+        :param recorded_fields: fields recorded by BarEventEngineRecorder in
+            addition to the default ones (e.g., ["close"])
+        :param max_workers: number of processes
+        """
+        self.strategy_class = strategy_class
+        self.securities = securities
+        self.start = start
+        self.end = end
+        self.init_capital = init_capital
+        self.gateway_name = gateway_name
+        self.gateway_kwargs = gateway_kwargs or {}
+        self.strategy_kwargs = strategy_kwargs or {}
+        self.recorded_fields = recorded_fields or []
+        self.max_workers = max_workers
+        self.gateway = None
+
+    @staticmethod
+    def grid(param_space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        """All combinations of the parameter values"""
+        names = list(param_space.keys())
+        return [dict(zip(names, values))
+                for values in itertools.product(*param_space.values())]
+
+    @staticmethod
+    def random_search(
+            param_space: Dict[str, List[Any]],
+            num_samples: int,
+            seed: int = None
+    ) -> List[Dict[str, Any]]:
+        """Random combinations of the parameter values (without
+        duplicates)"""
+        param_sets = ParameterSweep.grid(param_space)
+        rng = random.Random(seed)
+        return rng.sample(param_sets, min(num_samples, len(param_sets)))
+
+    def load(self) -> BacktestGateway:
+        """Load the data into the gateway (only once)"""
+        if self.gateway is None:
+            self.gateway = self._create_gateway()
+        return self.gateway
+
+    def _create_gateway(self) -> BacktestGateway:
+        return BacktestGateway(
+            securities=self.securities,
+            gateway_name=self.gateway_name,
+            start=self.start,
+            end=self.end,
+            **self.gateway_kwargs)
+
+    def run(
+            self,
+            param_sets: List[Dict[str, Any]],
+            start: datetime = None,
+            end: datetime = None
+    ) -> pd.DataFrame:
+        """Run the strategy with each set of parameters within [start, end]
+        (by default, the whole time range loaded).
+
+        :return: records of all runs in one table, i.e., the recorded fields
+            plus the parameters, with a `run` column numbering the parameter
+            sets
+        """
+        start = start or self.start
+        end = end or self.end
+        results = self.run_tasks(
+            [(params, start, end) for params in param_sets])
+        return pd.concat(results, ignore_index=True)
+
+    def run_tasks(
+            self,
+            tasks: List[Tuple[Dict[str, Any], datetime, datetime]]
+    ) -> List[pd.DataFrame]:
+        """Run tasks of (params, start, end), which might cover different
+        time ranges of the loaded data, in one pool of processes.
+
+        :return: records of each task (in the same order as the tasks)
+        """
+        global _shared_gateway
+        self.load()
+        tasks = [(self, i, params, start, end)
+                 for i, (params, start, end) in enumerate(tasks)]
+        if self.max_workers <= 1 or len(tasks) <= 1:
+            _shared_gateway = self.gateway
+            results = [_run_task(task) for task in tasks]
+        else:
+            start_method = (
+                "fork" if "fork" in multiprocessing.get_all_start_methods()
+                else "spawn")
+            _shared_gateway = self.gateway if start_method == "fork" else None
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(start_method)
+            ) as executor:
+                results = list(executor.map(_run_task, tasks))
+        return results
+
+    def __getstate__(self):
+        # the loaded gateway is never pickled to workers
+        state = self.__dict__.copy()
+        state["gateway"] = None
+        return state
+
+    def run_one(
+            self,
+            gateway: BacktestGateway,
+            params: Dict[str, Any],
+            start: datetime,
+            end: datetime
+    ) -> pd.DataFrame:
+        """Run the strategy with one set of parameters"""
+        gateway.reset()
+        gateway.market_datetime = start
+        engine = Engine(gateways={self.gateway_name: gateway})
+        portfolio = Portfolio(
+            account_balance=AccountBalance(cash=self.init_capital),
+            position=Position(),
+            market=gateway)
+        strategy_kwargs = dict(
+            strategy_account="Parameter_Sweep",
+            strategy_version="1.0")
+        strategy_kwargs.update(self.strategy_kwargs)
+        strategy = self.strategy_class(
+            securities={self.gateway_name: self.securities},
+            engine=engine,
+            init_strategy_portfolios={self.gateway_name: portfolio},
+            init_strategy_params={self.gateway_name: {
+                security.code: dict(params) for security in self.securities
+            }},
+            **strategy_kwargs)
+        strategy.init_strategy()
+        recorder = BarEventEngineRecorder(
+            **{field: [] for field in self.recorded_fields})
+        event_engine = BarEventEngine(
+            {"sweep": strategy},
+            {"sweep": recorder},
+            engine,
+            start=start,
+            end=end)
+        event_engine.run()
+        # one gateway per run, unwrap the values recorded for it
+        records = {
+            field: [value[0] if isinstance(value, list) else value
+                    for value in getattr(recorder, field)]
+            for field in recorder.get_recorded_fields()
+            if recorder.recorded_methods[field] == "append"}
+        result = pd.DataFrame(records)
+        for name, value in params.items():
+            result[name] = value
+        return result
+
+
+def _run_task(task) -> pd.DataFrame:
+    """Run one set of parameters (in a worker process)"""
+    global _shared_gateway
+    sweep, run_id, params, start, end = task
+    if _shared_gateway is None:
+        # spawned worker: load the data once per worker (from cache)
+        _shared_gateway = sweep._create_gateway()
+    result = sweep.run_one(_shared_gateway, params, start, end)
+    result.insert(0, "run", run_id)
+    return result
@@ -14,15 +14,14 @@ written for another century.
 You should have received a copy of the JXW license with
 this file. If not, please write to: josephchenhk@gmail.com
 """
-import threading
-
 from qtrader.core.balance import AccountBalance
 from qtrader.core.constants import Direction, Offset
 from qtrader.core.deal import Deal
 from qtrader.core.position import Position, PositionData
+from qtrader.core.security import Security
+from qtrader.core.utility import get_lock
 from qtrader.gateways import BaseGateway
 
-lock = threading.Lock()
 
 class Portfolio:
     """Portfolio is bind to a specific gateway, it includes:
@@ -42,9 +41,45 @@ class Portfolio:
         self.position = position
         self.market = market
         self.reporting_currency = reporting_currency
+        # Each portfolio has its own lock, and there is no lock at all in
+        # BACKTEST mode (the trade mode of the market must have been set)
+        self.lock = get_lock(market.trade_mode)
+        position.set_trade_mode(market.trade_mode)
+        # Incremental valuation: the market value (in reporting currency) of
+        # each security held is kept, and only updated when its price is
+        # pushed (see `update_price`) or a deal of the security is filled.
+        # Securities without pushed prices, or quoted in other currencies,
+        # are revalued once per time step.
+        self.prices = dict()
+        self.market_values = dict()
+        self.market_value = 0.0
+        self._revalued = set()
+        self._position_key = None
+        self._valuation_time_step = None
+        # exchange rates of the current time step
+        self._fx_rates = dict()
+        self._fx_time_step = None
+
+    def get_exchange_rate(self, quote: str) -> float:
+        """Exchange rate from reporting currency to quote currency (cached
+        per time step)"""
+        if quote == self.reporting_currency:
+            return 1.0
+        time_step = self.market.get_time_step_key()
+        if time_step != self._fx_time_step:
+            self._fx_rates = dict()
+            self._fx_time_step = time_step
+        fx_rate = self._fx_rates.get(quote)
+        if fx_rate is None:
+            fx_rate = self.market.get_exchange_rate(
+                base=self.reporting_currency,
+                quote=quote
+            )
+            self._fx_rates[quote] = fx_rate
+        return fx_rate
 
     def update(self, deal: Deal):
-        with lock:
+        with self.lock:
             security = deal.security
             lot_size = security.lot_size
             price = deal.filled_avg_price
@@ -52,10 +87,7 @@ class Portfolio:
             direction = deal.direction
             offset = deal.offset
             filled_time = deal.updated_time
-            fx_rate = self.market.get_exchange_rate(
-                base=self.reporting_currency,
-                quote=security.quote_currency
-            )
+            fx_rate = self.get_exchange_rate(security.quote_currency)
             fee = self.market.fees(deal).total_fees / fx_rate
             # update balance
             self.account_balance.cash -= fee
@@ -80,41 +112,103 @@ class Portfolio:
                 quantity=quantity,
                 update_time=deal.updated_time
             )
+            # only the security of the deal is revalued, unless the position
+            # has also been changed otherwise
+            in_sync = self._position_key == self._get_position_key()
             self.position.update(
                 position_data=position_data,
                 offset=offset
             )
+            if in_sync:
+                self._update_market_value(security)
+                self._position_key = self._get_position_key()
+
+    def update_price(self, security: Security, price: float):
+        """Push the latest price of a security (when a bar arrives)"""
+        if price is None:
+            return
+        with self.lock:
+            self.prices[security] = price
+            if (
+                security in self.market_values
+                and self._position_key == self._get_position_key()
+            ):
+                self._set_market_value(security)
+
+    def _get_position_key(self):
+        return id(self.position), self.position.version
+
+    def _get_price(self, security: Security) -> float:
+        """Price of a security whose price has not been pushed"""
+        recent_data = self.market.get_recent_data(
+            security=security,
+            cur_datetime=self.market.market_datetime,
+            dfield="kline"
+        )
+        if recent_data is not None:
+            return recent_data.close
+        # 2022.02.23 (Joseph): If bar data is not available, we will not
+        # be able to get the updated portfolio value; We circumvent this
+        # by using the holding prices of the securities (Be alerted that
+        # this is an estimation of the portfolio value, it is NOT
+        # accurate).
+        holdings = self.position.holdings[security]
+        return sum(holdings[pos].holding_price for pos in holdings) / len(
+            holdings)
+
+    def _set_market_value(self, security: Security):
+        """Value the holdings of a security, and update the total"""
+        cur_price = self.prices.get(security)
+        if cur_price is None:
+            cur_price = self._get_price(security)
+        fx_rate = self.get_exchange_rate(security.quote_currency)
+        if (
+            security not in self.prices
+            or security.quote_currency != self.reporting_currency
+        ):
+            self._revalued.add(security)
+        else:
+            self._revalued.discard(security)
+        v = 0.0
+        holdings = self.position.holdings[security]
+        for direction in holdings:
+            position_data = holdings[direction]
+            if direction == Direction.LONG:
+                v += cur_price * position_data.quantity * security.lot_size / fx_rate
+            elif direction == Direction.SHORT:
+                v -= cur_price * position_data.quantity * security.lot_size / fx_rate
+        self.market_value += v - self.market_values.get(security, 0.0)
+        self.market_values[security] = v
+
+    def _update_market_value(self, security: Security):
+        """Value the holdings of a security after a deal (the security is
+        dropped if there are no holdings left)"""
+        if security in self.position.holdings:
+            self._set_market_value(security)
+            return
+        self.market_value -= self.market_values.pop(security, 0.0)
+        self._revalued.discard(security)
+
+    def _revalue(self):
+        """Bring the market values up to date with the position (which might
+        also be updated without a deal, e.g., synchronized with the broker)
+        and the time step"""
+        time_step = self.market.get_time_step_key()
+        position_key = self._get_position_key()
+        if position_key != self._position_key:
+            self.market_values = dict()
+            self.market_value = 0.0
+            self._revalued = set()
+            for security in self.position.holdings:
+                self._set_market_value(security)
+            self._position_key = position_key
+        elif time_step != self._valuation_time_step:
+            for security in list(self._revalued):
+                self._set_market_value(security)
+        self._valuation_time_step = time_step
 
     @property
     def value(self):
-        with lock:
-            v = self.account_balance.cash
-            for security in self.position.holdings:
-                fx_rate = self.market.get_exchange_rate(
-                    base=self.reporting_currency,
-                    quote=security.quote_currency
-                )
-                recent_data = self.market.get_recent_data(
-                    security=security,
-                    cur_datetime=self.market.market_datetime,
-                    dfield="kline"
-                )
-                if recent_data is not None:
-                    cur_price = recent_data.close
-                else:
-                    # 2022.02.23 (Joseph): If bar data is not available, we will not
-                    # be able to get the updated portfolio value; We circumvent this
-                    # by using the holding prices of the securities (Be alerted that
-                    # this is an estimation of the portfolio value, it is NOT
-                    # accurate).
-                    cur_price = 0
-                    for i, pos in enumerate(self.position.holdings[security]):
-                        cur_price += self.position.holdings[security][pos].holding_price
-                    cur_price /= (i + 1)
-                for direction in self.position.holdings[security]:
-                    position_data = self.position.holdings[security][direction]
-                    if direction == Direction.LONG:
-                        v += cur_price * position_data.quantity * security.lot_size / fx_rate
-                    elif direction == Direction.SHORT:
-                        v -= cur_price * position_data.quantity * security.lot_size / fx_rate
-            return v
+        with self.lock:
+            self._revalue()
+            return self.account_balance.cash + self.market_value
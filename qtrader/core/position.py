@@ -14,16 +14,14 @@ written for another century.
 You should have received a copy of the JXW license with
 this file. If not, please write to: josephchenhk@gmail.com
 """
-import threading
-
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Dict, List
 
-from qtrader.core.constants import Direction, Offset
+from qtrader.core.constants import Direction, Offset, TradeMode
 from qtrader.core.security import Stock
+from qtrader.core.utility import get_lock
 
-lock = threading.Lock()
 
 @dataclass
 class PositionData:
@@ -39,13 +37,33 @@ class Position:
     """Position information of a specific gateway (may include multiple
     securities)"""
 
-    def __init__(self, holdings: Dict = None):
+    def __init__(self, holdings: Dict = None, trade_mode: TradeMode = None):
         if holdings is None:
             holdings = dict()
         self.holdings = holdings
+        self.set_trade_mode(trade_mode)
+        # incremented at each update, so that valuations of the holdings can
+        # be cached until the position changes
+        self.version = 0
+
+    def set_trade_mode(self, trade_mode: TradeMode):
+        """Lock the updates unless in BACKTEST mode"""
+        self.trade_mode = trade_mode
+        self.lock = get_lock(trade_mode)
+
+    def __getstate__(self):
+        # locks can not be pickled (e.g., by the live monitor)
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = get_lock(self.trade_mode)
 
     def update(self, position_data: PositionData, offset: Offset):
-        with lock:
+        with self.lock:
+            self.version += 1
             security = position_data.security
             direction = position_data.direction
             holding_price = position_data.holding_price
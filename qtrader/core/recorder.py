@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+# @Time    : 21/10/2026 2:10 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: recorder.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import numbers
+import os
+from datetime import datetime
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from qtrader.core.security import Security
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Recorded fields holding datetime strings (stored as timestamps)
+DATETIME_FIELDS = ("datetime", "bar_datetime")
+
+
+def column_name(field: str, gateway_name: str, security_code: str = None) -> str:
+    """Column of a recorded field, e.g., 'close:Backtest:FUT.GC', or
+    'portfolio_value:Backtest' for fields with one value per gateway"""
+    if security_code is None:
+        return f"{field}:{gateway_name}"
+    return f"{field}:{gateway_name}:{security_code}"
+
+
+def get_field(records: pd.DataFrame, field: str) -> pd.DataFrame:
+    """Columns of a recorded field (in the order of the gateways and their
+    securities)"""
+    return records[[c for c in records.columns
+                    if c.split(":", 1)[0] == field]]
+
+
+def read_records(path: str) -> pd.DataFrame:
+    """Records saved by ParquetRecorder. Fields recorded with the `override`
+    method are in `records.attrs` (as str)"""
+    records = pd.read_parquet(path)
+    metadata = pq.read_metadata(path).metadata or {}
+    records.attrs = {
+        k.decode()[len("override:"):]: v.decode()
+        for k, v in metadata.items() if k.startswith(b"override:")}
+    return records
+
+
+class ParquetRecorder:
+    """Record variables in bar event-engine, and write them to a Parquet file
+    in chunks of `chunk_size` time steps as the engine runs.
+
+    It can be passed to BarEventEngine in place of BarEventEngineRecorder
+    (same `get_recorded_fields` and `write_record`), but only the current
+    chunk is kept in memory. Each field is stored in numeric (or string)
+    columns, one per gateway, or one per security of the gateway for fields
+    such as `close` (see `column_name`); the file is read back with
+    `read_records`.
+    """
+
+    def __init__(
+            self,
+            securities: Dict[str, List[Security]],
+            path: str = "results",
+            file_name: str = "result",
+            chunk_size: int = 10000,
+            **kwargs
+    ):
+        """
+        :param securities: securities of the strategy (strategy.securities),
+            to name the columns
+        :param path: folder of the results (a sub-folder is created for the
+            run, as BarEventEngineRecorder.save_csv does)
+        :param file_name: name of the Parquet file
+        :param chunk_size: number of time steps written at a time
+        :param kwargs: recorded fields, [] (append) or None (override)
+        """
+        if pa is None:
+            raise ImportError("ParquetRecorder requires pyarrow.")
+        self.securities = securities
+        self.path = path
+        self.file_name = file_name
+        self.chunk_size = chunk_size
+        self.recorded_methods = {
+            "datetime": "append",
+            "portfolio_value": "append",
+            "strategy_portfolio_value": "append",
+            "action": "append"
+        }
+        for k, v in kwargs.items():
+            if v is None:
+                self.recorded_methods[str(k)] = "override"
+                setattr(self, k, v)
+            elif isinstance(v, list) and len(v) == 0:
+                self.recorded_methods[str(k)] = "append"
+            else:
+                raise ValueError(
+                    f"Input param `{k}` for ParquetRecorder is "
+                    f"{type(v)}, only [] or None is valid!")
+        # values of the current chunk
+        self.buffers: Dict[str, List[Any]] = {
+            field: [] for field, method in self.recorded_methods.items()
+            if method == "append"}
+        self.num_records = 0
+        self.file_path = None
+        self.schema = None
+        self._writer = None
+        # columns whose values are converted to str (e.g., dicts)
+        self._str_columns = set()
+
+    def get_recorded_fields(self):
+        return list(self.recorded_methods.keys())
+
+    def write_record(self, field, value):
+        if self.recorded_methods[field] == "override":
+            setattr(self, field, value)
+            return
+        buffer = self.buffers[field]
+        buffer.append(value)
+        if (
+            len(buffer) >= self.chunk_size
+            and all(len(b) == len(buffer) for b in self.buffers.values())
+        ):
+            self.flush()
+
+    def _columns(self, field: str, value: List[Any]) -> List[str]:
+        """Columns of a field, from its value (one item per gateway)"""
+        columns = []
+        for gateway_name, gateway_value in zip(self.securities, value):
+            if isinstance(gateway_value, (list, tuple)):
+                columns.extend(
+                    column_name(field, gateway_name, security.code)
+                    for security in self.securities[gateway_name])
+            else:
+                columns.append(column_name(field, gateway_name))
+        return columns
+
+    def _to_array(self, column: str, field: str, values: List[Any]):
+        if field in DATETIME_FIELDS:
+            return pa.array(pd.to_datetime(values).to_numpy())
+        if self.schema is not None:
+            if column in self._str_columns:
+                values = [None if v is None else str(v) for v in values]
+            return pa.array(values, type=self.schema.field(column).type)
+        # infer the type of the column from its first value
+        value = next((v for v in values if v is not None), None)
+        if isinstance(value, str):
+            return pa.array(values, type=pa.string())
+        if isinstance(value, bool):
+            return pa.array(values, type=pa.bool_())
+        if value is None or isinstance(value, numbers.Number):
+            return pa.array(values, type=pa.float64())
+        self._str_columns.add(column)
+        return pa.array(
+            [None if v is None else str(v) for v in values], type=pa.string())
+
+    def flush(self):
+        """Write the records of the current chunk"""
+        num_rows = len(self.buffers["datetime"])
+        if num_rows == 0:
+            return
+        names = []
+        arrays = []
+        for field, buffer in self.buffers.items():
+            if len(buffer) != num_rows:
+                raise ValueError(
+                    f"`{field}` has {len(buffer)} records, but `datetime` "
+                    f"has {num_rows}.")
+            columns = self._columns(field, buffer[0])
+            # flatten the values of the gateways (and of their securities)
+            rows = [
+                [v for gateway_value in value
+                 for v in (gateway_value
+                           if isinstance(gateway_value, (list, tuple))
+                           else (gateway_value,))]
+                for value in buffer]
+            if any(len(row) != len(columns) for row in rows):
+                raise ValueError(
+                    f"The number of values of `{field}` has changed.")
+            for column, values in zip(columns, zip(*rows)):
+                names.append(column)
+                arrays.append(self._to_array(column, field, list(values)))
+            buffer.clear()
+        table = pa.Table.from_arrays(arrays, names=names)
+        if self._writer is None:
+            self.schema = table.schema
+            self.file_path = self._get_file_path()
+            self._writer = pq.ParquetWriter(self.file_path, self.schema)
+        self._writer.write_table(table.cast(self.schema))
+        self.num_records += num_rows
+
+    def _get_file_path(self) -> str:
+        now = datetime.now().strftime('%Y-%m-%d %H-%M-%S.%f')
+        folder = os.path.join(self.path, now)
+        os.makedirs(folder)
+        return os.path.abspath(os.path.join(folder, f"{self.file_name}.parquet"))
+
+    def save(self) -> str:
+        """Write the remaining records and close the file
+
+        :return: path of the Parquet file
+        """
+        self.flush()
+        if self._writer is None:
+            raise ValueError("No record has been written.")
+        self._writer.add_key_value_metadata({
+            f"override:{field}": str(getattr(self, field))
+            for field, method in self.recorded_methods.items()
+            if method == "override"})
+        self._writer.close()
+        self._writer = None
+        return self.file_path
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# @Time    : 18/10/2026 10:20 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: resample.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+from datetime import datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# Minutes in a calendar day
+DAY_MINUTES = 24 * 60
+
+
+def get_interval_minutes(interval: str) -> int:
+    """Convert interval (e.g., '5min', '1hour', '1day') to minutes"""
+    if "min" in interval:
+        return int(interval.replace("min", ""))
+    elif "hour" in interval:
+        return int(interval.replace("hour", "")) * 60
+    elif "day" in interval:
+        return int(interval.replace("day", "")) * DAY_MINUTES
+    raise ValueError(f"interval {interval} is NOT valid!")
+
+
+def _get_session_offsets(
+        bar_minutes: np.ndarray,
+        trading_sessions: List[List[datetime]]
+):
+    """Locate the trading session of each bar.
+
+    Returns the open (in minutes since epoch) and the length (in minutes) of
+    the session each bar belongs to, as well as a mask of the bars within
+    sessions. Session ends are inclusive, as in `utility.is_trading_time`.
+    """
+    if not trading_sessions:
+        # no sessions: the whole calendar day is one session
+        trading_sessions = [[datetime(1970, 1, 1), datetime(1970, 1, 1)]]
+    time_of_day = bar_minutes % DAY_MINUTES
+    session_open = np.zeros_like(bar_minutes)
+    session_length = np.zeros_like(bar_minutes)
+    in_session = np.zeros(bar_minutes.shape, dtype=bool)
+    for session_start, session_end in trading_sessions:
+        open_minute = session_start.hour * 60 + session_start.minute
+        close_minute = session_end.hour * 60 + session_end.minute
+        length = (close_minute - open_minute) % DAY_MINUTES or DAY_MINUTES
+        offset = (time_of_day - open_minute) % DAY_MINUTES
+        mask = (offset <= length) & ~in_session
+        session_open[mask] = bar_minutes[mask] - offset[mask]
+        session_length[mask] = length
+        in_session |= mask
+    return session_open, session_length, in_session
+
+
+def resample_bars(
+        data: pd.DataFrame,
+        interval: str,
+        trading_sessions: List[List[datetime]] = None,
+        bar_convention: str = "end",
+        time_col: str = "time_key",
+        base_interval: str = "1min"
+) -> pd.DataFrame:
+    """Resample (minute) bars to a higher interval.
+
+    Intraday bars are anchored at the open of their trading session, and the
+    last bar of a session is truncated at the session close; daily bars are
+    grouped by trading day (a session that crosses midnight belongs to the
+    day it closes). Bars are stamped with the start or the end of the
+    period according to `bar_convention`, and daily bars are stamped with
+    the trading day. Bars outside the trading sessions are dropped.
+
+    :param data: bars of `base_interval`, sorted by time
+    :param interval: target interval, e.g., '5min', '1hour', '1day'
+    :param trading_sessions: sessions of the security (as in gateways)
+    :param bar_convention: 'start' or 'end' (see BAR_CONVENTION in config)
+    :param time_col: name of the time column
+    :param base_interval: interval of the input bars
+    :return: resampled bars with the same columns
+    """
+    minutes = get_interval_minutes(interval)
+    base_minutes = get_interval_minutes(base_interval)
+    if data.empty or minutes == base_minutes:
+        return data
+    if minutes % base_minutes != 0:
+        raise ValueError(
+            f"interval {interval} is NOT a multiple of {base_interval}!")
+
+    times = pd.to_datetime(data[time_col]).to_numpy(dtype="datetime64[m]")
+    bar_minutes = times.astype(np.int64)
+    # the minute each base bar starts at
+    if bar_convention != "start":
+        bar_minutes = bar_minutes - base_minutes
+    session_open, session_length, in_session = _get_session_offsets(
+        bar_minutes, trading_sessions)
+    if not in_session.all():
+        data = data[in_session]
+        bar_minutes = bar_minutes[in_session]
+        session_open = session_open[in_session]
+        session_length = session_length[in_session]
+
+    if minutes >= DAY_MINUTES:
+        # trading day: the calendar day when the session closes
+        session_close = session_open + session_length
+        labels = (session_close - 1) // DAY_MINUTES * DAY_MINUTES
+    else:
+        offset = bar_minutes - session_open
+        last_period = np.maximum(-(-session_length // minutes) - 1, 0)
+        period = np.minimum(offset // minutes, last_period)
+        period_start = session_open + period * minutes
+        if bar_convention == "start":
+            labels = period_start
+        else:
+            labels = np.minimum(period_start + minutes,
+                                session_open + session_length)
+    if len(labels) == 0:
+        return data.iloc[:0].reset_index(drop=True)
+
+    # bars are sorted by time, so each period is a contiguous block
+    starts = np.concatenate(
+        [[0], np.flatnonzero(labels[1:] != labels[:-1]) + 1])
+    ends = np.append(starts[1:], len(labels)) - 1
+    resampled = {}
+    for col in data.columns:
+        values = data[col].to_numpy()
+        if col == time_col:
+            resampled[col] = labels[starts].astype("datetime64[m]").astype(
+                "datetime64[ns]")
+        elif col == "open":
+            resampled[col] = values[starts]
+        elif col == "high":
+            resampled[col] = np.maximum.reduceat(values, starts)
+        elif col == "low":
+            resampled[col] = np.minimum.reduceat(values, starts)
+        elif col in ("volume", "value", "num_trds"):
+            resampled[col] = np.add.reduceat(values, starts)
+        else:
+            # close, and any other field (e.g., ticker): the last one
+            resampled[col] = values[ends]
+    return pd.DataFrame(resampled, columns=data.columns)
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+# @Time    : 18/10/2026 4:10 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: session_calendar.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import bisect
+from datetime import datetime
+from datetime import date as Date
+from datetime import time as Time
+from datetime import timedelta
+from typing import List, Tuple
+
+# Microseconds in a calendar day
+DAY_MICROSECONDS = 24 * 3600 * 1000000
+
+
+def _time_to_microseconds(t: Time) -> int:
+    """Time of day in microseconds"""
+    return (
+        (t.hour * 3600 + t.minute * 60 + t.second) * 1000000 + t.microsecond)
+
+
+def get_day_sessions(
+        trading_sessions: List[List[datetime]],
+        trading_day: Date
+) -> List[List[datetime]]:
+    """Sessions (start and end datetimes) of a trading day. Sessions that
+    cross midnight end in the next calendar day, and so do the sessions after
+    them."""
+    trading_day_sessions = []
+    # normal trading day session within a calendar day
+    if trading_sessions[-1][1] > trading_sessions[0][0]:
+        for start, end in trading_sessions:
+            session_start = datetime.combine(trading_day, start.time())
+            session_end = datetime.combine(trading_day, end.time())
+            trading_day_sessions.append([session_start, session_end])
+    # trading day session crosses two calendar days
+    else:
+        next_trading_day = trading_day + timedelta(days=1)
+        is_next_day = False
+        for idx, (start, end) in enumerate(trading_sessions):
+            if is_next_day:
+                session_start = datetime.combine(
+                    next_trading_day, start.time())
+                session_end = datetime.combine(
+                    next_trading_day, end.time())
+                trading_day_sessions.append([session_start, session_end])
+            elif end.time() < start.time():
+                session_start = datetime.combine(trading_day, start.time())
+                session_end = datetime.combine(
+                    next_trading_day, end.time())
+                trading_day_sessions.append([session_start, session_end])
+                is_next_day = True
+            elif end.time() >= start.time():
+                session_start = datetime.combine(trading_day, start.time())
+                session_end = datetime.combine(trading_day, end.time())
+                trading_day_sessions.append([session_start, session_end])
+                if idx < len(trading_sessions) - 1:
+                    next_start, next_end = trading_sessions[idx + 1]
+                    if next_start.time() < end.time():
+                        is_next_day = True
+    return trading_day_sessions
+
+
+class SessionCalendar:
+    """Trading sessions of a security, precompiled for fast lookups.
+
+    - The time-of-day schedule is a sorted list of (inclusive) intervals in
+      microseconds, which answers `is_trading_time` with a bisect.
+    - The sessions of every calendar day in [start_date, end_date] are
+      expanded to sorted open/close datetimes, which answer `is_open` and
+      `next_open` with a bisect. The range is extended on demand.
+    """
+
+    def __init__(
+            self,
+            trading_sessions: List[List[datetime]],
+            start_date: Date = None,
+            end_date: Date = None
+    ):
+        self.trading_sessions = trading_sessions
+        self._compile_time_of_day()
+        self.start_date = None
+        self.end_date = None
+        self.opens = []
+        self.closes = []
+        if start_date is not None and end_date is not None:
+            self._build(start_date, end_date)
+
+    def _compile_time_of_day(self):
+        """Merge the sessions into sorted, non-overlapping intervals of time
+        of day (sessions that cross midnight are split in two)"""
+        intervals = []
+        for session_start, session_end in self.trading_sessions:
+            start = _time_to_microseconds(session_start.time())
+            end = _time_to_microseconds(session_end.time())
+            if start <= end:
+                intervals.append((start, end))
+            else:
+                intervals.append((start, DAY_MICROSECONDS - 1))
+                intervals.append((0, end))
+        intervals.sort()
+        merged: List[Tuple[int, int]] = []
+        for start, end in intervals:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self._tod_starts = [start for start, _ in merged]
+        self._tod_ends = [end for _, end in merged]
+
+    def _build(self, start_date: Date, end_date: Date):
+        """Expand the sessions of the calendar days in [start_date, end_date]
+        (one more day ahead, as its sessions might cross midnight)"""
+        sessions = []
+        day = start_date - timedelta(days=1)
+        while self.trading_sessions and day <= end_date:
+            sessions.extend(get_day_sessions(self.trading_sessions, day))
+            day += timedelta(days=1)
+        sessions.sort()
+        self.opens = [session_start for session_start, _ in sessions]
+        self.closes = [session_end for _, session_end in sessions]
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def _ensure_range(self, cur_datetime: datetime):
+        """Extend the calendar if the datetime is out of its range"""
+        cur_date = cur_datetime.date()
+        if (
+            self.start_date is not None
+            and self.start_date <= cur_date
+            and cur_date + timedelta(days=1) <= self.end_date
+        ):
+            return
+        start_date = cur_date - timedelta(days=1)
+        end_date = cur_date + timedelta(days=7)
+        if self.start_date is not None:
+            start_date = min(start_date, self.start_date)
+            end_date = max(end_date, self.end_date)
+        self._build(start_date, end_date)
+
+    def is_trading_time(self, cur_time: Time) -> bool:
+        """Whether the time of day is within any session (ends inclusive)"""
+        t = _time_to_microseconds(cur_time)
+        idx = bisect.bisect_right(self._tod_starts, t) - 1
+        return idx >= 0 and t <= self._tod_ends[idx]
+
+    def is_open(self, cur_datetime: datetime) -> bool:
+        """Whether the datetime is within any session (ends inclusive)"""
+        self._ensure_range(cur_datetime)
+        idx = bisect.bisect_right(self.opens, cur_datetime) - 1
+        return idx >= 0 and cur_datetime <= self.closes[idx]
+
+    def next_open(self, cur_datetime: datetime) -> datetime:
+        """Start datetime of the first session after the datetime (None if
+        there is no session at all)"""
+        if not self.trading_sessions:
+            return None
+        self._ensure_range(cur_datetime)
+        idx = bisect.bisect_right(self.opens, cur_datetime)
+        while idx == len(self.opens):
+            self._build(self.start_date,
+                        self.end_date + timedelta(days=7))
+            idx = bisect.bisect_right(self.opens, cur_datetime)
+        return self.opens[idx]
@@ -15,11 +15,14 @@ You should have received a copy of the JXW license with
 this file. If not, please write to: josephchenhk@gmail.com
 """
 
+import os
 from typing import List, Dict, Any
 from datetime import datetime
 from functools import wraps
 
+from qtrader.core.action_log import ActionLog
 from qtrader.core.balance import AccountBalance
+from qtrader.core.bar_panel import BarPanel
 from qtrader.core.data import Bar
 from qtrader.core.engine import Engine
 from qtrader.core.portfolio import Portfolio
@@ -52,7 +55,8 @@ class BaseStrategy:
             strategy_trading_sessions: List[List[datetime]] = None,
             init_strategy_portfolios: Dict[str, List[Portfolio]] = None,
             init_strategy_params: Dict[str, Dict[str, Dict]] = None,
-            reporting_currency: str = ''
+            reporting_currency: str = '',
+            bar_lookback: int = 1
     ):
         self.securities = securities
         self.engine = engine
@@ -74,14 +78,23 @@ class BaseStrategy:
         if init_strategy_params is None:
             init_strategy_params = {gw: {} for gw in securities}
         self._init_strategy_params = init_strategy_params
-        # Record the action at each time step
-        self._actions = {gateway_name: "" for gateway_name in engine.gateways}
+        # Record the action at each time step (actions of the current time
+        # step, and the log of all actions)
+        self._actions = {gateway_name: [] for gateway_name in engine.gateways}
+        self.action_log = ActionLog()
         # Record bar data at each time step
         self._data = {
             gateway_name: {
                 security: None for security in securities.get(gateway_name, [])
             } for gateway_name in engine.gateways
         }
+        # Latest `bar_lookback` bars of each security (see `get_panel`)
+        self.panels = {
+            gateway_name: BarPanel(
+                securities=securities[gateway_name],
+                lookback=bar_lookback
+            ) for gateway_name in securities
+        }
 
     def _init_strategy(self):
         """Initialize portfolio information for a specific strategy"""
@@ -102,6 +115,12 @@ class BaseStrategy:
 
     def update_bar(self, gateway_name: str, security: Security, data: Bar):
         self._data[gateway_name][security] = data
+        panel = self.panels.get(gateway_name)
+        if panel is not None:
+            panel.update(security, data)
+        portfolio = self.portfolios.get(gateway_name)
+        if portfolio is not None and data is not None:
+            portfolio.update_price(security, data.close)
 
     def on_bar(self, cur_data: Dict[str, Dict[Security, Bar]]):
         raise NotImplementedError("on_bar has not been implemented yet.")
@@ -134,51 +153,52 @@ class BaseStrategy:
         return self.portfolios[gateway_name].position
 
     def get_action(self, gateway_name: str) -> str:
-        return self._actions[gateway_name]
+        """Actions of the current time step, joined with '|' (as str)"""
+        return "".join(f"{action}|" for action in self._actions[gateway_name])
+
+    def get_panel(self, gateway_name: str) -> BarPanel:
+        """Rolling windows of the bars of the gateway (NumPy views)"""
+        return self.panels[gateway_name]
+
+    def _get_bar_values(self, gateway_name: str, field: str) -> List[float]:
+        """Field of the current bar of each security in the gateway"""
+        data = self._data[gateway_name]
+        return [getattr(data[security], field)
+                for security in self.securities[gateway_name]]
 
     def get_open(self, gateway_name: str) -> List[float]:
-        opens = []
-        for g in self.engine.gateways:
-            if g == gateway_name:
-                for security in self.securities[gateway_name]:
-                    opens.append(self._data[gateway_name][security].open)
-        return opens
+        return self._get_bar_values(gateway_name, "open")
 
     def get_high(self, gateway_name: str) -> List[float]:
-        highs = []
-        for g in self.engine.gateways:
-            if g == gateway_name:
-                for security in self.securities[gateway_name]:
-                    highs.append(self._data[gateway_name][security].high)
-        return highs
+        return self._get_bar_values(gateway_name, "high")
 
     def get_low(self, gateway_name: str) -> List[float]:
-        lows = []
-        for g in self.engine.gateways:
-            if g == gateway_name:
-                for security in self.securities[gateway_name]:
-                    lows.append(self._data[gateway_name][security].low)
-        return lows
+        return self._get_bar_values(gateway_name, "low")
 
     def get_close(self, gateway_name: str) -> List[float]:
-        closes = []
-        for g in self.engine.gateways:
-            if g == gateway_name:
-                for security in self.securities[gateway_name]:
-                    closes.append(self._data[gateway_name][security].close)
-        return closes
+        return self._get_bar_values(gateway_name, "close")
 
     def get_volume(self, gateway_name: str) -> List[float]:
-        volumes = []
-        for g in self.engine.gateways:
-            if g == gateway_name:
-                for security in self.securities[gateway_name]:
-                    volumes.append(self._data[gateway_name][security].volume)
-        return volumes
+        return self._get_bar_values(gateway_name, "volume")
 
     def reset_action(self, gateway_name: str):
-        self._actions[gateway_name] = ""
+        self._actions[gateway_name] = []
 
     def update_action(self, gateway_name: str, action: Dict[str, Any]):
-        self._actions[gateway_name] += str(action)
-        self._actions[gateway_name] += "|"
+        self._actions[gateway_name].append(action)
+        self.action_log.append(
+            self.get_record_datetime(), gateway_name, action)
+
+    def get_record_datetime(self) -> datetime:
+        """Datetime of the row written by the recorder at this time step: the
+        latest datetime of the gateways, to the second (as the results are
+        read by PerformanceCTA)"""
+        return max(
+            self.get_datetime(gw) for gw in self.securities
+        ).replace(microsecond=0)
+
+    def save_actions(self, result_path: str, file_name: str = "actions") -> str:
+        """Save the action log next to the results saved by the recorder
+        (read by PerformanceCTA)"""
+        return self.action_log.save_csv(
+            os.path.join(os.path.dirname(result_path), f"{file_name}.csv"))
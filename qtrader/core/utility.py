@@ -15,56 +15,206 @@ You should have received a copy of the JXW license with
 this file. If not, please write to: josephchenhk@gmail.com
 """
 import csv
+import itertools
+from contextlib import nullcontext
 from functools import wraps
 from timeit import default_timer as timer
 from datetime import datetime
 from datetime import time as Time
 import threading
 import queue
-from typing import Any, List
+from typing import Any, List, Tuple
 
 import func_timeout
 
+from qtrader.core.constants import ACTIVE_ORDER_STATUS
+from qtrader.core.constants import TradeMode
+
+
+def get_lock(trade_mode: TradeMode = None):
+    """Lock of an object that might be updated by several threads. In
+    BACKTEST mode, everything runs in the thread of the event loop, so no
+    lock is needed (a reusable null context is returned)."""
+    if trade_mode == TradeMode.BACKTEST:
+        return nullcontext()
+    return threading.Lock()
+
 
 class BlockingDict(object):
     """Blocking dict can be used to store orders and deals in the gateway
 
+    - `get` of a missing key waits on an event of that key only, so `put`
+      wakes up the waiters of the key being put (and at most one waiter of
+      `pop`), instead of every waiting thread.
+    - Iteration goes over a snapshot of the keys, taken once; the lock is
+      not held while iterating, and the dict can be updated meanwhile.
+
     Ref: https://stackoverflow.com/questions/26586328/blocking-dict-in-python
     """
 
     def __init__(self):
         self.queue = {}
-        self.cv = threading.Condition()
-        self.count = 0
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.key_events = {}
+        # number of threads waiting on the event of each key
+        self.key_waiters = {}
 
     def put(self, key, value):
-        with self.cv:
-            self.queue[key] = value
-            self.cv.notify_all()
+        with self.lock:
+            self._put(key, value)
+            event = self.key_events.pop(key, None)
+            if event is not None:
+                self.key_waiters.pop(key, None)
+                event.set()
+            self.not_empty.notify()
+
+    def _put(self, key, value):
+        """Store the value (called with the lock held)"""
+        self.queue[key] = value
 
     def pop(self) -> Any:
-        with self.cv:
+        with self.not_empty:
             while not self.queue:
-                self.cv.wait()
+                self.not_empty.wait()
             return self.queue.popitem()
 
     def get(self, key, timeout: float = None, default_item: Any = None) -> Any:
-        with self.cv:
-            while key not in self.queue:
-                if not self.cv.wait(timeout):
-                    return default_item
-            return self.queue.get(key)
+        deadline = None if timeout is None else timer() + timeout
+        while True:
+            with self.lock:
+                if key in self.queue:
+                    return self.queue[key]
+                event = self.key_events.get(key)
+                if event is None:
+                    event = self.key_events[key] = threading.Event()
+                    self.key_waiters[key] = 0
+                self.key_waiters[key] += 1
+            remaining = None if deadline is None else deadline - timer()
+            notified = (
+                remaining is None or remaining > 0) and event.wait(remaining)
+            with self.lock:
+                if self.key_events.get(key) is event:
+                    # timed out: the event is dropped with its last waiter,
+                    # so that keys never put do not leak events
+                    self.key_waiters[key] -= 1
+                    if self.key_waiters[key] == 0:
+                        self.key_events.pop(key)
+                        self.key_waiters.pop(key)
+                if not notified:
+                    return self.queue.get(key, default_item)
+
+    def keys(self) -> List[Any]:
+        """Snapshot of the keys"""
+        with self.lock:
+            return list(self.queue)
+
+    def values(self) -> List[Any]:
+        """Snapshot of the values"""
+        with self.lock:
+            return list(self.queue.values())
+
+    def items(self) -> List[Tuple[Any, Any]]:
+        """Snapshot of the items"""
+        with self.lock:
+            return list(self.queue.items())
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __contains__(self, key):
+        return key in self.queue
 
     def __iter__(self):
-        return self
+        return iter(self.keys())
+
+
+class OrderDict(BlockingDict):
+    """Orders indexed by orderid, which also keeps the ids of the active
+    orders (see ACTIVE_ORDER_STATUS), in the order they were placed"""
+
+    def __init__(self):
+        super().__init__()
+        self.active_orderids = {}
+
+    def _put(self, key, value):
+        self.queue[key] = value
+        if value.status in ACTIVE_ORDER_STATUS:
+            self.active_orderids[key] = None
+        else:
+            self.active_orderids.pop(key, None)
+
+    def get_active_orders(self) -> List[Any]:
+        """Snapshot of the active orders (the status is checked again, in
+        case an order was updated without being put)"""
+        with self.lock:
+            orders = [self.queue[orderid] for orderid in self.active_orderids]
+        return [order for order in orders
+                if order.status in ACTIVE_ORDER_STATUS]
+
+
+class DealDict(BlockingDict):
+    """Deals indexed by dealid, with an index of the dealids of each
+    orderid"""
+
+    def __init__(self):
+        super().__init__()
+        self.orderid_index = {}
+
+    def _put(self, key, value):
+        if key not in self.queue:
+            self.orderid_index.setdefault(value.orderid, []).append(key)
+        self.queue[key] = value
+
+    def find_with_orderid(self, orderid: int) -> List[Any]:
+        """Deals of the order (in the order they were put)"""
+        with self.lock:
+            return [self.queue[dealid]
+                    for dealid in self.orderid_index.get(orderid, [])]
 
-    def __next__(self):
-        with self.cv:
-            if self.count == len(self.queue):
-                self.count = 0
-                raise StopIteration
-            self.count += 1
-            return list(self.queue.keys())[self.count - 1]
+
+class IdGenerator:
+    """Consecutive integer ids of orders or deals.
+
+    Integers are cheaper than uuid strings to generate, hash and keep as
+    dict keys. `next` on itertools.count is atomic, so ids can be generated
+    from several threads.
+    """
+
+    def __init__(self, start: int = 1):
+        self._counter = itertools.count(start)
+
+    def next_id(self) -> int:
+        return next(self._counter)
+
+
+class BrokerIdMap:
+    """Two-way map between the ids assigned by the broker (strings) and the
+    integer ids used internally. An internal id is assigned when a broker id
+    is seen for the first time, e.g., either in the response of the order
+    request or in the order callback, whichever comes first."""
+
+    def __init__(self, id_generator: IdGenerator = None):
+        self.id_generator = id_generator or IdGenerator()
+        self.lock = threading.Lock()
+        self.ids = {}
+        self.broker_ids = {}
+
+    def get_id(self, broker_id: str) -> int:
+        """Internal id of the broker id"""
+        id_ = self.ids.get(broker_id)
+        if id_ is None:
+            with self.lock:
+                id_ = self.ids.get(broker_id)
+                if id_ is None:
+                    id_ = self.id_generator.next_id()
+                    self.ids[broker_id] = id_
+                    self.broker_ids[id_] = broker_id
+        return id_
+
+    def get_broker_id(self, id_: int) -> str:
+        """Broker id of the internal id"""
+        return self.broker_ids[id_]
 
 
 class DefaultQueue:
@@ -266,6 +416,18 @@ def read_row_from_csv(filename: str, row: int) -> List[str]:
             n += 1
         return data
 
+
+def read_rows_from_csv(filename: str, nrows: int) -> List[List[str]]:
+    """Read the first `nrows` rows of a csv file (with a single file open)"""
+    rows = []
+    with open(filename, 'r') as file:
+        reader = csv.reader(file)
+        for data in reader:
+            rows.append(data)
+            if len(rows) >= nrows:
+                break
+    return rows
+
 if __name__ == "__main__":
     blockdict = BlockingDict()
     blockdict.put(1, "a")
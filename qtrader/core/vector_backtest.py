@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# @Time    : 19/10/2026 9:30 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: vector_backtest.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import ast
+from datetime import timedelta
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from qtrader.core.constants import Direction, Offset, OrderType
+from qtrader.core.deal import Deal
+from qtrader.core.recorder import get_field, read_records
+from qtrader.core.security import Security
+from qtrader.gateways.base_gateway import BaseFees
+from qtrader_config import BAR_CONVENTION
+
+
+def get_bar_panel(
+        gateway,
+        securities: List[Security] = None,
+        fields: Sequence[str] = ("open", "high", "low", "close", "volume")
+) -> Dict[str, pd.DataFrame]:
+    """Bar panel of the data loaded in a BacktestGateway (no data is read
+    again).
+
+    Each field is a DataFrame indexed by the datetime at which the bars
+    become available to the strategy (i.e., one time step after the bar
+    time if BAR_CONVENTION is 'start'), with one column per security code.
+    As in the event loop, bars out of trading hours are dropped, and the
+    latest bar of each security is carried forward.
+    """
+    if securities is None:
+        securities = gateway.securities
+    time_step = timedelta(milliseconds=gateway.TIME_STEP)
+    columns = {field: {} for field in fields}
+    for security in securities:
+        series = gateway.data_series[security]["kline"]
+        if not hasattr(series, "columns"):
+            raise ValueError(
+                "Bar panel is not available in streaming mode, please "
+                "initialize the gateway with `stream_data=False`.")
+        in_session = np.array(
+            [gateway.is_trading_time(t) for t in series.datetimes],
+            dtype=bool)
+        index = pd.DatetimeIndex(series.datetimes)
+        if BAR_CONVENTION.get(security.code) == "start":
+            index = index + time_step
+        for field in fields:
+            values = series.columns[series.fields.index(field)]
+            columns[field][security.code] = pd.Series(
+                np.asarray(values)[in_session], index=index[in_session])
+    panel = {}
+    for field in fields:
+        data = pd.DataFrame(columns[field]).sort_index().ffill()
+        panel[field] = data[(data.index >= gateway.start)
+                            & (data.index <= gateway.end)]
+    return panel
+
+
+def signals_to_positions(
+        signals: pd.DataFrame,
+        quantity: int = 1
+) -> pd.DataFrame:
+    """Convert signals (1: buy, -1: sell, 0 or nan: no signal) to target
+    positions. A buy signal closes a short position, or opens a long
+    position of `quantity` if there is no position, and vice versa for a
+    sell signal (the position does not change when the signal agrees
+    with it)."""
+    steps = np.sign(np.nan_to_num(signals.to_numpy(dtype=float)))
+    positions = np.zeros_like(steps)
+    for j in range(steps.shape[1]):
+        # the position only changes at the signals
+        rows = np.flatnonzero(steps[:, j])
+        position = 0
+        for k, i in enumerate(rows):
+            position = min(max(position + steps[i, j], -1), 1)
+            end = rows[k + 1] if k + 1 < len(rows) else len(steps)
+            positions[i:end, j] = position
+    return pd.DataFrame(
+        positions * quantity, index=signals.index, columns=signals.columns)
+
+
+def _get_deals(
+        security: Security,
+        prev_position: float,
+        position: float,
+        price: float
+) -> List[Deal]:
+    """Deals that move the position from `prev_position` to `position` (a
+    position that flips sign is closed first)"""
+    deals = []
+    direction = Direction.LONG if position > prev_position else Direction.SHORT
+    # close the existing position
+    if prev_position != 0 and (
+        position * prev_position <= 0
+        or abs(position) < abs(prev_position)
+    ):
+        close_quantity = min(abs(prev_position), abs(position - prev_position))
+        deals.append(Deal(
+            security=security,
+            direction=direction,
+            offset=Offset.CLOSE,
+            order_type=OrderType.MARKET,
+            filled_avg_price=price,
+            filled_quantity=close_quantity))
+        prev_position += close_quantity * (
+            1 if direction == Direction.LONG else -1)
+    # open new position
+    if position != prev_position:
+        deals.append(Deal(
+            security=security,
+            direction=direction,
+            offset=Offset.OPEN,
+            order_type=OrderType.MARKET,
+            filled_avg_price=price,
+            filled_quantity=abs(position - prev_position)))
+    return deals
+
+
+def run_vector_backtest(
+        securities: List[Security],
+        close: pd.DataFrame,
+        positions: pd.DataFrame,
+        init_capital: float,
+        fees: BaseFees
+) -> pd.DataFrame:
+    """Vectorized backtest of target positions.
+
+    Orders are filled at the close of the bar when the target position
+    changes (as market orders are in BacktestGateway), and fees are charged
+    per deal with the fee model of the gateway. Prices are assumed to be in
+    the reporting currency, and short interest is ignored.
+
+    :param securities: securities (in the same order as the columns)
+    :param close: close prices, indexed by datetime (see `get_bar_panel`)
+    :param positions: target positions (number of contracts/lots, negative
+        for short), aligned with `close`
+    :param init_capital: initial cash
+    :param fees: fee model (a BaseFees subclass)
+    :return: positions, cash, fees and portfolio value at each datetime
+    """
+    codes = [security.code for security in securities]
+    prices = close[codes].to_numpy(dtype=float)
+    target = positions[codes].to_numpy(dtype=float)
+    lot_sizes = np.array([security.lot_size for security in securities])
+    trades = np.diff(target, axis=0, prepend=0)
+
+    # fees are only computed on the rows that trade
+    fee = np.zeros(target.shape[0])
+    for i, j in zip(*np.nonzero(trades)):
+        prev_position = target[i - 1, j] if i > 0 else 0
+        deals = _get_deals(
+            securities[j], prev_position, target[i, j], prices[i, j])
+        for deal in deals:
+            deal.updated_time = close.index[i].to_pydatetime()
+            fee[i] += fees(deal).total_fees
+
+    # securities that have not started trading yet have no price (nan), so
+    # only the cells that trade are summed
+    cash_flows = np.where(trades != 0, trades * prices * lot_sizes, 0.0)
+    cash = (
+        init_capital
+        - np.cumsum(cash_flows.sum(axis=1))
+        - np.cumsum(fee)
+    )
+    market_value = np.nan_to_num(target * prices * lot_sizes).sum(axis=1)
+    result = pd.DataFrame(
+        target, index=close.index, columns=[f"position_{c}" for c in codes])
+    result["cash"] = cash
+    result["fees"] = fee
+    result["portfolio_value"] = cash + market_value
+    return result
+
+
+def validate_vector_backtest(
+        result: pd.DataFrame,
+        result_path: str,
+        gateway_idx: int = 0,
+        rtol: float = 1e-6
+) -> pd.DataFrame:
+    """Compare the portfolio values of a vectorized backtest with the csv
+    saved by BarEventEngineRecorder, or the Parquet file saved by
+    ParquetRecorder (at the datetimes recorded by the event engine).
+
+    :param result: output of `run_vector_backtest`
+    :param result_path: path to the results of the event-driven backtest
+    :param gateway_idx: position of the gateway in the recorded lists
+    :param rtol: relative tolerance
+    :return: the portfolio values of both backtests side by side
+    """
+    if result_path.endswith(".parquet"):
+        records = read_records(result_path)
+        datetimes = pd.DatetimeIndex(
+            get_field(records, "datetime").iloc[:, gateway_idx])
+        event_values = get_field(
+            records, "portfolio_value").iloc[:, gateway_idx].to_numpy()
+    else:
+        df = pd.read_csv(result_path)
+        datetimes = pd.to_datetime(
+            [ast.literal_eval(dt)[gateway_idx] for dt in df["datetime"]])
+        event_values = [
+            ast.literal_eval(pv)[gateway_idx] for pv in df["portfolio_value"]]
+    comparison = pd.DataFrame(
+        {"event": event_values}, index=datetimes)
+    comparison["vector"] = result["portfolio_value"].reindex(
+        comparison.index, method="ffill")
+    mismatch = ~np.isclose(
+        comparison["vector"], comparison["event"], rtol=rtol)
+    if mismatch.any():
+        first = comparison[mismatch].iloc[0]
+        raise ValueError(
+            f"Vectorized backtest deviates from the event-driven backtest "
+            f"at {comparison.index[mismatch][0]}: {first['vector']} != "
+            f"{first['event']} ({mismatch.sum()} mismatches).")
+    return comparison
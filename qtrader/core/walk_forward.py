@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# @Time    : 19/10/2026 4:05 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: walk_forward.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import importlib
+import os
+from datetime import datetime
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from qtrader.core.parameter_sweep import ParameterSweep
+from qtrader.gateways import BacktestGateway
+
+
+def final_portfolio_value(records: pd.DataFrame) -> float:
+    """Default objective: strategy portfolio value at the end of the run"""
+    return records["strategy_portfolio_value"].iloc[-1]
+
+
+class WalkForward:
+    """Walk-forward optimization.
+
+    The time range of the sweep is split into rolling windows: the parameters
+    are optimized on each in-sample window, and the best parameters are run
+    on the out-of-sample window right after it. The out-of-sample windows do
+    not overlap, and their records are stitched into one equity curve.
+
+    All windows run on the gateway loaded once by the ParameterSweep (over
+    its whole time range), and the runs of all in-sample windows are
+    dispatched to the same process pool.
+    """
+
+    def __init__(
+            self,
+            sweep: ParameterSweep,
+            in_sample: timedelta,
+            out_of_sample: timedelta,
+            objective: Callable[[pd.DataFrame], float] = final_portfolio_value
+    ):
+        """
+        :param sweep: strategy, securities and time range to run
+        :param in_sample: length of the in-sample windows
+        :param out_of_sample: length of the out-of-sample windows (also the
+            step between two windows)
+        :param objective: score of the records of an in-sample run (the
+            higher the better)
+        """
+        self.sweep = sweep
+        self.in_sample = in_sample
+        self.out_of_sample = out_of_sample
+        self.objective = objective
+        self.summary = None
+
+    def get_windows(self) -> List[Tuple[datetime, datetime, datetime, datetime]]:
+        """Rolling windows of (in-sample start, in-sample end, out-of-sample
+        start, out-of-sample end). An out-of-sample window starts one time
+        step after its in-sample window; the last one is truncated at the end
+        of the sweep."""
+        time_step = timedelta(milliseconds=BacktestGateway.TIME_STEP)
+        windows = []
+        is_start = self.sweep.start
+        is_end = is_start + self.in_sample
+        while is_end < self.sweep.end:
+            oos_end = min(is_end + self.out_of_sample, self.sweep.end)
+            windows.append((is_start, is_end, is_end + time_step, oos_end))
+            is_start += self.out_of_sample
+            is_end += self.out_of_sample
+        return windows
+
+    def run(self, param_sets: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Optimize on each in-sample window, and run the best parameters on
+        the out-of-sample windows.
+
+        :return: out-of-sample records of all windows, with a `window`
+            column; portfolio values are continued from one window to the
+            next (each window starts with the initial capital, and its pnl is
+            added to the value at the end of the previous window). The best
+            parameters of each window are saved in `self.summary`.
+        """
+        windows = self.get_windows()
+        if not windows:
+            raise ValueError(
+                f"No out-of-sample window in [{self.sweep.start}, "
+                f"{self.sweep.end}] with in-sample length {self.in_sample}.")
+        num_params = len(param_sets)
+        in_sample_results = self.sweep.run_tasks([
+            (params, is_start, is_end)
+            for is_start, is_end, _, _ in windows
+            for params in param_sets])
+
+        best_params = []
+        in_sample_scores = []
+        for k in range(len(windows)):
+            scores = [
+                self.objective(records) for records in
+                in_sample_results[k * num_params:(k + 1) * num_params]]
+            best = int(np.nanargmax(scores))
+            best_params.append(param_sets[best])
+            in_sample_scores.append(scores[best])
+
+        out_of_sample_results = self.sweep.run_tasks([
+            (params, oos_start, oos_end)
+            for params, (_, _, oos_start, oos_end)
+            in zip(best_params, windows)])
+
+        stitched = []
+        carried_pnl = {"portfolio_value": 0.0,
+                       "strategy_portfolio_value": 0.0}
+        for k, records in enumerate(out_of_sample_results):
+            records = records.copy()
+            records.insert(0, "window", k)
+            for field in carried_pnl:
+                records[field] = records[field] + carried_pnl[field]
+                carried_pnl[field] = (
+                    records[field].iloc[-1] - self.sweep.init_capital)
+            stitched.append(records)
+
+        self.summary = pd.DataFrame(
+            windows,
+            columns=["in_sample_start", "in_sample_end",
+                     "out_of_sample_start", "out_of_sample_end"])
+        self.summary["in_sample_score"] = in_sample_scores
+        self.summary["out_of_sample_score"] = [
+            self.objective(records) for records in out_of_sample_results]
+        self.summary = pd.concat(
+            [self.summary, pd.DataFrame(best_params)], axis=1)
+        return pd.concat(stitched, ignore_index=True)
+
+    def save_csv(self, result: pd.DataFrame, result_path: str) -> str:
+        """Save the stitched records in the format of
+        BarEventEngineRecorder.save_csv (values of the gateway wrapped in a
+        list), so that they can be read by the analysis plugin"""
+        records = pd.DataFrame()
+        for field in result.columns:
+            if field in ("run", "window") or field in self.summary.columns:
+                continue
+            records[field] = [str([value]) for value in result[field]]
+        folder = os.path.dirname(result_path)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        records.to_csv(result_path, index=False)
+        return result_path
+
+    def report(
+            self,
+            result: pd.DataFrame,
+            instruments: Dict[str, Dict[str, List[Any]]],
+            result_path: str
+    ):
+        """Performance of the stitched out-of-sample records.
+
+        :param result: output of `run` (`close` must be one of the recorded
+            fields of the sweep)
+        :param instruments: security, lot, commission and slippage of the
+            gateway, as required by PerformanceCTA
+        :param result_path: path of the csv to be saved
+        :return: PerformanceCTA with its statistics calculated
+        """
+        result_path = os.path.abspath(self.save_csv(result, result_path))
+        # the analysis plugin is only imported when it is used (as the
+        # engine does with activated plugins)
+        analysis = importlib.import_module("qtrader.plugins.analysis")
+        performance = analysis.PerformanceCTA(
+            instruments=instruments,
+            result_path=result_path)
+        performance.calc_statistics()
+        return performance
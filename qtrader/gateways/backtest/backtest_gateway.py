@@ -15,12 +15,16 @@ You should have received a copy of the JXW license with
 this file. If not, please write to: josephchenhk@gmail.com
 """
 
-import uuid
+import heapq
+import bisect
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from functools import partial
 from datetime import datetime
 from datetime import timedelta
 from datetime import time as Time
 from typing import List, Dict, Union
-from dateutil.relativedelta import relativedelta
 
 import pandas as pd
 
@@ -28,6 +32,8 @@ from qtrader_config import (
     DATA_PATH, DATA_MODEL, TIME_STEP, DATA_FFILL, BAR_CONVENTION)
 from qtrader.core.balance import AccountBalance
 from qtrader.core.constants import TradeMode, OrderStatus, Direction, OrderType
+from qtrader.core.constants import AdjustMethod
+from qtrader.core.continuous_contract import get_pending_adjustment
 from qtrader.core.data import Quote
 from qtrader.core.data import OrderBook
 from qtrader.core.data import Bar
@@ -35,13 +41,26 @@ from qtrader.core.data import CapitalDistribution
 from qtrader.core.data import get_trading_day
 from qtrader.core.data import _load_historical_bars_in_reverse
 from qtrader.core.data import _get_data
+from qtrader.core.data import _get_data_files_in_range
+from qtrader.core.data import _cache_data_files
+from qtrader.core.data import DATA_CACHE_PATH
 from qtrader.core.data import _get_data_path
-from qtrader.core.data import _get_data_iterator
+from qtrader.core.data import DataSeries
+from qtrader.core.data import DataStream
+from qtrader.core.data import _get_data_summary
+from qtrader.core.data import _get_data_chunks
+from qtrader.core.data import _get_roll_schedule
+from qtrader.core.data import _needs_resampling
+from qtrader.core.resample import get_interval_minutes
 from qtrader.core.deal import Deal
 from qtrader.core.order import Order
 from qtrader.core.position import PositionData
 from qtrader.core.security import Stock, Security
-from qtrader.core.utility import is_trading_time
+from qtrader.core.session_calendar import SessionCalendar
+from qtrader.core.utility import BlockingDict
+from qtrader.core.utility import DealDict
+from qtrader.core.utility import IdGenerator
+from qtrader.core.utility import OrderDict
 from qtrader.gateways import BaseGateway
 from qtrader.gateways.base_gateway import BaseFees
 
@@ -151,69 +170,213 @@ class BacktestGateway(BaseGateway):
         )
         self.fees = fees
         self.set_trade_mode(TradeMode.BACKTEST)
-
-        data_iterators = dict()
-        prev_cache = dict()
-        next_cache = dict()
+        # price adjustment of continuous futures contracts
+        self.adjust_method = kwargs.get("adjust_method", AdjustMethod.RATIO)
+        # streaming mode: read day files lazily, `read_ahead_days` at a time
+        self.stream_data = kwargs.get("stream_data", False)
+        self.read_ahead_days = kwargs.get("read_ahead_days", 1)
+        # sparse clock: only stop at the timestamps when data are available
+        self.sparse_clock = kwargs.get("sparse_clock", False)
+        # ids of orders and deals (consecutive integers by default)
+        self.id_generator = kwargs.get("id_generator", IdGenerator)
+        self.orderids = self.id_generator()
+        self.dealids = self.id_generator()
+
+        data_series = dict()
         trading_days = dict()
+        bar_datetimes = dict()
         # all securities include trading securities, and currencies
         all_securities = securities[:]
         if kwargs.get("currency_tickers"):
             all_securities += kwargs.get("currency_tickers")
         all_securities = list(set(all_securities))
+        # Parse the csv files in parallel (into the on-disk cache), if
+        # `load_workers` > 1
+        load_workers = kwargs.get("load_workers", 1)
+        if load_workers > 1:
+            self._load_data_in_parallel(
+                securities=all_securities,
+                start=start,
+                end=end,
+                load_workers=load_workers)
         for security in all_securities:
-            data_iterators[security] = dict()
-            prev_cache[security] = dict()
-            next_cache[security] = dict()
+            data_series[security] = dict()
             for dtype in DATA_PATH.keys():  # kline | capdist
-                kw = {}
-                if dtype == 'kline':
-                    interval_val = TIME_STEP // 60000
-                    if interval_val < 60 * 24:
-                        interval = f'{interval_val}min'
-                    else:
-                        interval = f'{interval_val}day'
-                    kw = dict(interval=interval)
-                # data_iterators is a dictionary that stores data iterators
-                data = _get_data(
-                    security=security,
-                    start=start,
-                    end=end,
-                    dfield=data_config[dtype],
-                    dtype=dtype,
-                    **kw
-                )
-                data_it = _get_data_iterator(
-                    security=security,
-                    full_data=data,
-                    class_name=DATA_MODEL[dtype])
-                data_iterators[security][dtype] = data_it
-                # initialize cache data
-                prev_cache[security][dtype] = None
-                next_cache[security][dtype] = None
-                # Sort the available dates in history
-                if dtype == "kline":
-                    trading_days[security] = sorted(
-                        set(pd.to_datetime(t).strftime("%Y-%m-%d")
-                            for t in data["time_key"].values))
-        self.data_iterators = data_iterators
-        self.prev_cache = prev_cache
-        self.next_cache = next_cache
+                kw = self._get_data_kwargs(dtype, security)
+                if (
+                    self.stream_data
+                    and 'min' in kw.get('interval', '')
+                    and not _needs_resampling(security, dtype, **kw)
+                ):
+                    # In streaming mode, only the day files just ahead of
+                    # market datetime are held in memory
+                    summary = _get_data_summary(
+                        security=security,
+                        start=start,
+                        end=end,
+                        dtype=dtype,
+                        **kw
+                    )
+                    data_chunks = partial(
+                        _get_data_chunks,
+                        security=security,
+                        start=start,
+                        end=end,
+                        dtype=dtype,
+                        read_ahead_days=self.read_ahead_days,
+                        roll_schedule=summary["roll_schedule"],
+                        **kw
+                    )
+                    series = DataStream(
+                        security=security,
+                        data_chunks=data_chunks,
+                        class_name=DATA_MODEL[dtype])
+                    if dtype == "kline":
+                        trading_days[security] = summary["trading_days"]
+                        bar_datetimes[security] = summary["datetimes"]
+                else:
+                    data = _get_data(
+                        security=security,
+                        start=start,
+                        end=end,
+                        dfield=data_config[dtype],
+                        dtype=dtype,
+                        **kw
+                    )
+                    series = DataSeries(
+                        security=security,
+                        full_data=data,
+                        class_name=DATA_MODEL[dtype])
+                    # Sort the available dates in history
+                    if dtype == "kline":
+                        trading_days[security] = sorted(
+                            set(pd.to_datetime(t).strftime("%Y-%m-%d")
+                                for t in data["time_key"].values))
+                        bar_datetimes[security] = series.datetimes
+                data_series[security][dtype] = series
+        # data_series stores the data (sorted by time) of each security and
+        # dtype, which can be looked up at any datetime
+        self.data_series = data_series
         self.trading_days = trading_days
         trading_days_list = set()
         for k, v in self.trading_days.items():
             trading_days_list.update(v)
         self.trading_days_list = [datetime.strptime(
             d, "%Y-%m-%d").date() for d in sorted(trading_days_list)]
+        self.trading_days_set = set(self.trading_days_list)
+        if self.sparse_clock:
+            self.timeline = self._build_timeline(bar_datetimes)
+            self.timeline_set = set(self.timeline)
+        # session calendars are precomputed over the backtest range
+        for security in securities:
+            if security.code in self.trading_sessions:
+                self.session_calendars[security.code] = SessionCalendar(
+                    trading_sessions=self.trading_sessions[security.code],
+                    start_date=start.date(),
+                    end_date=end.date() + timedelta(days=1))
 
         self.start = start
         self.end = end
         self.market_datetime = start
+        self.time_step = timedelta(milliseconds=self.TIME_STEP)
+        # datetime of the latest lookup of each security before the end of
+        # the backtest (see `_lookup_recent_data`)
+        self.lookup_datetimes = dict()
+        # lookback bars of `req_historical_bars`, keyed by (security, interval)
+        self.history_cache = dict()
+        # roll schedules of the data series (see `req_historical_bars`)
+        self.roll_schedules = dict()
+
+    def _build_timeline(
+            self,
+            bar_datetimes: Dict[Security, List[datetime]]
+    ) -> List[datetime]:
+        """Merge the bar timestamps of the trading securities into a sorted
+        timeline without duplicates. A bar stamped with its start time
+        (BAR_CONVENTION='start') becomes available one time step later, so
+        that timestamp is added as well."""
+        time_step = timedelta(milliseconds=self.TIME_STEP)
+        sorted_datetimes = []
+        for security in self.securities:
+            datetimes = bar_datetimes.get(security, [])
+            sorted_datetimes.append(datetimes)
+            if BAR_CONVENTION.get(security.code) == 'start':
+                sorted_datetimes.append([t + time_step for t in datetimes])
+        timeline = []
+        for t in heapq.merge(*sorted_datetimes):
+            if not timeline or t != timeline[-1]:
+                timeline.append(t)
+        return timeline
+
+    def _get_data_kwargs(
+            self,
+            dtype: str,
+            security: Security = None
+    ) -> Dict:
+        """Keyword arguments to load data of the given dtype (the trading
+        sessions of the security are required to resample the bars)"""
+        kw = {}
+        if dtype == 'kline':
+            interval_val = TIME_STEP // 60000
+            if interval_val < 60 * 24:
+                interval = f'{interval_val}min'
+            else:
+                interval = f'{interval_val}day'
+            kw = dict(interval=interval, adjust_method=self.adjust_method)
+            if security is not None:
+                kw["trading_sessions"] = self.trading_sessions.get(
+                    security.code)
+        return kw
+
+    def _load_data_in_parallel(
+            self,
+            securities: List[Security],
+            start: datetime,
+            end: datetime,
+            load_workers: int
+    ):
+        """Parse the csv files of all securities with a process pool. The
+        workers write the parsed data to the on-disk cache instead of
+        sending the dataframes back, so that the subsequent `_get_data`
+        calls only need to read the cache."""
+        if not DATA_CACHE_PATH:
+            warnings.warn(
+                "`load_workers` requires the data cache, but DATA_CACHE_PATH "
+                "is disabled in qtrader_config.py; data will be loaded "
+                "sequentially.")
+            return
+        data_files = []
+        for security in securities:
+            for dtype in DATA_PATH.keys():
+                kw = self._get_data_kwargs(dtype)
+                if _needs_resampling(security, dtype, **kw):
+                    kw["interval"] = "1min"
+                data_files.extend(_get_data_files_in_range(
+                    security, start, end, dtype, **kw))
+        # several files per task to amortize the inter-process overhead
+        chunk_size = max(1, len(data_files) // (load_workers * 4))
+        chunks = [data_files[i:i + chunk_size]
+                  for i in range(0, len(data_files), chunk_size)]
+        with ProcessPoolExecutor(max_workers=load_workers) as executor:
+            for _ in executor.map(_cache_data_files, chunks):
+                pass
 
     def close(self):
         """In backtest, no need to do anything"""
         pass
 
+    def reset(self):
+        """Clear the orders and deals, and move market datetime back to the
+        start, so that the loaded data can be reused by another backtest"""
+        self.orders = OrderDict()
+        self.deals = DealDict()
+        self.quote = BlockingDict()
+        self.orderbook = BlockingDict()
+        self.orderids = self.id_generator()
+        self.dealids = self.id_generator()
+        self.market_datetime = self.start
+        self.lookup_datetimes = dict()
+
     def set_trade_mode(self, trade_mode: TradeMode):
         """Set trade mode (only BACKTEST is allowed here as it is the backtest
         gateway)"""
@@ -226,55 +389,19 @@ class BacktestGateway(BaseGateway):
     def get_next_session_datetime(
             self,
             security: Security,
-            cur_datetime: datetime) -> int:
+            cur_datetime: datetime) -> datetime:
         """return start datetime of next session
         """
-        trading_sessions = self.trading_sessions[security.code]
-
-        trading_day = cur_datetime.date()
-        trading_day_sessions = []
-        # normal trading day session within a calendar day
-        if trading_sessions[-1][1] > trading_sessions[0][0]:
-            for start, end in trading_sessions:
-                session_start = datetime.combine(trading_day, start.time())
-                session_end = datetime.combine(trading_day, end.time())
-                trading_day_sessions.append([session_start, session_end])
-        # trading day session crosses two calendar days
-        else:
-            next_trading_day = trading_day + timedelta(days=1)
-            is_next_day = False
-            for idx, (start, end) in enumerate(trading_sessions):
-                if is_next_day:
-                    session_start = datetime.combine(
-                        next_trading_day, start.time())
-                    session_end = datetime.combine(
-                        next_trading_day, end.time())
-                    trading_day_sessions.append([session_start, session_end])
-                elif end.time() < start.time():
-                    session_start = datetime.combine(trading_day, start.time())
-                    session_end = datetime.combine(
-                        next_trading_day, end.time())
-                    trading_day_sessions.append([session_start, session_end])
-                    is_next_day = True
-                elif end.time() >= start.time():
-                    session_start = datetime.combine(trading_day, start.time())
-                    session_end = datetime.combine(trading_day, end.time())
-                    trading_day_sessions.append([session_start, session_end])
-                    if idx < len(trading_sessions) - 1:
-                        next_start, next_end = trading_sessions[idx + 1]
-                        if next_start.time() < end.time():
-                            is_next_day = True
-
-        for session in trading_day_sessions:
-            if cur_datetime < session[0]:
-                return session[0]
-        return trading_day_sessions[0][0] + timedelta(days=1)
+        return self.get_session_calendar(security).next_open(cur_datetime)
 
     def is_trading_time(self, cur_datetime: datetime) -> bool:
         """For given datetime, check whether it is in trading hours"""
-        is_trading_day = cur_datetime.date() in self.trading_days_list
+        is_trading_day = cur_datetime.date() in self.trading_days_set
         if not is_trading_day:
             return False
+        # with sparse clock, timestamps without data are skipped
+        if self.sparse_clock and cur_datetime not in self.timeline_set:
+            return False
         # If any security is found in trading session, we return True
         _is_trading_time = False
         for security in self.securities:
@@ -290,15 +417,19 @@ class BacktestGateway(BaseGateway):
             security: Security
     ) -> datetime:
         """Find next trading datetime; return None if not found"""
+        if self.sparse_clock:
+            # jump to the next timestamp with data (or beyond the end of the
+            # backtest if there is none)
+            idx = bisect.bisect_right(self.timeline, cur_datetime)
+            if idx == len(self.timeline):
+                return self.end + self.time_step
+            return self.timeline[idx]
         # check whether cur_datetime is within the trading session
         _cur_is_trading_time = self.is_security_trading_time(
             security, cur_datetime.time())
         if _cur_is_trading_time:
             # Move one time step
-            next_datetime = (
-                cur_datetime
-                + relativedelta(seconds=self.TIME_STEP / 1000.0)
-            )
+            next_datetime = cur_datetime + self.time_step
         else:
             # Move to openning time of next trading session
             next_datetime = self.get_next_session_datetime(
@@ -312,102 +443,66 @@ class BacktestGateway(BaseGateway):
             cur_datetime: datetime,
             **kwargs
     ) -> Dict or Bar or CapitalDistribution:
-        """Get recent data"""
+        """Get recent data (see `rewind` to look up earlier datetimes)"""
         assert cur_datetime >= self.market_datetime, (
             f"Current datetime {cur_datetime} is earlier than "
             f"market datetime {self.market_datetime}."
         )
+        self.market_datetime = cur_datetime
+        return self._lookup_recent_data(security, cur_datetime, **kwargs)
+
+    def get_recent_data_many(
+            self,
+            securities: List[Security],
+            cur_datetime: datetime,
+            **kwargs
+    ) -> Dict[Security, Union[Dict, Bar, CapitalDistribution]]:
+        """Get recent data of several securities in one call"""
+        assert cur_datetime >= self.market_datetime, (
+            f"Current datetime {cur_datetime} is earlier than "
+            f"market datetime {self.market_datetime}."
+        )
+        self.market_datetime = cur_datetime
+        return {security: self._lookup_recent_data(
+            security, cur_datetime, **kwargs) for security in securities}
+
+    def rewind(self, cur_datetime: datetime):
+        """Move market datetime back (e.g., to replay part of the backtest).
+        Data are looked up by datetime, so nothing else has to be reset."""
+        self.market_datetime = cur_datetime
+
+    def _lookup_recent_data(
+            self,
+            security: Security,
+            cur_datetime: datetime,
+            **kwargs
+    ) -> Dict or Bar or CapitalDistribution:
+        """Latest data available at the datetime. A bar stamped with its
+        start time (BAR_CONVENTION='start') is only available once the next
+        bar starts. Data are not updated at the end of the backtest
+        (BAR_CONVENTION='start') or after it (BAR_CONVENTION='end'): they
+        remain as of the latest lookup before."""
         if kwargs:
             assert "dfield" in kwargs, (
                 f"`dfield` should be passed in as kwargs, but kwargs={kwargs}"
             )
             dfields = [kwargs["dfield"]]
         else:
-            dfields = DATA_PATH
-
-        if (
-                BAR_CONVENTION.get(security.code)
-                and BAR_CONVENTION[security.code] == 'start'
-        ):
-            data_it = dict()
-            data_prev = dict()
-            data_next = dict()
-            for dfield in dfields:
-                data_it[dfield] = self.data_iterators[security][dfield]
-                data_prev[dfield] = self.prev_cache[security][dfield]
-                data_next[dfield] = self.next_cache[security][dfield]
-
-                if cur_datetime >= self.end:
-                    pass
-
-                elif (data_prev[dfield] is None) and (data_next[dfield] is None):
-                    data = next(data_it[dfield])
-                    if data.datetime >= cur_datetime:
-                        self.next_cache[security][dfield] = data
-                    else:
-                        while data.datetime < cur_datetime:
-                            self.prev_cache[security][dfield] = data
-                            data = next(data_it[dfield])
-                        self.next_cache[security][dfield] = data
-                else:
-                    if self.next_cache[security][dfield].datetime < cur_datetime:
-                        self.prev_cache[security][dfield] = self.next_cache[security][dfield]
-                        try:
-                            data = next(data_it[dfield])
-                            while data.datetime < cur_datetime:
-                                self.prev_cache[security][dfield] = data
-                                data = next(data_it[dfield])
-                            self.next_cache[security][dfield] = data
-                        except StopIteration:
-                            pass
-
-            self.market_datetime = cur_datetime
-            if len(dfields) == 1:
-                return self.prev_cache[security][dfield]
-            return self.prev_cache[security]
-
-        else:  # BAR_CONVENTION='end' as default
-            data_it = dict()
-            data_prev = dict()
-            data_next = dict()
-            for dfield in dfields:
-                data_it[dfield] = self.data_iterators[security][dfield]
-                data_prev[dfield] = self.prev_cache[security][dfield]
-                data_next[dfield] = self.next_cache[security][dfield]
-
-                if cur_datetime > self.end:
-                    pass
-
-                elif (data_prev[dfield] is None) and (
-                        data_next[dfield] is None):
-                    data = next(data_it[dfield])
-                    if data.datetime > cur_datetime:
-                        self.next_cache[security][dfield] = data
-                    else:
-                        while data.datetime <= cur_datetime:
-                            self.prev_cache[security][dfield] = data
-                            data = next(data_it[dfield])
-                        self.next_cache[security][dfield] = data
-                else:
-                    if self.next_cache[security][
-                        dfield].datetime <= cur_datetime:
-                        self.prev_cache[security][dfield] = \
-                        self.next_cache[security][dfield]
-                        try:
-                            data = next(data_it[dfield])
-                            while data.datetime <= cur_datetime:
-                                self.prev_cache[security][dfield] = data
-                                data = next(data_it[dfield])
-                            self.next_cache[security][dfield] = data
-                        except StopIteration:
-                            pass
-
-            self.market_datetime = cur_datetime
-            if len(dfields) == 1:
-                return self.prev_cache[security][dfield]
-            return self.prev_cache[security]
-
-    def place_order(self, order: Order) -> str:
+            dfields = list(DATA_PATH.keys())
+        strict = BAR_CONVENTION.get(security.code) == 'start'
+        if cur_datetime > self.end or (strict and cur_datetime == self.end):
+            cur_datetime = self.lookup_datetimes.get(security)
+        else:
+            self.lookup_datetimes[security] = cur_datetime
+        recent_data = {
+            dfield: None if cur_datetime is None
+            else self.data_series[security][dfield].get(cur_datetime, strict)
+            for dfield in dfields}
+        if len(dfields) == 1:
+            return recent_data[dfields[0]]
+        return recent_data
+
+    def place_order(self, order: Order) -> int:
         """In backtest, simply assume all orders are completely filled."""
         order.filled_time = self.market_datetime
         order.filled_quantity = order.quantity
@@ -415,19 +510,18 @@ class BacktestGateway(BaseGateway):
             order.filled_avg_price = order.price
         elif order.order_type == OrderType.MARKET:
             bar = self.get_recent_data(order.security, order.create_time)
+            if bar is None:
+                # no bar yet, take the price of the first bar available
+                strict = BAR_CONVENTION.get(order.security.code) == 'start'
+                bar = self.data_series[order.security]['kline'].get_next(
+                    min(order.create_time, self.end), strict)
             if bar is not None:
                 order.filled_avg_price = bar.close
-            elif self.prev_cache[order.security]['kline'] is not None:
-                order.filled_avg_price = self.prev_cache[order.security][
-                    'kline'].close
-            elif self.next_cache[order.security]['kline'] is not None:
-                order.filled_avg_price = self.next_cache[order.security][
-                    'kline'].close
             if order.filled_avg_price is None or order.filled_avg_price == 0:
                 raise ValueError("filled_avg_price is NOT available!")
         order.status = OrderStatus.FILLED
-        orderid = "bt-order-" + str(uuid.uuid4())
-        dealid = "bt-deal-" + str(uuid.uuid4())
+        orderid = self.orderids.next_id()
+        dealid = self.dealids.next_id()
         self.orders.put(orderid, order)
 
         deal = Deal(
@@ -491,36 +585,156 @@ class BacktestGateway(BaseGateway):
             interval: str,
             cur_datetime: datetime,
     ) -> List[Bar]:
-        """request historical bar data.
+        """request historical bar data (the `periods` bars up to
+        `cur_datetime`). Bars of the backtest interval are taken from the
+        loaded data series; bars of other intervals are sliced from a window
+        loaded once (see `_load_history`). Futures prices are adjusted as of
+        `cur_datetime`, i.e., only with the rolls that have happened by then.
         """
-        interval_val = int(interval.replace('min', '').replace('day', ''))
-        df = _get_data(
-            security=security,
-            start=cur_datetime - timedelta(minutes=interval_val * periods * 24),
-            end=cur_datetime,
-            dtype='kline',
-            interval=interval
-        ).iloc[-periods:]
-        if df.shape[0] != periods:
+        series = self.data_series[security]["kline"]
+        if (
+            isinstance(series, DataSeries)
+            and interval == self._get_data_kwargs("kline")["interval"]
+            and cur_datetime <= self.end
+        ):
+            idx = series.index(cur_datetime)
+            if idx >= periods:
+                bars = [series[i] for i in range(idx - periods, idx)]
+                if not bars[-1].ticker:
+                    return bars
+                if security not in self.roll_schedules:
+                    self.roll_schedules[security] = _get_roll_schedule(
+                        security=security,
+                        start=self.start,
+                        end=self.end,
+                        dtype="kline",
+                        **self._get_data_kwargs("kline", security))
+                return self._remove_pending_adjustment(
+                    bars, self.roll_schedules[security], cur_datetime)
+        history = self.history_cache.get((security, interval))
+        if (
+            history is None
+            or cur_datetime < history["datetime"]
+            or cur_datetime > history["end"]
+        ):
+            if history is None:
+                lookback = timedelta(
+                    minutes=get_interval_minutes(interval) * periods * 24)
+            else:
+                lookback = history["lookback"]
+            history = self._load_history(
+                security=security,
+                interval=interval,
+                cur_datetime=cur_datetime,
+                lookback=lookback)
+        idx = bisect.bisect_right(history["time_key"], cur_datetime)
+        # not enough lookback bars: double the lookback, until no more data
+        # can be found
+        while idx < periods and not history["exhausted"]:
+            history = self._load_history(
+                security=security,
+                interval=interval,
+                cur_datetime=cur_datetime,
+                lookback=2 * history["lookback"])
+            num_bars = idx
+            idx = bisect.bisect_right(history["time_key"], cur_datetime)
+            history["exhausted"] = idx == num_bars
+        if idx < periods:
             raise ValueError(
-                f'There is not enough historical data for periods={periods}, only {df.shape[0]} is available.')
+                f'There is not enough historical data for periods={periods}, only {idx} is available.')
         bars = []
-        for _, row in df.iterrows():
-            bar_datetime = row.time_key.to_pydatetime()
+        for i in range(idx - periods, idx):
             additional_info = {}
             for fld in ('num_trds', 'value', 'ticker'):
-                if row.get(fld):
-                    additional_info[fld] = row.get(fld)
+                if fld in history and history[fld][i]:
+                    additional_info[fld] = history[fld][i]
             bar = Bar(
                 security=security,
-                datetime=bar_datetime,
-                open=row.open,
-                high=row.high,
-                low=row.low,
-                close=row.close,
-                volume=row.volume,
+                datetime=history["time_key"][i],
+                open=history["open"][i],
+                high=history["high"][i],
+                low=history["low"][i],
+                close=history["close"][i],
+                volume=history["volume"][i],
                 **additional_info
             )
             bars.append(bar)
-        return bars
+        return self._remove_pending_adjustment(
+            bars, history["roll_schedule"], cur_datetime)
 
+    def _load_history(
+            self,
+            security: Security,
+            interval: str,
+            cur_datetime: datetime,
+            lookback: timedelta
+    ) -> Dict:
+        """Load the bars from cur_datetime - lookback into the history cache
+        (one list per column), together with their roll schedule. The bars
+        are loaded up to the end of the backtest, or in streaming mode, up to
+        `read_ahead_days` (at least the lookback) ahead of cur_datetime; the
+        window loaded before is replaced, so that only one window per
+        (security, interval) is held in memory."""
+        start = cur_datetime - lookback
+        end = cur_datetime + max(
+            timedelta(days=self.read_ahead_days), lookback)
+        if not self.stream_data:
+            end = max(end, self.end)
+        kw = dict(
+            interval=interval,
+            adjust_method=self.adjust_method,
+            trading_sessions=self.trading_sessions.get(security.code))
+        try:
+            df = _get_data(
+                security=security,
+                start=start,
+                end=end,
+                dtype='kline',
+                **kw
+            )
+        except ValueError:
+            # no data within the time range
+            df = pd.DataFrame(columns=["time_key", "open", "high", "low",
+                                       "close", "volume"])
+        df = df[df["time_key"] <= end]
+        history = dict(
+            datetime=cur_datetime, end=end, lookback=lookback,
+            exhausted=False, roll_schedule=None)
+        if "ticker" in df.columns and not df.empty:
+            # the rolls the prices have been adjusted with, including those
+            # after cur_datetime (see `_remove_pending_adjustment`)
+            history["roll_schedule"] = _get_roll_schedule(
+                security=security,
+                start=start,
+                end=end,
+                dtype='kline',
+                **kw
+            )
+        history["time_key"] = list(
+            pd.DatetimeIndex(df["time_key"]).to_pydatetime())
+        for col in df.columns:
+            if col != "time_key":
+                history[col] = df[col].tolist()
+        self.history_cache[(security, interval)] = history
+        return history
+
+    def _remove_pending_adjustment(
+            self,
+            bars: List[Bar],
+            roll_schedule: pd.DataFrame,
+            cur_datetime: datetime
+    ) -> List[Bar]:
+        """Remove the adjustment of the rolls after cur_datetime from the
+        prices of the bars (which are adjusted with the roll schedule of the
+        data loaded), so that no future roll leaks into them."""
+        factor = get_pending_adjustment(
+            roll_schedule, cur_datetime, self.adjust_method)
+        if self.adjust_method == AdjustMethod.RATIO and factor != 1.0:
+            return [replace(bar, open=bar.open / factor,
+                            high=bar.high / factor, low=bar.low / factor,
+                            close=bar.close / factor) for bar in bars]
+        if self.adjust_method == AdjustMethod.DIFFERENCE and factor != 0.0:
+            return [replace(bar, open=bar.open - factor,
+                            high=bar.high - factor, low=bar.low - factor,
+                            close=bar.close - factor) for bar in bars]
+        return bars
@@ -29,12 +29,16 @@ from qtrader.core.balance import AccountBalance
 from qtrader.core.constants import Direction, TradeMode
 from qtrader.core.data import Bar, Quote, OrderBook
 from qtrader.core.deal import Deal
+from qtrader.core.fx_rates import FXRateMatrix
 from qtrader.core.order import Order
 from qtrader.core.position import PositionData
 from qtrader.core.security import Security
 from qtrader.core.utility import BlockingDict
-from qtrader.core.utility import is_trading_time
-from qtrader_config import GATEWAYS
+from qtrader.core.utility import BrokerIdMap
+from qtrader.core.utility import DealDict
+from qtrader.core.utility import OrderDict
+from qtrader.core.session_calendar import SessionCalendar
+from qtrader_config import GATEWAYS, TIME_STEP
 
 
 class BaseGateway(ABC):
@@ -67,10 +71,14 @@ class BaseGateway(ABC):
         self.gateway_name = gateway_name
         self.broker_account = GATEWAYS[gateway_name]["broker_name"]
         self.broker_account = GATEWAYS[gateway_name]["broker_account"]
-        self.orders = BlockingDict()
-        self.deals = BlockingDict()
+        self.orders = OrderDict()
+        self.deals = DealDict()
         self.quote = BlockingDict()
         self.orderbook = BlockingDict()
+        # live gateways keep orders and deals by integer ids, mapped to the
+        # ids assigned by the broker
+        self.orderids = BrokerIdMap()
+        self.dealids = BrokerIdMap()
 
         # If trading sessions are not specified explicitly, we load them from
         # yaml file
@@ -101,8 +109,14 @@ class BaseGateway(ABC):
                     )
                     self.trading_sessions[security.code] = instrument_cfg[
                         security.code]["sessions"]
+        # precompiled trading sessions (see `get_session_calendar`)
+        self.session_calendars = {}
         if 'currency_tickers' in kwargs:
             self.currencies = kwargs.get('currency_tickers')
+            self.fx_rates = FXRateMatrix(
+                currencies=self.currencies,
+                get_price=self._get_currency_price,
+                get_key=self.get_time_step_key)
         if 'trade_mode' in kwargs:
             self.trade_mode = kwargs.get('trade_mode')
 
@@ -115,33 +129,44 @@ class BaseGateway(ABC):
         """Current Market time."""
         return self._market_datetime
 
+    def get_time_step_key(self, cur_datetime: datetime = None):
+        """Time step of a datetime (the market datetime by default), used to
+        cache values that only change from one time step to the next: the
+        datetime itself in BACKTEST mode, or the TIME_STEP interval it falls
+        in otherwise (live gateways return datetime.now(), which never
+        repeats)"""
+        if cur_datetime is None:
+            cur_datetime = self.market_datetime
+        if self.trade_mode == TradeMode.BACKTEST or cur_datetime is None:
+            return cur_datetime
+        return int(cur_datetime.timestamp() * 1000) // TIME_STEP
+
     def get_exchange_rate(self, base: str, quote: str) -> float:
-        """Exchange rate as of current market time."""
+        """Exchange rate as of current market time (triangulated if there is
+        no ticker of the pair, see FXRateMatrix)."""
         if base == quote:
             return 1.0
         if not getattr(self, 'currencies', False):
             raise NotImplementedError("[get_exchange_rate] `currency_tickers` has not yet been passed in to "
                                       f"{self.__class__} when initialising it.")
-        for currency in self.currencies:
-            asset_type, exchange, curncy = currency.code.split('.')
-            if curncy not in (f'{base}{quote}', f'{quote}{base}'):
-                continue
-            if curncy == f'{base}{quote}':
-                curncy_bar = self.get_recent_data(
-                    security=currency,
-                    cur_datetime=self.market_datetime
-                )
-                if curncy_bar:
-                    return curncy_bar.close
-            elif curncy == f'{quote}{base}':
-                curncy_bar = self.get_recent_data(
-                    security=currency,
-                    cur_datetime=self.market_datetime
-                )
-                if curncy_bar:
-                    return 1. / curncy_bar.close
-        raise NotImplementedError(f"[get_exchange_rate] Either `{base}{quote}` or `{quote}{base}` shoule be included "
-                                  f"in `currency_tickers` when initialising {self.__class__}.")
+        fx_rate = self.fx_rates.get_rate(base, quote, self.market_datetime)
+        if fx_rate is None:
+            raise NotImplementedError(f"[get_exchange_rate] Either `{base}{quote}` or `{quote}{base}` shoule be included "
+                                      f"in `currency_tickers` when initialising {self.__class__}.")
+        return fx_rate
+
+    def _get_currency_price(
+            self,
+            currency: Security,
+            cur_datetime: datetime
+    ) -> float:
+        """Close of the recent bar of a currency ticker"""
+        curncy_bar = self.get_recent_data(
+            security=currency,
+            cur_datetime=cur_datetime
+        )
+        if curncy_bar:
+            return curncy_bar.close
 
     def is_security_trading_time(
             self,
@@ -149,8 +174,20 @@ class BaseGateway(ABC):
             cur_time: Time
     ) -> bool:
         """whether the security is whitin trading time"""
+        return self.get_session_calendar(security).is_trading_time(cur_time)
+
+    def get_session_calendar(self, security: Security) -> SessionCalendar:
+        """Precompiled trading sessions of the security (rebuilt if the
+        sessions have been replaced)"""
         trading_sessions = self.trading_sessions[security.code]
-        return is_trading_time(cur_time, trading_sessions)
+        session_calendar = self.session_calendars.get(security.code)
+        if (
+            session_calendar is None
+            or session_calendar.trading_sessions is not trading_sessions
+        ):
+            session_calendar = SessionCalendar(trading_sessions)
+            self.session_calendars[security.code] = session_calendar
+        return session_calendar
 
     def is_trading_time(self, cur_datetime: datetime) -> bool:
         """Whether the gateway is within trading time (a gateway
@@ -175,14 +212,9 @@ class BaseGateway(ABC):
         """Get order"""
         return self.orders.get(orderid)
 
-    def find_deals_with_orderid(self, orderid: str) -> List[Deal]:
+    def find_deals_with_orderid(self, orderid: int) -> List[Deal]:
         """Find deals based on orderid"""
-        found_deals = []
-        for dealid in self.deals:
-            deal = self.deals.get(dealid)
-            if deal.orderid == orderid:
-                found_deals.append(deal)
-        return found_deals
+        return self.deals.find_with_orderid(orderid)
 
     def place_order(self, order: Order):
         """Place order"""
@@ -214,15 +246,19 @@ class BaseGateway(ABC):
     def get_all_orders(self) -> List[Order]:
         """Get all orders (sent by current algo)"""
         all_orders = []
-        for orderid, order in self.orders.queue.items():
+        for orderid, order in self.orders.items():
             order.orderid = orderid
             all_orders.append(order)
         return all_orders
 
+    def get_all_active_orders(self) -> List[Order]:
+        """Get all active orders (sent by current algo)"""
+        return self.orders.get_active_orders()
+
     def get_all_deals(self) -> List[Deal]:
         """Get all deals (sent by current algo and got executed)"""
         all_deals = []
-        for dealid, deal in self.deals.queue.items():
+        for dealid, deal in self.deals.items():
             deal.dealid = dealid
             all_deals.append(deal)
         return all_deals
@@ -15,7 +15,6 @@ You should have received a copy of the JXW license with
 this file. If not, please write to: josephchenhk@gmail.com
 """
 
-import uuid
 import re
 from typing import Dict, List
 from datetime import datetime
@@ -237,7 +236,7 @@ class FutuGateway(BaseGateway):
 
     def process_order(self, content: pd.DataFrame):
         """Callback of Order"""
-        orderid = content["order_id"].values[0]
+        orderid = self.orderids.get_id(content["order_id"].values[0])
         order = self.orders.get(orderid)  # blocking
 
         # Special treatment for HK stock
@@ -257,7 +256,7 @@ class FutuGateway(BaseGateway):
         # In simulate env, deal is not pushed; we handle it here
         if (self.trade_mode == TradeMode.SIMULATE and order.status in [
                 QTOrderStatus.FILLED, QTOrderStatus.PART_FILLED]):
-            dealid = "futu-sim-deal-" + str(uuid.uuid4())
+            dealid = self.dealids.id_generator.next_id()
             deal = Deal(
                 security=order.security,
                 direction=order.direction,
@@ -273,8 +272,8 @@ class FutuGateway(BaseGateway):
 
     def process_deal(self, content: pd.DataFrame):
         """Callback of Deal"""
-        orderid = content["order_id"].values[0]
-        dealid = content["deal_id"].values[0]
+        orderid = self.orderids.get_id(content["order_id"].values[0])
+        dealid = self.dealids.get_id(content["deal_id"].values[0])
         order = self.orders.get(orderid)  # blocking
 
         # Special treatment for HK stock
@@ -455,7 +454,7 @@ class FutuGateway(BaseGateway):
             print(f"[place_order]({order}) failed: {data}")
             return ""
         # valid orderid must be returned by server
-        orderid = data["order_id"].values[0]
+        orderid = self.orderids.get_id(data["order_id"].values[0])
         # change order status
         order.status = QTOrderStatus.SUBMITTED
         # order will be updated later by process_order method
@@ -466,7 +465,7 @@ class FutuGateway(BaseGateway):
         """Cancel order"""
         ret_code, data = self.trd_ctx.modify_order(
             ModifyOrderOp.CANCEL,
-            orderid,
+            self.orderids.get_broker_id(orderid),
             0,
             0,
             trd_env=self.futu_trd_env)
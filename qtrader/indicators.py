@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+# @Time    : 20/10/2026 4:30 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: indicators.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+##########################################################################
+#
+#                    Streaming technical indicators
+#
+# Each indicator holds its state for a list of securities in NumPy arrays,
+# and is updated bar by bar in O(1):
+#
+#   macd = MACD(securities)
+#   macd.update_security(security, bar.close)    # one security
+#   macd.update(closes)                          # all securities at once
+#   macd[security], macd.signal, macd.histogram  # latest values
+#
+# In batch mode, nan inputs mean "no new bar" and leave the state of the
+# security unchanged. Values are nan until enough bars have been received.
+##########################################################################
+
+from typing import List
+
+import numpy as np
+
+from qtrader.core.security import Security
+
+
+class Indicator:
+    """Base class of streaming indicators"""
+
+    def __init__(self, securities: List[Security]):
+        self.securities = list(securities)
+        self.index = {
+            security: i for i, security in enumerate(self.securities)}
+        self.size = len(self.securities)
+        self.value = np.full(self.size, np.nan)
+        # number of bars received by each security
+        self.count = np.zeros(self.size, dtype=int)
+
+    def _update(self, idx: np.ndarray, *values: np.ndarray):
+        """Update the securities at positions `idx` with their new values
+        (arrays aligned with idx)"""
+        raise NotImplementedError("_update has not been implemented yet.")
+
+    def update(self, *values) -> np.ndarray:
+        """Batch mode: one value per security (in the order of the
+        securities), nan if there is no new bar"""
+        values = [np.asarray(v, dtype=float) for v in values]
+        idx = np.flatnonzero(~np.isnan(values[0]))
+        self._update(idx, *(v[idx] for v in values))
+        return self.value
+
+    def update_security(self, security: Security, *values: float) -> float:
+        """Update one security"""
+        idx = np.array([self.index[security]])
+        self._update(idx, *(np.array([v], dtype=float) for v in values))
+        return self.value[idx[0]]
+
+    def __getitem__(self, security: Security) -> float:
+        return self.value[self.index[security]]
+
+
+class EMA(Indicator):
+    """Exponential moving average, as pandas `ewm(span=..., adjust=...)`
+    (or `alpha=...`) computed over all the bars received."""
+
+    def __init__(
+            self,
+            securities: List[Security],
+            span: float = None,
+            alpha: float = None,
+            adjust: bool = True
+    ):
+        super().__init__(securities)
+        if alpha is None:
+            if span is None:
+                raise ValueError("Either `span` or `alpha` must be given.")
+            alpha = 2. / (span + 1)
+        self.alpha = alpha
+        self.decay = 1. - alpha
+        self.adjust = adjust
+        # weighted sums of the values and of the weights (adjust=True)
+        self._numerator = np.zeros(self.size)
+        self._denominator = np.zeros(self.size)
+
+    def _update(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        if self.adjust:
+            self._numerator[idx] = x + self.decay * self._numerator[idx]
+            self._denominator[idx] = 1. + self.decay * self._denominator[idx]
+            ema = self._numerator[idx] / self._denominator[idx]
+        else:
+            prev = self.value[idx]
+            ema = np.where(
+                self.count[idx] == 0, x, self.decay * prev + self.alpha * x)
+        self.value[idx] = ema
+        self.count[idx] += 1
+        return ema
+
+
+class MACD(Indicator):
+    """Moving average convergence divergence (as finta.TA.MACD over all the
+    bars received). `value` is the MACD line; `signal` and `histogram` are
+    also kept."""
+
+    def __init__(
+            self,
+            securities: List[Security],
+            period_fast: int = 12,
+            period_slow: int = 26,
+            signal: int = 9,
+            adjust: bool = True
+    ):
+        super().__init__(securities)
+        self.ema_fast = EMA(securities, span=period_fast, adjust=adjust)
+        self.ema_slow = EMA(securities, span=period_slow, adjust=adjust)
+        self.ema_signal = EMA(securities, span=signal, adjust=adjust)
+        self.signal = self.ema_signal.value
+        self.histogram = np.full(self.size, np.nan)
+
+    def _update(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        macd = self.ema_fast._update(idx, x) - self.ema_slow._update(idx, x)
+        signal = self.ema_signal._update(idx, macd)
+        self.value[idx] = macd
+        self.histogram[idx] = macd - signal
+        self.count[idx] += 1
+        return macd
+
+
+class RSI(Indicator):
+    """Relative strength index, with Wilder's smoothing of the gains and
+    losses (ewm with alpha = 1 / period)"""
+
+    def __init__(
+            self,
+            securities: List[Security],
+            period: int = 14,
+            adjust: bool = True
+    ):
+        super().__init__(securities)
+        self.avg_gain = EMA(securities, alpha=1. / period, adjust=adjust)
+        self.avg_loss = EMA(securities, alpha=1. / period, adjust=adjust)
+        self.prev_close = np.full(self.size, np.nan)
+
+    def _update(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        prev_close = self.prev_close[idx]
+        self.prev_close[idx] = x
+        self.count[idx] += 1
+        # the first bar only sets the previous close
+        started = ~np.isnan(prev_close)
+        idx, change = idx[started], (x - prev_close)[started]
+        gain = self.avg_gain._update(idx, np.maximum(change, 0.))
+        loss = self.avg_loss._update(idx, np.maximum(-change, 0.))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(loss == 0, 100., 100. - 100. / (1. + gain / loss))
+        self.value[idx] = rsi
+        return rsi
+
+
+class ATR(Indicator):
+    """Average true range, with Wilder's smoothing of the true ranges (ewm
+    with alpha = 1 / period). Updated with (high, low, close)."""
+
+    def __init__(
+            self,
+            securities: List[Security],
+            period: int = 14,
+            adjust: bool = False
+    ):
+        super().__init__(securities)
+        self.avg_true_range = EMA(
+            securities, alpha=1. / period, adjust=adjust)
+        self.prev_close = np.full(self.size, np.nan)
+
+    def _update(
+            self,
+            idx: np.ndarray,
+            high: np.ndarray,
+            low: np.ndarray,
+            close: np.ndarray
+    ) -> np.ndarray:
+        prev_close = self.prev_close[idx]
+        true_range = np.fmax(
+            high - low,
+            np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        self.prev_close[idx] = close
+        atr = self.avg_true_range._update(idx, true_range)
+        self.value[idx] = atr
+        self.count[idx] += 1
+        return atr
+
+
+class _RollingWindow:
+    """Ring buffer of the latest `window` values of each security"""
+
+    def __init__(self, size: int, window: int):
+        self.window = window
+        self.buffer = np.full((size, window), np.nan)
+        self.pos = np.zeros(size, dtype=int)
+        self.count = np.zeros(size, dtype=int)
+
+    def push(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        """Write the values, and return the ones they replace (nan if the
+        window was not full)"""
+        pos = self.pos[idx]
+        old = self.buffer[idx, pos]
+        self.buffer[idx, pos] = x
+        self.pos[idx] = (pos + 1) % self.window
+        self.count[idx] += 1
+        return old
+
+
+class RollingStd(Indicator):
+    """Rolling standard deviation (as pandas `rolling(window).std(ddof)`);
+    the rolling mean is kept in `mean`.
+
+    Sums are updated in O(1), and recomputed from the window whenever it
+    wraps around (amortized O(1)), so that rounding errors do not
+    accumulate.
+    """
+
+    def __init__(
+            self,
+            securities: List[Security],
+            window: int,
+            ddof: int = 1
+    ):
+        super().__init__(securities)
+        self.window = window
+        self.ddof = ddof
+        self._window = _RollingWindow(self.size, window)
+        # values are shifted by the first value, for numerical stability
+        self._shift = np.full(self.size, np.nan)
+        self._sum = np.zeros(self.size)
+        self._sum_squares = np.zeros(self.size)
+        self.mean = np.full(self.size, np.nan)
+
+    def _update(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        shift = self._shift[idx]
+        shift = np.where(np.isnan(shift), x, shift)
+        self._shift[idx] = shift
+        old = self._window.push(idx, x) - shift
+        new = x - shift
+        full = self._window.count[idx] > self.window
+        self._sum[idx] += new - np.where(full, old, 0.)
+        self._sum_squares[idx] += new ** 2 - np.where(full, old ** 2, 0.)
+        wrapped = idx[self._window.pos[idx] == 0]
+        if len(wrapped):
+            window = self._window.buffer[wrapped] - self._shift[wrapped, None]
+            self._sum[wrapped] = window.sum(axis=1)
+            self._sum_squares[wrapped] = (window ** 2).sum(axis=1)
+        self.count[idx] += 1
+        ready = self.count[idx] >= self.window
+        mean = self._sum[idx] / self.window
+        variance = (
+            self._sum_squares[idx] - self.window * mean ** 2
+        ) / (self.window - self.ddof)
+        std = np.where(ready, np.sqrt(np.maximum(variance, 0.)), np.nan)
+        self.mean[idx] = np.where(ready, mean + shift, np.nan)
+        self.value[idx] = std
+        return std
+
+
+class BollingerBands(RollingStd):
+    """Bollinger bands: `value` is the rolling standard deviation; `mean`
+    (middle band), `upper` and `lower` are kept"""
+
+    def __init__(
+            self,
+            securities: List[Security],
+            window: int = 20,
+            num_std: float = 2.,
+            ddof: int = 1
+    ):
+        super().__init__(securities, window, ddof)
+        self.num_std = num_std
+        self.upper = np.full(self.size, np.nan)
+        self.lower = np.full(self.size, np.nan)
+
+    def _update(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        std = super()._update(idx, x)
+        self.upper[idx] = self.mean[idx] + self.num_std * std
+        self.lower[idx] = self.mean[idx] - self.num_std * std
+        return std
+
+
+class RollingMin(Indicator):
+    """Rolling minimum, in amortized O(1) per bar (van Herk/Gil-Werman).
+
+    The ring buffer is seen as blocks of `window` values. When a block is
+    complete, the minima of its suffixes are computed once; the window then
+    spans a prefix of the current block (whose running minimum is kept) and
+    a suffix of the previous one.
+    """
+
+    sign = 1.
+
+    def __init__(self, securities: List[Security], window: int):
+        super().__init__(securities)
+        self.window = window
+        self._window = _RollingWindow(self.size, window)
+        # suffix minima of the previous block (one more for the empty one)
+        self._suffix = np.full((self.size, window + 1), np.inf)
+        self._prefix = np.full(self.size, np.inf)
+
+    def _update(self, idx: np.ndarray, x: np.ndarray) -> np.ndarray:
+        x = self.sign * x
+        pos = self._window.pos[idx]
+        self._window.push(idx, x)
+        self._prefix[idx] = np.minimum(self._prefix[idx], x)
+        result = np.minimum(self._prefix[idx], self._suffix[idx, pos + 1])
+        wrapped = idx[self._window.pos[idx] == 0]
+        if len(wrapped):
+            block = self._window.buffer[wrapped]
+            self._suffix[wrapped, :-1] = np.minimum.accumulate(
+                block[:, ::-1], axis=1)[:, ::-1]
+            self._prefix[wrapped] = np.inf
+        self.count[idx] += 1
+        result = np.where(
+            self.count[idx] >= self.window, self.sign * result, np.nan)
+        self.value[idx] = result
+        return result
+
+
+class RollingMax(RollingMin):
+    """Rolling maximum (see RollingMin)"""
+
+    sign = -1.
@@ -17,3 +17,4 @@ this file. If not, please write to: josephchenhk@gmail.com
 
 from .performance import plot_pnl
 from .performance import PerformanceCTA
+from .montecarlo import MonteCarlo
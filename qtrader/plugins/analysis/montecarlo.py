@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# @Time    : 19/10/2026 5:10 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: montecarlo.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+# Statistics of each simulated path
+STATISTICS = ["sharpe_ratio", "max_drawdown", "terminal_pnl"]
+
+
+def resample_indices(
+        rng: np.random.Generator,
+        length: int,
+        num_simulations: int,
+        block_size: int = 1
+) -> np.ndarray:
+    """Indices of `num_simulations` bootstrapped paths of `length` steps.
+
+    With block_size = 1, the steps are drawn independently (with
+    replacement); otherwise the paths are made of blocks of consecutive
+    steps (circular block bootstrap), which keeps the autocorrelation of
+    the steps within a block.
+    """
+    if block_size <= 1:
+        return rng.integers(0, length, size=(num_simulations, length))
+    num_blocks = -(-length // block_size)
+    starts = rng.integers(0, length, size=(num_simulations, num_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)) % length
+    return indices.reshape(num_simulations, -1)[:, :length]
+
+
+def path_statistics(
+        pnl: np.ndarray,
+        init_capital: float,
+        periods_per_year: float = 252
+) -> np.ndarray:
+    """Sharpe ratio, max drawdown and terminal pnl of each row of pnl.
+
+    As in PerformanceCTA, the returns are the pnl divided by the initial
+    capital, and the Sharpe ratio is annualized with `periods_per_year`.
+    The drawdown is measured over the whole path (the initial capital
+    counts as the first peak).
+
+    :param pnl: 2-D array of pnl (one path per row)
+    :return: 2-D array of shape (number of paths, 3), see STATISTICS
+    """
+    returns = pnl / init_capital
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = np.where(
+            std > 0, np.sqrt(periods_per_year) * mean / std, np.nan)
+    equity = init_capital + np.cumsum(pnl, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), init_capital)
+    max_drawdown = np.minimum((equity / peak - 1.0).min(axis=1), 0.0)
+    terminal_pnl = equity[:, -1] - init_capital
+    return np.column_stack([sharpe, max_drawdown, terminal_pnl])
+
+
+def _simulate(task) -> np.ndarray:
+    """Statistics of a chunk of simulations (in a worker process)"""
+    pnl, init_capital, periods_per_year, block_size, num_simulations, seed = task
+    rng = np.random.default_rng(seed)
+    indices = resample_indices(rng, len(pnl), num_simulations, block_size)
+    return path_statistics(pnl[indices], init_capital, periods_per_year)
+
+
+class MonteCarlo:
+    """Monte Carlo analysis of a backtest by bootstrapping its pnl.
+
+    The pnl is either the list of closed trades (resampled one by one), or
+    the daily pnl (resampled in blocks of `block_size` days). Each simulated
+    path has the same number of steps as the history, and the distribution
+    of the Sharpe ratio, max drawdown and terminal pnl over the paths gives
+    their confidence intervals.
+
+    Simulations are run in chunks (to bound the memory used), and the chunks
+    can be distributed to a process pool. Each chunk has its own random
+    stream spawned from `seed`, so the results do not depend on the number
+    of workers.
+    """
+
+    def __init__(
+            self,
+            pnl: Sequence[float],
+            init_capital: float,
+            periods_per_year: float = 252,
+            block_size: int = 1
+    ):
+        """
+        :param pnl: pnl of the trades or the days, in time order
+        :param init_capital: initial capital of the backtest
+        :param periods_per_year: number of trades or days in a year
+        :param block_size: number of consecutive steps resampled together
+            (1 for independent draws)
+        """
+        self.pnl = np.asarray(pnl, dtype=float)
+        if len(self.pnl) < 2:
+            raise ValueError(
+                f"At least 2 pnl values are required, got {len(self.pnl)}.")
+        self.init_capital = init_capital
+        self.periods_per_year = periods_per_year
+        self.block_size = block_size
+
+    @classmethod
+    def from_trades(cls, performance, block_size: int = 1):
+        """Resample the trades reconstructed by PerformanceCTA (after
+        `calc_statistics`)"""
+        trades = pd.concat([
+            getattr(performance, f"{name}_trades_df")
+            for name in ("win", "loss", "flat")
+            if hasattr(performance, f"{name}_trades_df")])
+        trades = trades.sort_values("close_datetime")
+        daily_value = performance.daily_portfolio_value
+        years = (daily_value.index[-1] - daily_value.index[0]).days / 365.25
+        return cls(
+            pnl=trades["pnl"].to_numpy(),
+            init_capital=daily_value.iloc[0],
+            periods_per_year=len(trades) / years if years > 0 else 252,
+            block_size=block_size)
+
+    @classmethod
+    def from_daily_returns(cls, performance, block_size: int = 5):
+        """Block-bootstrap the daily pnl of PerformanceCTA (after
+        `calc_statistics`)"""
+        daily_value = performance.daily_portfolio_value
+        return cls(
+            pnl=daily_value.diff().dropna().to_numpy(),
+            init_capital=daily_value.iloc[0],
+            periods_per_year=252,
+            block_size=block_size)
+
+    def run(
+            self,
+            num_simulations: int = 10000,
+            seed: int = None,
+            chunk_size: int = 1000,
+            max_workers: int = 1
+    ) -> pd.DataFrame:
+        """Simulate the paths.
+
+        :return: statistics of each simulated path (see STATISTICS)
+        """
+        chunks = [min(chunk_size, num_simulations - i)
+                  for i in range(0, num_simulations, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+        tasks = [(self.pnl, self.init_capital, self.periods_per_year,
+                  self.block_size, num, chunk_seed)
+                 for num, chunk_seed in zip(chunks, seeds)]
+        if max_workers <= 1 or len(tasks) <= 1:
+            results = [_simulate(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(_simulate, tasks))
+        return pd.DataFrame(np.vstack(results), columns=STATISTICS)
+
+    def observed(self) -> pd.Series:
+        """Statistics of the historical path"""
+        return pd.Series(
+            path_statistics(
+                self.pnl[None, :], self.init_capital,
+                self.periods_per_year)[0],
+            index=STATISTICS)
+
+    def confidence_intervals(
+            self,
+            simulations: pd.DataFrame,
+            confidence: float = 0.95
+    ) -> pd.DataFrame:
+        """Percentile confidence intervals of the statistics, next to the
+        historical values"""
+        alpha = (1 - confidence) / 2
+        intervals = simulations.quantile([alpha, 0.5, 1 - alpha]).T
+        intervals.columns = ["lower", "median", "upper"]
+        intervals.insert(0, "observed", self.observed())
+        return intervals
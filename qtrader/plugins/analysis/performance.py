@@ -29,6 +29,10 @@ import plotly.graph_objects as go
 import plotly.offline as offline
 from plotly.subplots import make_subplots
 
+from qtrader.core.action_log import ActionLog
+from qtrader.core.recorder import column_name
+from qtrader.core.recorder import get_field
+from qtrader.core.recorder import read_records
 from qtrader.core.utility import try_parsing_datetime
 from qtrader.plugins.analysis.metrics import percentile
 from qtrader.plugins.analysis.metrics import convert_time
@@ -57,29 +61,25 @@ class PerformanceCTA:
         self.result_path = result_path
 
     def calc_statistics(self):
-        # read result csv
+        # read results (csv saved by BarEventEngineRecorder, or Parquet file
+        # saved by ParquetRecorder)
         result = Path(
             os.getcwd()).parent.parent.parent.joinpath(
             self.result_path)
-        df = pd.read_csv(str(result).replace("%20", " "))
-
-        df.datetime = [try_parsing_datetime(
-            max(ast.literal_eval(dt))) for dt in df["datetime"]]
-        df.strategy_portfolio_value = [sum(ast.literal_eval(
-            spv)) for spv in df["strategy_portfolio_value"]]
+        if result.suffix == ".parquet":
+            df = self._read_parquet(str(result).replace("%20", " "))
+        else:
+            df = self._read_csv(str(result).replace("%20", " "))
 
         # cal performance indicators on : sharpe ratio, info ratio, m2, mdd
-        df1 = df.copy()
         agg_dict = {"strategy_portfolio_value": "last"}
-        for i, gateway_name in enumerate(self.instruments["security"]):
-            for j, security in enumerate(
-                    self.instruments["security"][gateway_name]):
-                df1[f"{gateway_name}_{security}_close"] = df1["close"].apply(
-                    lambda x: ast.literal_eval(x)[i][j])
+        for gateway_name in self.instruments["security"]:
+            for security in self.instruments["security"][gateway_name]:
                 agg_dict[f"{gateway_name}_{security}_close"] = "last"
 
-        df_d = df1.set_index('datetime').resample('D').agg(agg_dict)
+        df_d = df.set_index('datetime').resample('D').agg(agg_dict)
         df_d = df_d.dropna()
+        self.daily_portfolio_value = df_d['strategy_portfolio_value']
         # returns = df_d['strategy_portfolio_value'].pct_change()
         returns = (
             df_d['strategy_portfolio_value'].diff()
@@ -112,36 +112,11 @@ class PerformanceCTA:
             }
         ).T
 
-        # only take care of rows with actions
-        df_action = df[df["action"].apply(lambda x: x.count("|") > 0)]
-        df_action = df_action.reset_index(drop=True).copy()
-
-        # Do not count fees when considering win/loss of each trade
-        df_action.loc[:, "count_trades"] = None
-        df_action.loc[:, "pv_without_fees"] = None
-        for idx, row in df_action.iterrows():
-            action_str = row["action"]
-            num_trades = action_str.count("|")
-            df_action.loc[idx, "count_trades"] = num_trades
-            df_action.loc[idx, "pv_without_fees"] = (
-                df_action.loc[idx, "strategy_portfolio_value"]
-            )
-            if num_trades > 0:
-                gateway_action_strs = ast.literal_eval(action_str)
-                for i, gateway_action_str in enumerate(gateway_action_strs):
-                    gateway_name = list(self.instruments["security"].keys())[i]
-                    gateway_actions = [
-                        ast.literal_eval(a)
-                        for a in gateway_action_str.split("|")
-                        if "{" in a]
-                    for gateway_action in gateway_actions:
-                        sec_idx = self.instruments["security"][gateway_name].index(
-                            gateway_action['sec'])
-                        commission = self.instruments["commission"][gateway_name][sec_idx]
-                        df_action.loc[idx, "pv_without_fees"] = (
-                            df_action.loc[idx, "pv_without_fees"]
-                            + commission * gateway_action['qty']
-                        )
+        # actions saved by the strategy (BaseStrategy.save_actions), or
+        # parsed from the recorded results
+        gateway_names = list(self.instruments["security"].keys())
+        actions = load_actions(
+            result, df["action"], df["datetime"], gateway_names)
 
         win_trades = []
         loss_trades = []
@@ -150,94 +125,86 @@ class PerformanceCTA:
         open_trades = {gw: {sec: {} for sec in self.instruments["security"][gw]}
                        for gw in self.instruments["security"]}
 
-        for idx, row in df_action.iterrows():
-            action_str = row["action"]
-            gateway_action_strs = ast.literal_eval(action_str)
-            for gw_idx, gateway_action_str in enumerate(gateway_action_strs):
-                gateway_name = list(
-                    self.instruments["security"].keys())[gw_idx]
-                gateway_actions = [
-                    ast.literal_eval(a)
-                    for a in gateway_action_str.split("|")
-                    if "{" in a]
-                for action in gateway_actions:
-                    security = action['sec']
-                    sec_idx = self.instruments["security"][gateway_name].index(
-                        security)
-                    lot = self.instruments["lot"][gateway_name][sec_idx]
-                    commission = self.instruments["commission"][gateway_name][sec_idx]
-                    slippage = self.instruments["slippage"][gateway_name][sec_idx]
-
-                    action["datetime"] = row["datetime"].to_pydatetime().strftime(
-                        "%Y-%m-%d %H:%M:%S")
-                    if action["offset"] == "OPEN":
-                        open_trades[gateway_name][security][action['no']] = action
-                    elif action["offset"] == "CLOSE":
-                        close_trd = action
-                        open_trd = open_trades[gateway_name][security][action['no']]
-                        assert open_trd["qty"] == close_trd["qty"], (
-                            "Qty doesn't match in open and close trade!"
-                        )
-                        qty = open_trd["qty"]
-                        close_trd_price = close_trd["close"]
-                        open_trd_price = open_trd["close"]
-                        # make a copy, instead of a reference!
-                        side = open_trd["side"] + ""
-                        if open_trd["side"] == "LONG":
-                            pnl = (
-                                (close_trd_price - open_trd_price) * qty * lot
-                                - commission * qty * 2
-                                - slippage * qty * 2
-                            )  # 2 for open&close
-                        elif open_trd["side"] == "SHORT":
-                            pnl = (
-                                (open_trd_price - close_trd_price) * qty * lot
-                                - commission * qty * 2
-                                - slippage * qty * 2
-                            )  # 2 for open&close
-                        # remove open trades in the dict
-                        del open_trades[gateway_name][security][action['no']]
-
-                        # record
-                        if pnl > 1e-8:
-                            win_trades.append([
-                                security,
-                                open_trd["datetime"],
-                                close_trd["datetime"],
-                                open_trd["datetime"].split(" ")[1],
-                                close_trd["datetime"].split(" ")[1],
-                                open_trd_price,
-                                close_trd_price,
-                                side,
-                                qty,
-                                pnl,
-                            ])
-                        elif pnl < -1e-8:
-                            loss_trades.append([
-                                security,
-                                open_trd["datetime"],
-                                close_trd["datetime"],
-                                open_trd["datetime"].split(" ")[1],
-                                close_trd["datetime"].split(" ")[1],
-                                open_trd_price,
-                                close_trd_price,
-                                side,
-                                qty,
-                                pnl,
-                            ])
-                        else:
-                            flat_trades.append([
-                                security,
-                                open_trd["datetime"],
-                                close_trd["datetime"],
-                                open_trd["datetime"].split(" ")[1],
-                                close_trd["datetime"].split(" ")[1],
-                                open_trd_price,
-                                close_trd_price,
-                                side,
-                                qty,
-                                pnl,
-                            ])
+        action_datetimes = actions["datetime"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        for action, action_datetime in zip(
+                actions.to_dict("records"), action_datetimes):
+            gateway_name = action["gateway"]
+            security = action["security"]
+            sec_idx = self.instruments["security"][gateway_name].index(
+                security)
+            lot = self.instruments["lot"][gateway_name][sec_idx]
+            commission = self.instruments["commission"][gateway_name][sec_idx]
+            slippage = self.instruments["slippage"][gateway_name][sec_idx]
+
+            action["datetime"] = action_datetime
+            if action["offset"] == "OPEN":
+                open_trades[gateway_name][security][action['no']] = action
+            elif action["offset"] == "CLOSE":
+                close_trd = action
+                open_trd = open_trades[gateway_name][security][action['no']]
+                assert open_trd["qty"] == close_trd["qty"], (
+                    "Qty doesn't match in open and close trade!"
+                )
+                qty = open_trd["qty"]
+                close_trd_price = close_trd["price"]
+                open_trd_price = open_trd["price"]
+                # make a copy, instead of a reference!
+                side = open_trd["direction"] + ""
+                if open_trd["direction"] == "LONG":
+                    pnl = (
+                        (close_trd_price - open_trd_price) * qty * lot
+                        - commission * qty * 2
+                        - slippage * qty * 2
+                    )  # 2 for open&close
+                elif open_trd["direction"] == "SHORT":
+                    pnl = (
+                        (open_trd_price - close_trd_price) * qty * lot
+                        - commission * qty * 2
+                        - slippage * qty * 2
+                    )  # 2 for open&close
+                # remove open trades in the dict
+                del open_trades[gateway_name][security][action['no']]
+
+                # record
+                if pnl > 1e-8:
+                    win_trades.append([
+                        security,
+                        open_trd["datetime"],
+                        close_trd["datetime"],
+                        open_trd["datetime"].split(" ")[1],
+                        close_trd["datetime"].split(" ")[1],
+                        open_trd_price,
+                        close_trd_price,
+                        side,
+                        qty,
+                        pnl,
+                    ])
+                elif pnl < -1e-8:
+                    loss_trades.append([
+                        security,
+                        open_trd["datetime"],
+                        close_trd["datetime"],
+                        open_trd["datetime"].split(" ")[1],
+                        close_trd["datetime"].split(" ")[1],
+                        open_trd_price,
+                        close_trd_price,
+                        side,
+                        qty,
+                        pnl,
+                    ])
+                else:
+                    flat_trades.append([
+                        security,
+                        open_trd["datetime"],
+                        close_trd["datetime"],
+                        open_trd["datetime"].split(" ")[1],
+                        close_trd["datetime"].split(" ")[1],
+                        open_trd_price,
+                        close_trd_price,
+                        side,
+                        qty,
+                        pnl,
+                    ])
 
         cols = [
             "security",
@@ -383,6 +350,35 @@ class PerformanceCTA:
                                                              0: "Metrics"})
         print(self.strategy_metrics)
 
+    def _read_csv(self, result_path: str) -> pd.DataFrame:
+        df = pd.read_csv(result_path)
+        df.datetime = [try_parsing_datetime(
+            max(ast.literal_eval(dt))) for dt in df["datetime"]]
+        df.strategy_portfolio_value = [sum(ast.literal_eval(
+            spv)) for spv in df["strategy_portfolio_value"]]
+        closes = [ast.literal_eval(x) for x in df["close"]]
+        for i, gateway_name in enumerate(self.instruments["security"]):
+            for j, security in enumerate(
+                    self.instruments["security"][gateway_name]):
+                df[f"{gateway_name}_{security}_close"] = [
+                    close[i][j] for close in closes]
+        return df
+
+    def _read_parquet(self, result_path: str) -> pd.DataFrame:
+        records = read_records(result_path)
+        df = pd.DataFrame({
+            "datetime": get_field(records, "datetime").max(axis=1),
+            "strategy_portfolio_value": get_field(
+                records, "strategy_portfolio_value").sum(axis=1),
+            # actions of the gateways at each time step
+            "action": get_field(records, "action").values.tolist()
+        })
+        for gateway_name in self.instruments["security"]:
+            for security in self.instruments["security"][gateway_name]:
+                df[f"{gateway_name}_{security}_close"] = records[
+                    column_name("close", gateway_name, security)]
+        return df
+
     def save(self):
         metrics = self.metrics
         with pd.ExcelWriter(self.result.parent.joinpath("stats.xlsx")) as writer:
@@ -642,6 +638,37 @@ def plot_pnl(
     print(f"Saved to {str(Path(result_path).parent)}/pnl_{title}.html")
 
 
+def load_actions(
+        result_path: str,
+        actions: pd.Series,
+        datetimes: pd.Series,
+        gateway_names: List[str]
+) -> pd.DataFrame:
+    """Action log saved next to the results (see BaseStrategy.save_actions);
+    if there is none, the actions are parsed from the `action` column of the
+    results"""
+    path = Path(str(result_path).replace("%20", " ")).parent.joinpath(
+        "actions.csv")
+    if path.exists():
+        return ActionLog.read_csv(str(path))
+    return ActionLog.from_records(actions, datetimes, gateway_names)
+
+
+def get_signals(actions: pd.DataFrame, gateway_names: List[str]) -> pd.Series:
+    """Signals (see get_signal_from_action) at each datetime of the action
+    log"""
+    gw_idx = actions["gateway"].map(
+        {gw: i + 1 for i, gw in enumerate(gateway_names)})
+    side = actions["direction"].where(
+        actions["offset"] != "CLOSE",
+        actions["direction"].map({"LONG": "SHORT", "SHORT": "LONG"}))
+    signals = (
+        "gw" + gw_idx.astype(str) + "_" + actions["security"] + "_"
+        + actions["offset"] + "_" + side)
+    return signals.groupby(actions["datetime"]).agg(
+        lambda x: "|".join(dict.fromkeys(x)))
+
+
 def get_signal_from_action(actions: str) -> str:
     actions = ast.literal_eval(actions)
     signal = ""
@@ -702,10 +729,20 @@ def plot_pnl_with_category(
                    & (result_1m["datetime"] <= end)]
 
     # only take out non-empty category/action
-    df_category = df[df[category].apply(lambda x: len(
-        [c for c in ast.literal_eval(x) if c != ""]) > 0)].copy()
-    df_category["signal"] = df_category["action"].apply(
-        lambda x: get_signal_from_action(x))
+    if category == "action":
+        gateway_names = list(instruments["security"].keys())
+        signals = get_signals(
+            load_actions(
+                result_path, result_1m["action"], result_1m["datetime"],
+                gateway_names),
+            gateway_names)
+        df_category = df[df["datetime"].isin(signals.index)].copy()
+        df_category["signal"] = df_category["datetime"].map(signals)
+    else:
+        df_category = df[df[category].apply(lambda x: len(
+            [c for c in ast.literal_eval(x) if c != ""]) > 0)].copy()
+        df_category["signal"] = df_category["action"].apply(
+            lambda x: get_signal_from_action(x))
 
     has_ohlc = False
     candlesticks = {gw: {sec: {} for sec in instruments["security"][gw]}
@@ -917,22 +954,63 @@ def plot_pnl_with_category(
 def string_to_numbers(x: Any) -> Any:
     return literal_eval(str(x).replace("nan", "None"))
 
-def plot_signals(
+
+def nan_to_none(x: Any) -> Any:
+    """Same as string_to_numbers, for values that are not strings (e.g.,
+    read from the live monitor feed), without converting them to str"""
+    if isinstance(x, float) and np.isnan(x):
+        return None
+    if isinstance(x, (list, tuple)):
+        return type(x)(nan_to_none(v) for v in x)
+    return x
+
+def convert_records(data: pd.DataFrame) -> pd.DataFrame:
+    """Convert the values recorded (str in csv files, native values in the
+    live monitor feed) to numbers, with None for missing values"""
+    for col in data.columns:
+        data[col] = data[col].apply(
+            lambda x: string_to_numbers(x) if isinstance(x, str)
+            else nan_to_none(x))
+    return data
+
+
+# Annotations of the signals (1: entry long, -1: entry short, 10: exit
+# short, -10: exit long) and of the actions (side, offset)
+SIGNAL_ANNOTATIONS = {
+    1: dict(arrowcolor="green", ay=30, yanchor="top", text="Entry Long"),
+    -1: dict(arrowcolor="red", ay=-30, yanchor="bottom", text="Entry Short"),
+    10: dict(arrowcolor="green", ay=30, yanchor="top", text="Exit Short"),
+    -10: dict(arrowcolor="red", ay=-30, yanchor="bottom", text="Exit Long"),
+}
+ACTION_ANNOTATIONS = {
+    ("LONG", "OPEN"): dict(bgcolor="#CFECEC", bordercolor="green", ax=-20,
+                           ay=30, yanchor="top", text="Entry Long"),
+    ("SHORT", "OPEN"): dict(bgcolor="#ffb3b3", bordercolor="red", ax=20,
+                            ay=-30, yanchor="bottom", text="Entry Short"),
+    ("LONG", "CLOSE"): dict(bgcolor="#CFECEC", bordercolor="green", ax=-20,
+                            ay=30, yanchor="top", text="Exit Short"),
+    ("SHORT", "CLOSE"): dict(bgcolor="#ffb3b3", bordercolor="red", ax=20,
+                             ay=-30, yanchor="bottom", text="Exit Long"),
+}
+
+
+def get_signal_series(
         data: pd.DataFrame,
-        instruments: Dict[str, Dict[str, List[Any]]],
-        save_path: str = None
-):
-    """
-    Plot P&L and corresponding signals
-    :param data: backtest resutls
+        instruments: Dict[str, Dict[str, List[Any]]]
+) -> Dict[str, Any]:
+    """Series plotted by plot_signals: the portfolio value, and the bars,
+    fields and annotations (signals and actions) of each security.
+
+    Only the rows given are processed, and the series of consecutive rows
+    can be concatenated (the live monitor appends the series of the new
+    rows to the figure).
+
+    :param data: recorded values (see convert_records)
     :param instruments: dictionary with security information
-    :param show_fields: dictionary specifying fields to be plotted
-    :param save_path: if not None, specify the saving path
-    :return: plotly graph object (Go)
+    :return: dict with `datetime` and `portfolio_value`, and the series of
+        each (gateway, security) in `securities`
     """
-    # Convert the data types in data
-    for col in data.columns:
-        data[col] = data[col].apply(lambda x: string_to_numbers(x))
+    data = data.reset_index(drop=True)
     # get latest timestamp
     datetime_ts = [
         try_parsing_datetime(max(dt))
@@ -941,264 +1019,182 @@ def plot_signals(
     # sum over gateways
     portfolio_value_ts = [
         sum(spv) for spv in data["strategy_portfolio_value"]]
-
-    portfolio_value = go.Scatter(
-        x=datetime_ts,
-        y=portfolio_value_ts,
-        name=f"Portfoliio Value",
-        marker=dict(color="blue"),
-        mode='lines'
-    )
-
-    candlesticks = {
-        gw: {
-            sec: None for sec in instruments[gw]['security']} for gw in instruments}
-    volumes = {
-        gw: {
-            sec: None for sec in instruments[gw]['security']} for gw in instruments}
-    signals = {
-        gw: {
-            sec: None for sec in instruments[gw]['security']} for gw in instruments}
-    actions = {
-        gw: {
-            sec: None for sec in instruments[gw]['security']} for gw in instruments}
-    # different strategy will have different recorded fields
-    fields = {
-        gw: {
-            sec: {f: None for f in instruments[gw]['show_fields']}
-            for sec in instruments[gw]['security']
-        } for gw in instruments
-    }
-
+    securities = {}
+    ohlcv = ("open", "high", "low", "close", "volume")
     for gw_idx, gateway_name in enumerate(instruments):
+        show_fields = instruments[gateway_name]['show_fields']
         for idx, security in enumerate(instruments[gateway_name]['security']):
-            open_ts = []
-            high_ts = []
-            low_ts = []
-            close_ts = []
-            volume_ts = []
-            field_ts = {}
-            for field in instruments[gateway_name]['show_fields']:
-                field_ts[field] = []
-
-            signals[gateway_name][security] = []
-            actions[gateway_name][security] = []
+            for field in show_fields:
+                if field not in data.columns:
+                    raise ValueError(f"{field} is NOT a column tag in "
+                                     f"`data`({data.columns}).")
+            sec_series = {f: [] for f in ("datetime",) + ohlcv}
+            sec_series["fields"] = {field: [] for field in show_fields}
+            sec_series["signals"] = []
+            sec_series["actions"] = []
             for i in range(len(data["datetime"])):
+                if data["datetime"][i][gw_idx] is None or any(
+                        data[f][i][gw_idx][idx] is None for f in ohlcv):
+                    continue
+                # bars are plotted at the latest timestamp, annotations at
+                # the timestamp of the gateway
+                sec_series["datetime"].append(datetime_ts[i])
+                for f in ohlcv:
+                    sec_series[f].append(data[f][i][gw_idx][idx])
+                for field in show_fields:
+                    sec_series["fields"][field].append(
+                        data[field][i][gw_idx][idx])
+                x = data["datetime"][i][gw_idx]
+                y = data["close"][i][gw_idx][idx]
+
+                if "signal" in data.columns:
+                    signal = SIGNAL_ANNOTATIONS.get(
+                        data["signal"][i][gw_idx][idx])
+                    if signal is not None:
+                        sec_series["signals"].append(dict(
+                            x=x,
+                            y=y,
+                            hovertext=signal["text"],
+                            yanchor=signal["yanchor"],
+                            showarrow=True,
+                            arrowhead=1,
+                            arrowsize=1,
+                            arrowwidth=2,
+                            arrowcolor=signal["arrowcolor"],
+                            ax=0,
+                            ay=signal["ay"],
+                            align="left",
+                            borderwidth=2,
+                            opacity=1.0,
+                        ))
+
                 if (
-                        data["datetime"][i][gw_idx] is not None
-                        and data["open"][i][gw_idx][idx] is not None
-                        and data["high"][i][gw_idx][idx] is not None
-                        and data["low"][i][gw_idx][idx] is not None
-                        and data["close"][i][gw_idx][idx] is not None
-                        and data["volume"][i][gw_idx][idx] is not None
+                        "action" in data.columns
+                        and security in data["action"][i][gw_idx]
                 ):
-                    open_ts.append(data["open"][i][gw_idx][idx])
-                    high_ts.append(data["high"][i][gw_idx][idx])
-                    low_ts.append(data["low"][i][gw_idx][idx])
-                    close_ts.append(data["close"][i][gw_idx][idx])
-                    volume_ts.append(data["volume"][i][gw_idx][idx])
-
-                    for field in instruments[gateway_name]['show_fields']:
-                        if field not in data.columns:
-                            raise ValueError(f"{field} is NOT a column tag in "
-                                             f"`data`({data.columns}).")
-                        field_ts[field].append(data[field][i][gw_idx][idx])
-
-                    if (
-                            "signal" in data.columns
-                            and data["signal"][i][gw_idx][idx] == 1
-                    ):
-                        x = data["datetime"][i][gw_idx]
-                        y = data["close"][i][gw_idx][idx]
-                        arrowhead = 1
-                        arrowsize = 1
-                        arrowwidth = 2
-                        arrowcolor = 'green'
-                        ax = 0
-                        ay = 30
-                        yanchor = 'top'
-                        text = "Entry Long"
-                    elif (
-                            "signal" in data.columns
-                            and data["signal"][i][gw_idx][idx] == -1
-                    ):
-                        x = data["datetime"][i][gw_idx]
-                        y = data["close"][i][gw_idx][idx]
-                        arrowhead = 1
-                        arrowsize = 1
-                        arrowwidth = 2
-                        arrowcolor = 'red'
-                        ax = 0
-                        ay = -30
-                        yanchor = 'bottom'
-                        text = "Entry Short"
-                    elif (
-                            "signal" in data.columns
-                            and data["signal"][i][gw_idx][idx] == 10
-                    ):
-                        x = data["datetime"][i][gw_idx]
-                        y = data["close"][i][gw_idx][idx]
-                        arrowhead = 1
-                        arrowsize = 1
-                        arrowwidth = 2
-                        arrowcolor = "green"
-                        ax = 0
-                        ay = 30
-                        yanchor = 'top'
-                        text = "Exit Short"
-                    elif (
-                            "signal" in data.columns
-                            and data["signal"][i][gw_idx][idx] == -10
-                    ):
-                        x = data["datetime"][i][gw_idx]
-                        y = data["close"][i][gw_idx][idx]
-                        arrowhead = 1
-                        arrowsize = 1
-                        arrowwidth = 2
-                        arrowcolor = "red"
-                        ax = 0
-                        ay = -30
-                        yanchor = 'bottom'
-                        text = "Exit Long"
-
-                    if (
-                            "signal" in data.columns
-                            and data["signal"][i][gw_idx][idx] in (
-                    1, -1, 10, -10)
-                    ):
-                        annotation_params = dict(
+                    action_list = [
+                        ast.literal_eval(a)
+                        for a in data["action"][i][gw_idx].split("|")
+                        if a != ""]
+                    for action in action_list:
+                        if action["sec"] != security:
+                            continue
+                        annotation = ACTION_ANNOTATIONS.get(
+                            (action["side"], action["offset"]))
+                        if annotation is None:
+                            continue
+                        sec_series["actions"].append(dict(
                             x=x,
                             y=y,
-                            hovertext=text,
-                            yanchor=yanchor,
+                            text=annotation["text"],
+                            yanchor=annotation["yanchor"],
                             showarrow=True,
-                            arrowhead=arrowhead,
-                            arrowsize=arrowsize,
-                            arrowwidth=arrowwidth,
-                            arrowcolor=arrowcolor,
-                            ax=ax,
-                            ay=ay,
+                            arrowhead=1,
+                            arrowsize=1,
+                            arrowwidth=2,
+                            arrowcolor="#636363",
+                            ax=annotation["ax"],
+                            ay=annotation["ay"],
+                            font=dict(
+                                size=15,
+                                color=annotation["bordercolor"],
+                                family="Courier New, monospace"),
                             align="left",
+                            bordercolor=annotation["bordercolor"],
                             borderwidth=2,
+                            bgcolor=annotation["bgcolor"],
                             opacity=1.0,
-                        )
-                        signals[gateway_name][security].append(
-                            annotation_params)
-
-                    if (
-                            "action" in data.columns
-                            and security in data["action"][i][gw_idx]
-                    ):
-                        action_str_list = data["action"][i][gw_idx].split(
-                            "|")
-                        action_str_list = [
-                            a for a in action_str_list if a != ""]
-                        action_list = [
-                            ast.literal_eval(a) for a in action_str_list]
-                        for action in action_list:
-                            if action["sec"] != security:
-                                continue
-                            if (
-                                    action["side"] == "LONG"
-                                    and action["offset"] == "OPEN"
-                            ):
-                                x = data["datetime"][i][gw_idx]
-                                y = data["close"][i][gw_idx][idx]
-                                bgcolor = "#CFECEC"
-                                bordercolor = 'green'
-                                arrowhead = 1
-                                arrowsize = 1
-                                arrowwidth = 2
-                                ax = -20
-                                ay = 30
-                                yanchor = 'top'
-                                text = "Entry Long"
-                            elif (
-                                    action["side"] == "SHORT"
-                                    and action["offset"] == "OPEN"
-                            ):
-                                x = data["datetime"][i][gw_idx]
-                                y = data["close"][i][gw_idx][idx]
-                                bgcolor = "#ffb3b3"
-                                bordercolor = 'red'
-                                arrowhead = 1
-                                arrowsize = 1
-                                arrowwidth = 2
-                                ax = 20
-                                ay = -30
-                                yanchor = 'bottom'
-                                text = "Entry Short"
-                            elif (
-                                    action["side"] == "LONG"
-                                    and action["offset"] == "CLOSE"
-                            ):
-                                x = data["datetime"][i][gw_idx]
-                                y = data["close"][i][gw_idx][idx]
-                                bgcolor = "#CFECEC"
-                                bordercolor = 'green'
-                                arrowhead = 1
-                                arrowsize = 1
-                                arrowwidth = 2
-                                ax = -20
-                                ay = 30
-                                yanchor = 'top'
-                                text = "Exit Short"
-                            elif (
-                                    action["side"] == "SHORT"
-                                    and action["offset"] == "CLOSE"
-                            ):
-                                x = data["datetime"][i][gw_idx]
-                                y = data["close"][i][gw_idx][idx]
-                                bgcolor = "#ffb3b3"
-                                bordercolor = 'red'
-                                arrowhead = 1
-                                arrowsize = 1
-                                arrowwidth = 2
-                                ax = 20
-                                ay = -30
-                                yanchor = 'bottom'
-                                text = "Exit Long"
-
-                            action_annotation_params = dict(
-                                x=x,
-                                y=y,
-                                text=text,
-                                yanchor=yanchor,
-                                showarrow=True,
-                                arrowhead=arrowhead,
-                                arrowsize=arrowsize,
-                                arrowwidth=arrowwidth,
-                                arrowcolor="#636363",
-                                ax=ax,
-                                ay=ay,
-                                font=dict(
-                                    size=15,
-                                    color=bordercolor,
-                                    family="Courier New, monospace"),
-                                align="left",
-                                bordercolor=bordercolor,
-                                borderwidth=2,
-                                bgcolor=bgcolor,
-                                opacity=1.0,
-                            )
-                            actions[gateway_name][security].append(
-                                action_annotation_params)
+                        ))
+            securities[(gateway_name, security)] = sec_series
+    return dict(
+        datetime=datetime_ts,
+        portfolio_value=portfolio_value_ts,
+        securities=securities)
+
+
+def get_signal_rows(
+        instruments: Dict[str, Dict[str, List[Any]]]
+) -> Dict[tuple, int]:
+    """Row of the OHLC subplot of each (gateway, security) in plot_signals
+    (the volume and the fields with pos=2 are plotted in the next row)"""
+    rows = {}
+    for gw_idx, gateway_name in enumerate(instruments):
+        for idx, security in enumerate(instruments[gateway_name]['security']):
+            # gw_idx: 0, 1
+            # idx: 0, 1, 2
+            # gw_idx=0, idx=0: row=2=idx*2+2
+            # gw_idx=0, idx=1: row=4=idx*2+2
+            # gw_idx=0, idx=2: row=6=idx*2+2
+            # gw_idx=1, idx=0: row=8=3*2+idx*2+2=len(instruments[list(instruments.keys())[gw_idx-1]])*2+idx*2+2
+            # gw_idx=1, idx=1:
+            # row=10=3*2+idx*2+2=len(instruments[list(instruments.keys())[gw_idx-1]])*2+idx*2+2
+            if gw_idx == 0:
+                row = idx * 2 + 2
+            else:
+                row = len(instruments[list(instruments.keys())[
+                    gw_idx - 1]]) * 2 + idx * 2 + 2
+            rows[(gateway_name, security)] = row
+    return rows
+
+
+def get_signal_traces(
+        instruments: Dict[str, Dict[str, List[Any]]]
+) -> List[tuple]:
+    """Traces of the figure of plot_signals, in order: the portfolio value,
+    then the OHLC of each (gateway, security) followed by its fields (keys
+    are ("portfolio_value",), (gateway, security, "ohlc") and (gateway,
+    security, field))"""
+    traces = [("portfolio_value",)]
+    for gateway_name in instruments:
+        show_fields = instruments[gateway_name]['show_fields']
+        for idx, security in enumerate(instruments[gateway_name]['security']):
+            traces.append((gateway_name, security, "ohlc"))
+            for field in show_fields:
+                if show_fields[field][idx]['pos'] in (1, 2):
+                    traces.append((gateway_name, security, field))
+    return traces
 
+
+def plot_signals(
+        data: pd.DataFrame,
+        instruments: Dict[str, Dict[str, List[Any]]],
+        save_path: str = None
+):
+    """
+    Plot P&L and corresponding signals
+    :param data: backtest resutls
+    :param instruments: dictionary with security information
+    :param show_fields: dictionary specifying fields to be plotted
+    :param save_path: if not None, specify the saving path
+    :return: plotly graph object (Go)
+    """
+    # Convert the data types in data
+    data = convert_records(data)
+    series = get_signal_series(data, instruments)
+
+    portfolio_value = go.Scatter(
+        x=series["datetime"],
+        y=series["portfolio_value"],
+        name=f"Portfoliio Value",
+        marker=dict(color="blue"),
+        mode='lines'
+    )
+
+    candlesticks = {gw: {} for gw in instruments}
+    # different strategy will have different recorded fields
+    fields = {gw: {} for gw in instruments}
+    for gateway_name in instruments:
+        for idx, security in enumerate(instruments[gateway_name]['security']):
+            sec_series = series["securities"][(gateway_name, security)]
             candlesticks[gateway_name][security] = go.Candlestick(
-                x=datetime_ts,
-                open=open_ts,
-                high=high_ts,
-                low=low_ts,
-                close=close_ts,
+                x=sec_series["datetime"],
+                open=sec_series["open"],
+                high=sec_series["high"],
+                low=sec_series["low"],
+                close=sec_series["close"],
                 name=f"OHLC_{security}"
             )
-            volumes[gateway_name][security] = go.Bar(
-                x=datetime_ts,
-                y=volume_ts,
-                name=f"Volume_{security}",
-                marker=dict(color="pink")
-            )
-
+            fields[gateway_name][security] = {}
             for field in instruments[gateway_name]['show_fields']:
                 func = instruments[gateway_name]['show_fields'][field][idx][
                     "func"]
@@ -1211,8 +1207,8 @@ def plot_signals(
                         s_func = style_func[style_field]
                         style[style_field] = s_func(data)
                 fields[gateway_name][security][field] = func(
-                    x=datetime_ts,
-                    y=field_ts[field],
+                    x=sec_series["datetime"],
+                    y=sec_series["fields"][field],
                     name=f"{field}_{gateway_name}_{security}",
                     **style
                 )
@@ -1251,62 +1247,44 @@ def plot_signals(
     )
     fig.update_xaxes(row=1, col=1, rangeslider_visible=False)
 
-    has_ohlcv = True
-    if has_ohlcv:
-        # gw_idx: 0, 1
-        # idx: 0, 1, 2
-        # gw_idx=0, idx=0: row=2=idx*2+2
-        # gw_idx=0, idx=1: row=4=idx*2+2
-        # gw_idx=0, idx=2: row=6=idx*2+2
-        # gw_idx=1, idx=0: row=8=3*2+idx*2+2=len(instruments[list(instruments.keys())[gw_idx-1]])*2+idx*2+2
-        # gw_idx=1, idx=1:
-        # row=10=3*2+idx*2+2=len(instruments[list(instruments.keys())[gw_idx-1]])*2+idx*2+2
-        for gw_idx, gateway_name in enumerate(instruments):
-            for idx, security in enumerate(instruments[gateway_name]['security']):
-                if gw_idx == 0:
-                    row = idx * 2 + 2
-                else:
-                    row = len(instruments[list(instruments.keys())[
-                        gw_idx - 1]]) * 2 + idx * 2 + 2
-                fig.add_trace(
-                    candlesticks[gateway_name][security],
+    # the traces are added in the order of get_signal_traces
+    rows = get_signal_rows(instruments)
+    for gateway_name in instruments:
+        for idx, security in enumerate(instruments[gateway_name]['security']):
+            row = rows[(gateway_name, security)]
+            sec_series = series["securities"][(gateway_name, security)]
+            fig.add_trace(
+                candlesticks[gateway_name][security],
+                row=row,
+                col=1,
+            )
+            for annotation_param in (
+                    sec_series["signals"] + sec_series["actions"]):
+                fig.add_annotation(
                     row=row,
                     col=1,
+                    **annotation_param
                 )
-                if signals[gateway_name][security] is not None:
-                    for annotation_param in signals[gateway_name][security]:
-                        fig.add_annotation(
-                            row=row,
-                            col=1,
-                            **annotation_param
-                        )
-                if actions[gateway_name][security] is not None:
-                    for act_annotation_param in actions[gateway_name][security]:
-                        fig.add_annotation(
-                            row=row,
-                            col=1,
-                            **act_annotation_param
-                        )
-                fig.update_xaxes(row=row, col=1, rangeslider_visible=False)
-
-                for field in instruments[gateway_name]['show_fields']:
-                    if instruments[gateway_name]['show_fields'][field][idx][
+            fig.update_xaxes(row=row, col=1, rangeslider_visible=False)
+
+            for field in instruments[gateway_name]['show_fields']:
+                if instruments[gateway_name]['show_fields'][field][idx][
                         'pos'] == 1:
-                        fig.add_trace(
-                            fields[gateway_name][security][field],
-                            row=row,
-                            col=1,
-                        )
-                    elif instruments[gateway_name]['show_fields'][field][idx][
+                    fig.add_trace(
+                        fields[gateway_name][security][field],
+                        row=row,
+                        col=1,
+                    )
+                elif instruments[gateway_name]['show_fields'][field][idx][
                         'pos'] == 2:
-                        fig.add_trace(
-                            fields[gateway_name][security][field],
-                            row=row+1,
-                            col=1,
-                        )
-
-                fig.update_xaxes(
-                    row=row + 1, col=1, rangeslider_visible=False)
+                    fig.add_trace(
+                        fields[gateway_name][security][field],
+                        row=row+1,
+                        col=1,
+                    )
+
+            fig.update_xaxes(
+                row=row + 1, col=1, rangeslider_visible=False)
 
     fig.layout.update(
         title="Live trade monitor",
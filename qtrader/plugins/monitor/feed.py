@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# @Time    : 21/10/2026 4:45 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: feed.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+
+import os
+import pickle
+import struct
+from datetime import datetime
+from pathlib import Path
+from subprocess import Popen
+from typing import Any, Dict, List
+
+# Folder of the live monitor data (as used by the event engine)
+LIVEMONITOR_PATH = ".qtrader_cache/livemonitor"
+
+# Each row of the feed is a pickled dict, prefixed with its size in bytes
+HEADER = struct.Struct("<Q")
+
+
+def get_feed_path(strategy_name: str, monitor_name: str) -> Path:
+    return Path(LIVEMONITOR_PATH).joinpath(
+        strategy_name, f"{monitor_name}.feed")
+
+
+class MonitorFeedWriter:
+    """Append-only feed of the recorded variables of a strategy: a row (dict
+    of field -> value) is appended at each time step, so that the cost of a
+    step does not grow with the history"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def append(self, row: Dict[str, Any]):
+        payload = pickle.dumps(row, protocol=pickle.HIGHEST_PROTOCOL)
+        # one write per row, flushed so that the reader sees complete rows
+        self._file.write(HEADER.pack(len(payload)) + payload)
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class MonitorFeedReader:
+    """Read a feed incrementally: the byte offset of the rows already read is
+    kept, and each `read` only loads the rows appended since.
+
+    `data` holds all the rows read (field -> list of values), as the live
+    monitor data pickled by the event engine.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.offset = 0
+        self.data: Dict[str, List[Any]] = {}
+
+    def reset(self):
+        self.offset = 0
+        self.data = {}
+
+    def read(self) -> int:
+        """Read the new rows
+
+        :return: number of new rows
+        """
+        if not self.path.exists():
+            self.reset()
+            return 0
+        if os.path.getsize(self.path) < self.offset:
+            # the feed has been recreated (e.g., the strategy is restarted)
+            self.reset()
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            buffer = f.read()
+        pos = 0
+        num_rows = 0
+        while pos + HEADER.size <= len(buffer):
+            (size,) = HEADER.unpack_from(buffer, pos)
+            end = pos + HEADER.size + size
+            if end > len(buffer):
+                # the row is being written; read it next time
+                break
+            row = pickle.loads(buffer[pos + HEADER.size:end])
+            for field, value in row.items():
+                self.data.setdefault(field, []).append(value)
+            pos = end
+            num_rows += 1
+        self.offset += pos
+        return num_rows
+
+
+class MonitorFeedRecorder:
+    """Recorder of the bar event engine that also appends the variables
+    recorded at each time step to the live monitor feed of the strategy.
+
+    It wraps the recorder passed to BarEventEngine (all its attributes are
+    available); the live monitor reads the feed instead of the data pickled
+    by the event engine, so the `monitor` plugin does not need to be
+    activated in the engine (start the monitor with `start_livemonitor`).
+    """
+
+    def __init__(
+            self,
+            recorder,
+            strategy_name: str,
+            monitor_name: str = None
+    ):
+        """
+        :param recorder: BarEventEngineRecorder (or ParquetRecorder)
+        :param strategy_name: name of the strategy in BarEventEngine
+        :param monitor_name: name of the feed (default: today's date, as in
+            the live monitor)
+        """
+        if monitor_name is None:
+            monitor_name = datetime.now().strftime("%Y%m%d")
+        self.recorder = recorder
+        self.monitor_name = monitor_name
+        self.writer = MonitorFeedWriter(
+            get_feed_path(strategy_name, monitor_name))
+        self._row = {}
+
+    def __getattr__(self, name: str):
+        # only called for attributes not found on the wrapper
+        if name == "recorder":
+            raise AttributeError(name)
+        return getattr(self.recorder, name)
+
+    def get_recorded_fields(self):
+        return self.recorder.get_recorded_fields()
+
+    def write_record(self, field, value):
+        self.recorder.write_record(field, value)
+        self._row[field] = value
+        # all fields are written at each time step
+        if len(self._row) == len(self.recorder.recorded_methods):
+            self.writer.append(self._row)
+            self._row = {}
+
+
+def start_livemonitor(
+        strategies: Dict[str, Dict[str, List[str]]],
+        monitor_name: str = None
+):
+    """Start the live monitor (Dash app) in a new process, as the event
+    engine does when the `monitor` plugin is activated
+
+    :param strategies: security codes of each gateway of each strategy
+    :param monitor_name: name of the feeds (default: today's date)
+    :return: the process
+    """
+    if monitor_name is None:
+        monitor_name = datetime.now().strftime("%Y%m%d")
+    return Popen([
+        'python',
+        f'{Path(__file__).with_name("livemonitor.py")}',
+        f'{monitor_name}',
+        f'{strategies}'
+    ])
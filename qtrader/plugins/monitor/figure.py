@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# @Time    : 24/10/2026 10:15 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: figure.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import uuid
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+from dash import Patch
+
+from qtrader.plugins.analysis.performance import convert_records
+from qtrader.plugins.analysis.performance import get_signal_rows
+from qtrader.plugins.analysis.performance import get_signal_series
+from qtrader.plugins.analysis.performance import get_signal_traces
+from qtrader.plugins.analysis.performance import plot_signals
+from qtrader.plugins.monitor.feed import MonitorFeedReader
+
+# Values extended in each type of trace of plot_signals
+OHLC = ("open", "high", "low", "close")
+
+
+class LiveSignalFigure:
+    """Figure of plot_signals, updated from a monitor feed at each tick of
+    the live monitor.
+
+    The rows read from the feed are converted once and kept (`data`), and a
+    client that has already drawn the figure only receives the rows added
+    since its last update, appended to the traces and annotations of its
+    figure (a Dash Patch). The whole figure is only plotted for new clients,
+    or when the feed is recreated. Styles computed by `style_func` (see
+    plot_signals) are only updated when the whole figure is plotted.
+    """
+
+    def __init__(
+            self,
+            reader: MonitorFeedReader,
+            instruments: Dict[str, Dict[str, List[Any]]]
+    ):
+        self.reader = reader
+        self.instruments = instruments
+        self.traces = get_signal_traces(instruments)
+        self.rows = get_signal_rows(instruments)
+        self.data = pd.DataFrame()
+        # identifies the rows of the feed (it changes when the feed is
+        # recreated, or the monitor restarted)
+        self.generation = uuid.uuid4().hex
+
+    def read(self) -> int:
+        """Convert and keep the rows added to the feed
+
+        :return: number of new rows
+        """
+        num_rows = self.reader.read()
+        num_total = len(next(iter(self.reader.data.values()), []))
+        if num_total != len(self.data) + num_rows:
+            # the feed has been recreated, and read from the start
+            self.data = pd.DataFrame()
+            self.generation = uuid.uuid4().hex
+            num_rows = num_total
+        if num_rows > 0:
+            new_data = convert_records(pd.DataFrame(
+                {field: values[-num_rows:]
+                 for field, values in self.reader.data.items()}))
+            self.data = pd.concat([self.data, new_data], ignore_index=True)
+        return num_rows
+
+    def update(self, state: Dict[str, Any] = None) -> Tuple[Any, Dict]:
+        """Figure (or Patch) of a client
+
+        :param state: state returned by the previous update of the client
+            (None if it has not drawn the figure)
+        :return: the figure or the patch, and the new state of the client
+        """
+        self.read()
+        num_rows = len(self.data)
+        if num_rows == 0:
+            return None, None
+        new_state = dict(generation=self.generation, rows=num_rows)
+        if (
+            state is None
+            or state.get("generation") != self.generation
+            or state.get("rows", 0) > num_rows
+        ):
+            # values are already converted (converting them again does not
+            # change them)
+            fig = plot_signals(
+                data=self.data.copy(), instruments=self.instruments)
+            return fig, new_state
+        return self.get_patch(state["rows"]), new_state
+
+    def get_patch(self, start: int) -> Patch:
+        """Patch that appends the rows from `start` on to the figure"""
+        series = get_signal_series(self.data.iloc[start:], self.instruments)
+        patch = Patch()
+        annotations = []
+        for k, trace in enumerate(self.traces):
+            if trace == ("portfolio_value",):
+                patch["data"][k]["x"].extend(series["datetime"])
+                patch["data"][k]["y"].extend(series["portfolio_value"])
+                continue
+            gateway_name, security, field = trace
+            sec_series = series["securities"][(gateway_name, security)]
+            patch["data"][k]["x"].extend(sec_series["datetime"])
+            if field == "ohlc":
+                for f in OHLC:
+                    patch["data"][k][f].extend(sec_series[f])
+                # as added by plot_signals, in the OHLC subplot
+                row = self.rows[(gateway_name, security)]
+                annotations.extend(
+                    dict(annotation, xref=f"x{row}", yref=f"y{row}")
+                    for annotation in (
+                        sec_series["signals"] + sec_series["actions"]))
+            else:
+                patch["data"][k]["y"].extend(sec_series["fields"][field])
+        if annotations:
+            patch["layout"]["annotations"].extend(annotations)
+        return patch
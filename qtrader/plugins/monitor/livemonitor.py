@@ -19,7 +19,7 @@ from datetime import datetime
 
 import pandas as pd
 import plotly.graph_objects as go
-from dash.dependencies import Input, Output
+from dash.dependencies import Input, Output, State
 import dash
 from pathlib import Path
 import pickle
@@ -34,12 +34,19 @@ if ADD_LOCAL_PACKAGE_PATHS_TO_SYSPATH:
         if pth not in sys.path:
             sys.path.insert(0, pth)
 from qtrader.plugins.analysis.performance import plot_signals
+from qtrader.plugins.monitor.feed import MonitorFeedReader
+from qtrader.plugins.monitor.figure import LiveSignalFigure
+from qtrader.plugins.monitor.feed import get_feed_path
 
 if len(sys.argv) > 1:
     monitor_name = sys.argv[1]
 else:
     monitor_name = datetime.now().strftime("%Y%m%d")
 
+# Figures of the strategies read from their feeds (only the new rows are
+# read, converted and sent to the browser at each update)
+live_figures = {}
+
 
 app = dash.Dash(__name__)
 app.layout = dash.html.Div(
@@ -51,6 +58,8 @@ app.layout = dash.html.Div(
             value=list(instruments.keys())[0]
         ),
         dash.dcc.Graph(id='live-update-graph'),
+        # rows of the feed drawn in the browser
+        dash.dcc.Store(id='live-update-state'),
         dash.dcc.Interval(
             id='interval-component',
             interval=1 * TIME_STEP,  # in milliseconds
@@ -60,13 +69,32 @@ app.layout = dash.html.Div(
 )
 
 
-@app.callback(Output('live-update-graph', 'figure'),
+@app.callback([Output('live-update-graph', 'figure'),
+               Output('live-update-state', 'data')],
               [Input('interval-component', 'n_intervals'),
-               Input('strategy_name', 'value')])
-def update_graph_live(n, strategy_name):
+               Input('strategy_name', 'value')],
+              [State('live-update-state', 'data')])
+def update_graph_live(n, strategy_name, state):
     home_dir = Path(os.getcwd())
+    # feed appended by MonitorFeedRecorder, or data pickled by the engine
+    feed_path = home_dir.joinpath(get_feed_path(strategy_name, monitor_name))
     data_path = home_dir.joinpath(
         f".qtrader_cache/livemonitor/{strategy_name}/{monitor_name}")
+    if os.path.exists(feed_path):
+        live_figure = live_figures.get(strategy_name)
+        if live_figure is None:
+            live_figure = live_figures[strategy_name] = LiveSignalFigure(
+                reader=MonitorFeedReader(feed_path),
+                instruments=instruments.get(f'{strategy_name}'))
+        if state is not None and state.get("strategy") != strategy_name:
+            # another strategy is drawn
+            state = None
+        fig, state = live_figure.update(state)
+        if fig is None:
+            # nothing has been recorded yet
+            return go.Figure(), None
+        state["strategy"] = strategy_name
+        return fig, state
     if not os.path.exists(data_path):
         # Create a blank figure
         fig = go.Figure()
@@ -82,14 +110,14 @@ def update_graph_live(n, strategy_name):
         fig.update_layout(
             plot_bgcolor='white',  # Set background color to white
         )
-        return fig
+        return fig, None
     with open(data_path, "rb") as f:
         data = pd.DataFrame(pickle.load(f))
         fig = plot_signals(
             data=data,
             instruments=instruments.get(f'{strategy_name}'),
         )
-        return fig
+        return fig, None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# @Time    : 21/10/2026 11:20 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: action_log_test.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from qtrader.core.action_log import ActionLog
+from qtrader.core.constants import Direction, Exchange, Offset
+from qtrader.core.security import Futures
+from qtrader.core.strategy import BaseStrategy
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX, expiry_date="20220828")
+
+OPEN = {"sec": "FUT.GC", "side": "LONG", "offset": "OPEN", "qty": 2,
+        "close": 1750.5, "no": 1}
+CLOSE = {"sec": GC, "side": Direction.LONG, "offset": Offset.CLOSE,
+         "qty": 2, "close": 1760.0, "no": 1, "fee": 3.0}
+
+
+class TestActionLog:
+
+    def test_append_and_to_frame(self):
+        log = ActionLog()
+        log.append(datetime(2021, 3, 15, 15, 0), "Backtest", OPEN)
+        log.append(datetime(2021, 3, 15, 15, 5), "Backtest", CLOSE)
+        df = log.to_frame()
+        assert len(log) == 2
+        assert list(df.columns) == list(ActionLog.COLUMNS)
+        # enums and securities are stored as plain values
+        assert df["security"].tolist() == ["FUT.GC", "FUT.GC"]
+        assert df["direction"].tolist() == ["LONG", "LONG"]
+        assert df["offset"].tolist() == ["OPEN", "CLOSE"]
+        assert df["price"].tolist() == [1750.5, 1760.0]
+        assert pd.isna(df["fee"].iloc[0]) and df["fee"].iloc[1] == 3.0
+        assert df["datetime"].iloc[1] == pd.Timestamp("2021-03-15 15:05")
+
+    def test_csv_round_trip(self, tmp_path):
+        log = ActionLog()
+        log.append(datetime(2021, 3, 15, 15, 0), "Backtest", OPEN)
+        log.append(datetime(2021, 3, 15, 15, 5), "Backtest", CLOSE)
+        path = log.save_csv(str(tmp_path / "actions.csv"))
+        pd.testing.assert_frame_equal(ActionLog.read_csv(path), log.to_frame())
+
+    def test_from_records(self):
+        # `action` column of the recorder: actions of each gateway joined
+        # with "|"
+        actions = [
+            str([f"{OPEN}|", ""]),
+            str(["", ""]),
+            str(["", f"{OPEN}|{OPEN}|"])]
+        datetimes = pd.date_range("2021-03-15 15:00", periods=3, freq="min")
+        df = ActionLog.from_records(actions, datetimes, ["Backtest", "Futu"])
+        assert df["gateway"].tolist() == ["Backtest", "Futu", "Futu"]
+        assert df["datetime"].tolist() == [
+            datetimes[0], datetimes[2], datetimes[2]]
+        assert df["qty"].tolist() == [2, 2, 2]
+
+    def test_strategy_logs_the_recorded_datetime(self):
+        # the recorder writes the latest datetime of the gateways, to the
+        # second
+        engine = SimpleNamespace(gateways={
+            "Backtest": SimpleNamespace(
+                market_datetime=datetime(2021, 3, 15, 15, 0, 59, 500000)),
+            "Futu": SimpleNamespace(
+                market_datetime=datetime(2021, 3, 15, 15, 0, 0))})
+        strategy = BaseStrategy(
+            securities={"Backtest": [GC], "Futu": []},
+            strategy_account="default",
+            strategy_version="1.0",
+            engine=engine,
+            init_strategy_portfolios={})
+        strategy.reset_action("Futu")
+        strategy.update_action("Futu", OPEN)
+        df = strategy.action_log.to_frame()
+        assert df["datetime"].tolist() == [pd.Timestamp("2021-03-15 15:00:59")]
+        assert df["gateway"].tolist() == ["Futu"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
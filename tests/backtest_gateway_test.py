@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+# @Time    : 22/10/2026 5:20 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: backtest_gateway_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+from datetime import time as Time
+
+import pytest
+
+from qtrader.core import data
+from qtrader.core.constants import AdjustMethod
+from qtrader.core.constants import Exchange
+from qtrader.core.data import Bar
+from qtrader.core.data import _get_data
+from qtrader.core.security import Futures
+from qtrader.gateways import BacktestGateway
+from qtrader.gateways.backtest import backtest_gateway
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX)
+SI = Futures(code="FUT.SI", lot_size=5000, security_name="SIN2",
+             exchange=Exchange.NYMEX)
+TRADING_SESSIONS = {
+    "FUT.GC": [[datetime(1970, 1, 1, 6, 0, 0), datetime(1970, 1, 1, 5, 0, 0)]]}
+START = datetime(2021, 3, 15, 15, 0, 0)
+END = datetime(2021, 3, 17, 23, 0, 0)
+
+
+def make_gateway(
+        start=START,
+        end=END,
+        securities=(GC,),
+        **kwargs
+) -> BacktestGateway:
+    return BacktestGateway(
+        securities=list(securities),
+        gateway_name="Backtest",
+        start=start,
+        end=end,
+        trading_sessions=TRADING_SESSIONS,
+        **kwargs)
+
+
+class DataIterator:
+    """Recent data looked up by iterating over the bars, as the gateway used
+    to do: the bar before the datetime (BAR_CONVENTION='start') or at it
+    ('end') is returned, and nothing is updated at the end of the backtest
+    ('start') or after it ('end')"""
+
+    def __init__(self, data, end: datetime, bar_convention: str):
+        self.data = (
+            Bar(datetime=row.time_key.to_pydatetime(), security=GC,
+                open=row.open, high=row.high, low=row.low, close=row.close,
+                volume=row.volume)
+            for row in data.itertuples())
+        self.end = end
+        self.strict = bar_convention == "start"
+        self.prev = None
+        self.next = None
+
+    def _is_available(self, bar: Bar, cur_datetime: datetime) -> bool:
+        if self.strict:
+            return bar.datetime < cur_datetime
+        return bar.datetime <= cur_datetime
+
+    def get(self, cur_datetime: datetime) -> Bar:
+        if cur_datetime > self.end or (
+                self.strict and cur_datetime == self.end):
+            return self.prev
+        if self.next is None:
+            self.next = next(self.data)
+        try:
+            while self._is_available(self.next, cur_datetime):
+                self.prev = self.next
+                self.next = next(self.data)
+        except StopIteration:
+            pass
+        return self.prev
+
+
+def get_bars(interval: str, periods: int, cur_datetime: datetime):
+    """(datetime, close) of the bars up to the datetime, in the data loaded
+    over the whole time range"""
+    data = _get_data(
+        security=GC,
+        start=START - timedelta(days=3),
+        end=END + timedelta(days=1),
+        dtype="kline",
+        interval=interval,
+        trading_sessions=TRADING_SESSIONS["FUT.GC"])
+    data = data[data["time_key"] <= cur_datetime].iloc[-periods:]
+    return list(zip(data["time_key"].dt.to_pydatetime(), data["close"]))
+
+
+@pytest.fixture(scope="module")
+def gateway():
+    return make_gateway()
+
+
+class TestHistoricalBars:
+
+    def test_bars_of_backtest_interval(self, gateway):
+        cur_datetime = datetime(2021, 3, 16, 10, 3, 0)
+        bars = gateway.req_historical_bars(GC, 5, "1min", cur_datetime)
+        assert [(b.datetime, b.close) for b in bars] == get_bars(
+            "1min", 5, cur_datetime)
+        # taken from the data series, nothing else is loaded
+        assert (GC, "1min") not in gateway.history_cache
+
+    def test_bars_before_start(self, gateway):
+        # the lookback goes beyond the data series of the backtest
+        cur_datetime = START + timedelta(minutes=3)
+        bars = gateway.req_historical_bars(GC, 30, "1min", cur_datetime)
+        assert [(b.datetime, b.close) for b in bars] == get_bars(
+            "1min", 30, cur_datetime)
+
+    def test_history_loaded_once(self, monkeypatch):
+        gateway = make_gateway()
+        num_loads = []
+
+        def count_loads(*args, **kwargs):
+            num_loads.append(kwargs["start"])
+            return _get_data(*args, **kwargs)
+
+        monkeypatch.setattr(backtest_gateway, "_get_data", count_loads)
+        cur_datetime = datetime(2021, 3, 15, 20, 0, 0)
+        while cur_datetime <= END:
+            bars = gateway.req_historical_bars(GC, 10, "5min", cur_datetime)
+            assert len(bars) == 10
+            cur_datetime += timedelta(minutes=30)
+        # the bars are sliced from the window loaded at the first request
+        assert len(num_loads) == 1
+
+    def test_history_window_moves_forward(self):
+        gateway = make_gateway(stream_data=True)
+        lookback = timedelta(minutes=5 * 10 * 24)
+        interval = timedelta(minutes=5)
+        for cur_datetime in (
+            datetime(2021, 3, 15, 20, 0, 0),
+            datetime(2021, 3, 15, 23, 30, 0),
+            datetime(2021, 3, 17, 12, 0, 0),
+        ):
+            bars = gateway.req_historical_bars(GC, 10, "5min", cur_datetime)
+            assert [(b.datetime, b.close) for b in bars] == get_bars(
+                "5min", 10, cur_datetime)
+            # in streaming mode, only the lookback and one day ahead are held
+            history = gateway.history_cache[(GC, "5min")]
+            assert history["lookback"] == lookback
+            assert history["time_key"][0] >= (
+                history["datetime"] - lookback - interval)
+            assert history["time_key"][-1] <= (
+                history["datetime"] + timedelta(days=1))
+        # the window has been reloaded at the last request
+        assert history["datetime"] == datetime(2021, 3, 17, 12, 0, 0)
+
+    def test_not_enough_history(self, gateway):
+        cur_datetime = datetime(2021, 3, 16, 10, 0, 0)
+        with pytest.raises(ValueError):
+            gateway.req_historical_bars(GC, 100000, "1min", cur_datetime)
+        history = gateway.history_cache[(GC, "1min")]
+        # the lookback is extended until all the data are loaded
+        assert history["exhausted"]
+        assert history["time_key"][0] == get_bars(
+            "1min", 100000, cur_datetime)[0][0]
+
+    def test_stream_data(self):
+        gateway = make_gateway(stream_data=True)
+        cur_datetime = datetime(2021, 3, 16, 10, 3, 0)
+        bars = gateway.req_historical_bars(GC, 5, "1min", cur_datetime)
+        assert [(b.datetime, b.close) for b in bars] == get_bars(
+            "1min", 5, cur_datetime)
+
+
+
+def write_rolling_futures(data_path):
+    """1-minute bars of a futures contract rolled from ROLLA (closing at 100)
+    to ROLLB (closing at 110) at 2021-03-16 12:00"""
+    data_path.mkdir(parents=True)
+    for day in (15, 16, 17):
+        with open(data_path.joinpath(f"2021-03-{day}.csv"), "w") as f:
+            f.write("time_key,open,high,low,close,volume,ticker\n")
+            for minute in range(8 * 60, 18 * 60):
+                bar_datetime = datetime(2021, 3, day) + timedelta(
+                    minutes=minute)
+                if bar_datetime < ROLL_DATETIME:
+                    price, ticker = 100., "ROLLA"
+                else:
+                    price, ticker = 110., "ROLLB"
+                f.write(f"{bar_datetime},{price},{price},{price},{price},1,"
+                        f"{ticker}\n")
+
+
+ROLL = Futures(code="FUT.ROLL", lot_size=1, security_name="ROLL",
+               exchange=Exchange.SMART)
+ROLL_DATETIME = datetime(2021, 3, 16, 12, 0, 0)
+
+
+class TestHistoricalBarsAdjustment:
+
+    @pytest.fixture
+    def gateway(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(data, "DATA_CACHE_PATH", None)
+        monkeypatch.setattr(data, "_manifests", {})
+        monkeypatch.setitem(data.DATA_PATH, "kline", str(tmp_path))
+        write_rolling_futures(tmp_path.joinpath("K_1M", ROLL.code))
+        return BacktestGateway(
+            securities=[ROLL],
+            gateway_name="Backtest",
+            start=datetime(2021, 3, 15, 9, 0, 0),
+            end=datetime(2021, 3, 17, 17, 0, 0),
+            trading_sessions={"FUT.ROLL": TRADING_SESSIONS["FUT.GC"]},
+            adjust_method=AdjustMethod.RATIO)
+
+    @pytest.mark.parametrize("interval", ["1min", "5min"])
+    def test_no_look_ahead(self, gateway, interval):
+        # the roll ahead is not known yet: prices are not adjusted
+        bars = gateway.req_historical_bars(
+            ROLL, 5, interval, ROLL_DATETIME - timedelta(minutes=30))
+        assert [b.close for b in bars] == pytest.approx([100.] * 5)
+        # once the roll has happened, prices before it are adjusted
+        bars = gateway.req_historical_bars(
+            ROLL, 5, interval, ROLL_DATETIME + timedelta(minutes=2))
+        assert bars[0].datetime < ROLL_DATETIME
+        assert [b.close for b in bars] == pytest.approx([110.] * 5)
+
+
+class TestRecentData:
+
+    @pytest.mark.parametrize("bar_convention", ["start", "end"])
+    @pytest.mark.parametrize("end", [
+        # within a session, at the close of a session, after the data
+        END,
+        datetime(2021, 3, 16, 5, 0, 0),
+        datetime(2021, 3, 18, 2, 0, 0),
+    ])
+    def test_same_as_iterator(self, monkeypatch, bar_convention, end):
+        monkeypatch.setitem(
+            backtest_gateway.BAR_CONVENTION, "FUT.GC", bar_convention)
+        gateway = make_gateway(end=end)
+        data = _get_data(
+            security=GC,
+            start=START,
+            end=end,
+            dtype="kline",
+            interval="1min",
+            trading_sessions=TRADING_SESSIONS["FUT.GC"])
+        iterator = DataIterator(data, end, bar_convention)
+        cur_datetime = START
+        num_lookups = 0
+        # step over the sessions as the event engine, and beyond the end
+        while cur_datetime <= end + timedelta(minutes=3):
+            bar = gateway.get_recent_data(GC, cur_datetime)
+            expected = iterator.get(cur_datetime)
+            assert (bar and (bar.datetime, bar.close)) == (
+                expected and (expected.datetime, expected.close)), (
+                cur_datetime)
+            num_lookups += 1
+            if cur_datetime >= end or gateway.is_trading_time(cur_datetime):
+                cur_datetime += timedelta(minutes=1)
+            else:
+                cur_datetime = gateway.next_trading_datetime(
+                    cur_datetime, GC)
+        assert num_lookups > 60
+
+    def test_not_updated_at_the_end(self, monkeypatch):
+        monkeypatch.setitem(backtest_gateway.BAR_CONVENTION, "FUT.GC", "start")
+        gateway = make_gateway()
+        last_minute = END - timedelta(minutes=1)
+        bar = gateway.get_recent_data(GC, last_minute)
+        assert bar.datetime == END - timedelta(minutes=2)
+        assert gateway.get_recent_data(GC, END) is bar
+        gateway.reset()
+        # no lookup before the end
+        assert gateway.get_recent_data(GC, END) is None
+
+
+
+class TestParallelLoading:
+
+    def test_same_as_serial(self, tmp_path, monkeypatch):
+        cache_path = str(tmp_path / "cache")
+        monkeypatch.setattr(data, "DATA_CACHE_PATH", cache_path)
+        monkeypatch.setattr(backtest_gateway, "DATA_CACHE_PATH", cache_path)
+        num_parsed = []
+        read_data_file = data._read_data_file
+
+        def count_parsed(data_file):
+            num_parsed.append(data_file)
+            return read_data_file(data_file)
+
+        monkeypatch.setattr(data, "_read_data_file", count_parsed)
+        parallel = make_gateway(securities=[GC, SI], load_workers=2)
+        # the csv files have been parsed by the workers, and only read from
+        # the cache afterwards
+        assert num_parsed == []
+        monkeypatch.setattr(data, "DATA_CACHE_PATH", None)
+        monkeypatch.setattr(backtest_gateway, "DATA_CACHE_PATH", None)
+        serial = make_gateway(securities=[GC, SI], load_workers=1)
+        for security in (GC, SI):
+            parallel_series = parallel.data_series[security]["kline"]
+            serial_series = serial.data_series[security]["kline"]
+            assert len(serial_series) > 0
+            assert parallel_series.datetimes == serial_series.datetimes
+            assert parallel_series.columns == serial_series.columns
+        assert parallel.trading_days == serial.trading_days
+
+
+def get_bar_updates(gateway: BacktestGateway):
+    """(datetime, bar datetimes) at each time step when the bars are updated,
+    stepping over the clock as the event engine"""
+    updates = []
+    prev_data = None
+    cur_datetime = gateway.start
+    while cur_datetime <= gateway.end:
+        if not gateway.is_trading_time(cur_datetime):
+            cur_datetime = min(
+                gateway.next_trading_datetime(cur_datetime, security)
+                for security in gateway.securities)
+            continue
+        cur_data = {}
+        for security in gateway.securities:
+            bar = gateway.get_recent_data(security, cur_datetime)
+            if bar is not None:
+                cur_data[security.code] = bar.datetime
+        if cur_data and cur_data != prev_data:
+            updates.append((cur_datetime, cur_data))
+        prev_data = cur_data
+        cur_datetime += timedelta(minutes=1)
+    return updates
+
+
+class TestSparseClock:
+
+    def test_same_bars_as_dense_clock(self):
+        # a break within the day, and the daily break (05:00 - 06:00)
+        trading_sessions = [
+            [datetime(1970, 1, 1, 6, 0, 0), datetime(1970, 1, 1, 12, 0, 0)],
+            [datetime(1970, 1, 1, 13, 30, 0), datetime(1970, 1, 1, 5, 0, 0)]]
+        updates = []
+        for sparse_clock in (False, True):
+            gateway = BacktestGateway(
+                securities=[GC, SI],
+                gateway_name="Backtest",
+                start=START,
+                end=END,
+                trading_sessions={"FUT.GC": trading_sessions,
+                                  "FUT.SI": trading_sessions},
+                sparse_clock=sparse_clock)
+            updates.append(get_bar_updates(gateway))
+        dense, sparse = updates
+        assert sparse == dense
+        # the clock has gone over the session breaks
+        datetimes = [cur_datetime for cur_datetime, _ in dense]
+        assert datetime(2021, 3, 16, 13, 30, 0) in datetimes
+        assert not any(
+            Time(12, 0) < t.time() < Time(13, 30) for t in datetimes)
+        assert not any(Time(5, 0) < t.time() < Time(6, 0) for t in datetimes)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# @Time    : 20/10/2026 3:05 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: bar_panel_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from qtrader.core.bar_panel import BarPanel
+from qtrader.core.constants import Exchange
+from qtrader.core.data import Bar
+from qtrader.core.security import Futures
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX, expiry_date="20220828")
+SI = Futures(code="FUT.SI", lot_size=5000, security_name="SIN2",
+             exchange=Exchange.NYMEX, expiry_date="20220727")
+
+
+def make_bar(i: int, close: float = None) -> Bar:
+    close = float(i) if close is None else close
+    return Bar(
+        datetime=datetime(2021, 3, 15, 15, 0, 0) + timedelta(minutes=i),
+        security=GC, open=close, high=close + 1, low=close - 1,
+        close=close, volume=10)
+
+
+class TestBarPanel:
+
+    def test_window_is_a_view_of_latest_bars(self):
+        panel = BarPanel([GC, SI], lookback=3)
+        assert panel.window(GC, "close").shape == (0,)
+        for i in range(7):
+            panel.update(GC, make_bar(i))
+        closes = panel.window(GC, "close")
+        assert closes.tolist() == [4., 5., 6.]
+        assert np.shares_memory(closes, panel.values)
+        assert panel.window(GC, size=2).shape == (2, len(panel.fields))
+        assert panel.window_datetimes(GC)[-1] == np.datetime64(
+            "2021-03-15T15:06:00")
+        assert panel.window(SI, "close").shape == (0,)
+
+    def test_missing_bars_are_skipped(self):
+        panel = BarPanel([GC], lookback=5)
+        panel.update(GC, make_bar(0))
+        panel.update(GC, Bar(datetime=datetime(2021, 3, 15, 15, 1, 0),
+                             security=GC, open=None, high=None, low=None,
+                             close=None, volume=None))
+        panel.update(GC, make_bar(2))
+        assert panel.window(GC, "close").tolist() == [0., 2.]
+
+    def test_latest(self):
+        panel = BarPanel([GC, SI], lookback=2)
+        for i in range(3):
+            panel.update(GC, make_bar(i))
+        latest = panel.latest("close")
+        assert latest[0] == 2.
+        assert np.isnan(latest[1])
+
+    def test_lookback_must_be_positive(self):
+        with pytest.raises(ValueError):
+            BarPanel([GC], lookback=0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
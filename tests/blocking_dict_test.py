@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# @Time    : 23/10/2026 11:10 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: blocking_dict_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import threading
+import time
+
+import pytest
+
+from qtrader.core.utility import BlockingDict
+
+
+def get_in_thread(blocking_dict: BlockingDict, key, timeout: float):
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(
+            blocking_dict.get(key, timeout=timeout, default_item="missing")))
+    thread.start()
+    return thread, results
+
+
+def wait_for_waiters(blocking_dict: BlockingDict, key, num_waiters: int):
+    deadline = time.time() + 5
+    while blocking_dict.key_waiters.get(key, 0) < num_waiters:
+        assert time.time() < deadline
+        time.sleep(0.001)
+
+
+class TestBlockingDict:
+
+    def test_get_put(self):
+        blocking_dict = BlockingDict()
+        thread, results = get_in_thread(blocking_dict, "a", timeout=5)
+        wait_for_waiters(blocking_dict, "a", 1)
+        blocking_dict.put("a", 1)
+        thread.join()
+        assert results == [1]
+        assert blocking_dict.key_events == {}
+        assert blocking_dict.key_waiters == {}
+
+    def test_timeout_does_not_leak_events(self):
+        blocking_dict = BlockingDict()
+        for key in range(10):
+            assert blocking_dict.get(key, timeout=0.001) is None
+        assert blocking_dict.get("a", timeout=0) is None
+        assert blocking_dict.key_events == {}
+        assert blocking_dict.key_waiters == {}
+
+    def test_event_kept_for_other_waiters(self):
+        blocking_dict = BlockingDict()
+        waiting, waiting_results = get_in_thread(blocking_dict, "a", 5)
+        wait_for_waiters(blocking_dict, "a", 1)
+        event = blocking_dict.key_events["a"]
+        # a waiter times out while another one is still waiting
+        assert blocking_dict.get("a", timeout=0.01) is None
+        assert blocking_dict.key_events["a"] is event
+        assert blocking_dict.key_waiters["a"] == 1
+        blocking_dict.put("a", 1)
+        waiting.join()
+        assert waiting_results == [1]
+        assert blocking_dict.key_events == {}
+        assert blocking_dict.key_waiters == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
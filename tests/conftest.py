@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# @Time    : 22/10/2026 2:30 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: conftest.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import sys
+import types
+from datetime import datetime, timedelta
+
+import pytest
+
+from qtrader.core.constants import Direction, Exchange, Offset, OrderType
+from qtrader.core.order import Order
+from qtrader.core.security import Futures
+
+
+class StubEngine:
+    """Engine with the gateways only (orders are sent to the gateway by the
+    strategy)"""
+
+    def __init__(self, gateways):
+        self.gateways = gateways
+
+
+class StubRecorder:
+    """Same fields and methods as BarEventEngineRecorder"""
+
+    def __init__(self, **kwargs):
+        self.recorded_methods = {
+            "datetime": "append",
+            "portfolio_value": "append",
+            "strategy_portfolio_value": "append",
+            "action": "append"
+        }
+        for field in self.recorded_methods:
+            setattr(self, field, [])
+        for k, v in kwargs.items():
+            self.recorded_methods[k] = "append" if v == [] else "override"
+            setattr(self, k, v)
+
+    def get_recorded_fields(self):
+        return list(self.recorded_methods.keys())
+
+    def write_record(self, field, value):
+        if self.recorded_methods[field] == "append":
+            getattr(self, field).append(value)
+        else:
+            setattr(self, field, value)
+
+
+class StubBarEventEngine:
+    """Backtest loop of BarEventEngine: jump over the non-trading time, feed
+    the bars to the strategies when they are updated, and record the
+    fields of each gateway"""
+
+    def __init__(self, strategies, recorders, engine, start, end):
+        self.strategies = strategies
+        self.recorders = recorders
+        self.engine = engine
+        self.start = start
+        self.end = end
+
+    def run(self):
+        gateways = self.engine.gateways
+        cur_datetime = self.start
+        prev_data = {}
+        while cur_datetime <= self.end:
+            if not any(gw.is_trading_time(cur_datetime)
+                       for gw in gateways.values()):
+                cur_datetime = min(
+                    gw.next_trading_datetime(cur_datetime, security)
+                    for gw in gateways.values()
+                    for security in gw.securities)
+                continue
+            cur_data = {}
+            for gateway_name, gateway in gateways.items():
+                for security in gateway.securities:
+                    data = gateway.get_recent_data(security, cur_datetime)
+                    if data and gateway.is_trading_time(data.datetime):
+                        cur_data.setdefault(gateway_name, {})[security] = data
+            if cur_data and cur_data != prev_data:
+                for name, strategy in self.strategies.items():
+                    for gateway_name in strategy.securities:
+                        strategy.reset_action(gateway_name)
+                        for security, data in cur_data[gateway_name].items():
+                            strategy.update_bar(gateway_name, security, data)
+                    strategy.on_bar(cur_data)
+                    recorder = self.recorders[name]
+                    for field in recorder.get_recorded_fields():
+                        if field == "strategy_portfolio_value":
+                            value = [strategy.strategy_portfolio_value]
+                        else:
+                            value = [
+                                getattr(strategy, f"get_{field}")(gw)
+                                for gw in strategy.securities]
+                        if field == "datetime":
+                            value = [v.strftime("%Y-%m-%d %H:%M:%S")
+                                     for v in value]
+                        recorder.write_record(field, value)
+            prev_data = cur_data
+            cur_datetime += timedelta(minutes=1)
+
+
+try:
+    from qtrader.core import engine, event_engine  # noqa: F401
+except ImportError:
+    # The compiled engine is not available for this platform; the strategy
+    # and the sweep only need the names to be importable
+    for module_name, attrs in (
+        ("qtrader.core.engine", {"Engine": StubEngine}),
+        ("qtrader.core.event_engine", {
+            "BarEventEngine": StubBarEventEngine,
+            "BarEventEngineRecorder": StubRecorder})
+    ):
+        module = types.ModuleType(module_name)
+        module.__dict__.update(attrs)
+        sys.modules[module_name] = module
+
+from qtrader.core import parameter_sweep  # noqa: E402
+from qtrader.core.parameter_sweep import ParameterSweep  # noqa: E402
+from qtrader.core.strategy import BaseStrategy  # noqa: E402
+from qtrader.core.strategy import init_portfolio_and_params  # noqa: E402
+
+SECURITIES = [
+    Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+            exchange=Exchange.NYMEX)]
+TRADING_SESSIONS = {
+    "FUT.GC": [[datetime(1970, 1, 1, 6, 0, 0), datetime(1970, 1, 1, 5, 0, 0)]]}
+
+
+class FlipStrategy(BaseStrategy):
+    """Go long, then short, every `period` bars (closing the previous
+    position first). The actions are numbered by trade, as PerformanceCTA
+    matches the close of a trade with its open"""
+
+    @init_portfolio_and_params
+    def init_strategy(self):
+        self.num_bars = 0
+        self.num_trades = 0
+        self.side = None
+
+    def on_bar(self, cur_data):
+        for gateway_name, data in cur_data.items():
+            gateway = self.engine.gateways[gateway_name]
+            portfolio = self.portfolios[gateway_name]
+            for security in data:
+                params = self.params[gateway_name][security.code]
+                self.num_bars += 1
+                if self.num_bars % params["period"]:
+                    continue
+                side = (Direction.SHORT if self.side == Direction.LONG
+                        else Direction.LONG)
+                orders = [(params["qty"], side, Offset.OPEN)]
+                if self.side is not None:
+                    orders.insert(0, (params["qty"], side, Offset.CLOSE))
+                for qty, direction, offset in orders:
+                    if offset == Offset.OPEN:
+                        self.num_trades += 1
+                    order = Order(
+                        security=security,
+                        price=0,
+                        quantity=qty,
+                        direction=direction,
+                        offset=offset,
+                        order_type=OrderType.MARKET,
+                        create_time=gateway.market_datetime)
+                    orderid = gateway.place_order(order)
+                    for deal in gateway.find_deals_with_orderid(orderid):
+                        portfolio.update(deal)
+                    self.update_action(gateway_name, {
+                        "sec": security.code, "side": direction.name,
+                        "offset": offset.name, "qty": qty,
+                        "close": data[security].close, "no": self.num_trades})
+                self.side = side
+
+
+@pytest.fixture
+def make_sweep(monkeypatch):
+    """ParameterSweep of FlipStrategy on FUT.GC, run with the stub engine"""
+    monkeypatch.setattr(parameter_sweep, "Engine", StubEngine)
+    monkeypatch.setattr(parameter_sweep, "BarEventEngine", StubBarEventEngine)
+    monkeypatch.setattr(parameter_sweep, "BarEventEngineRecorder", StubRecorder)
+
+    def _make_sweep(start: datetime, end: datetime) -> ParameterSweep:
+        return ParameterSweep(
+            strategy_class=FlipStrategy,
+            securities=SECURITIES,
+            start=start,
+            end=end,
+            init_capital=100000,
+            gateway_kwargs={"trading_sessions": TRADING_SESSIONS},
+            recorded_fields=["close"])
+    return _make_sweep
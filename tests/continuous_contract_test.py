@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Time    : 18/10/2026 11:05 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: continuous_contract_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtrader.core import continuous_contract
+from qtrader.core.constants import AdjustMethod, Exchange
+from qtrader.core.continuous_contract import ContinuousContractCache
+from qtrader.core.continuous_contract import build_continuous_contract
+from qtrader.core.continuous_contract import get_cached_roll_schedule
+from qtrader.core.continuous_contract import get_roll_schedule
+from qtrader.core.security import Futures
+
+
+def make_data():
+    return pd.DataFrame({
+        "time_key": pd.date_range("2021-03-15 09:00:00", periods=7, freq="1min"),
+        "open": [10., 11., 20., 21., 22., 44., 88.],
+        "high": [10., 11., 20., 21., 22., 44., 88.],
+        "low": [10., 11., 20., 21., 22., 44., 88.],
+        "close": [10., 11., 22., 21., 22., 44., 88.],
+        "volume": [1, 1, 1, 1, 1, 1, 1],
+        "ticker": ["A", "A", "B", "B", "B", "C", "D"],
+    })
+
+
+class TestContinuousContract:
+
+    def test_roll_schedule(self):
+        roll_schedule = get_roll_schedule(make_data())
+        assert roll_schedule["from_ticker"].tolist() == ["A", "B", "C"]
+        assert roll_schedule["to_ticker"].tolist() == ["B", "C", "D"]
+        assert roll_schedule["ratio"].tolist() == [2.0, 2.0, 2.0]
+        assert roll_schedule["difference"].tolist() == [11.0, 22.0, 44.0]
+
+    def test_ratio_adjustment(self):
+        security = Futures(code="FUT.TEST", security_name="TEST",
+                           exchange=Exchange.SMART)
+        data = build_continuous_contract(
+            security, make_data(), method=AdjustMethod.RATIO)
+        np.testing.assert_allclose(
+            data["close"], [80., 88., 88., 84., 88., 88., 88.])
+        roll_schedule = get_cached_roll_schedule(
+            security, method=AdjustMethod.RATIO)
+        assert roll_schedule.shape[0] == 3
+
+    def test_difference_adjustment(self):
+        security = Futures(code="FUT.TEST", security_name="TEST",
+                           exchange=Exchange.SMART)
+        data = build_continuous_contract(
+            security, make_data(), method=AdjustMethod.DIFFERENCE)
+        np.testing.assert_allclose(
+            data["close"], [87., 88., 88., 87., 88., 88., 88.])
+
+    def test_no_adjustment(self):
+        security = Futures(code="FUT.TEST", security_name="TEST",
+                           exchange=Exchange.SMART)
+        data = build_continuous_contract(
+            security, make_data(), method=AdjustMethod.NONE)
+        assert data["close"].tolist() == make_data()["close"].tolist()
+
+
+class TestContinuousContractCache:
+
+    def test_disabled_by_default(self):
+        security = Futures(code="FUT.TEST", security_name="TEST",
+                           exchange=Exchange.SMART)
+        build_continuous_contract(security, make_data(), cache_key="key")
+        assert len(continuous_contract._cache.entries) == 0
+
+    def test_cached_data_are_copies(self, monkeypatch):
+        monkeypatch.setattr(
+            continuous_contract, "_cache", ContinuousContractCache(2))
+        security = Futures(code="FUT.TEST", security_name="TEST",
+                           exchange=Exchange.SMART)
+        data = build_continuous_contract(security, make_data(), cache_key=1)
+        data["close"] = 0.
+        cached = build_continuous_contract(security, make_data(), cache_key=1)
+        np.testing.assert_allclose(
+            cached["close"], [80., 88., 88., 84., 88., 88., 88.])
+        assert cached is not data
+
+    def test_lru_eviction(self, monkeypatch):
+        cache = ContinuousContractCache(2)
+        monkeypatch.setattr(continuous_contract, "_cache", cache)
+        security = Futures(code="FUT.TEST", security_name="TEST",
+                           exchange=Exchange.SMART)
+        for cache_key in (1, 2, 1, 3):
+            build_continuous_contract(
+                security, make_data(), cache_key=cache_key)
+        # 2 is the least recently used
+        assert [key[2] for key in cache.entries] == [1, 3]
+        # data loaded without a key are not cached
+        build_continuous_contract(security, make_data())
+        assert len(cache.entries) == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
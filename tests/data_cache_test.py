@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+# @Time    : 25/10/2026 9:40 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: data_cache_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import os
+
+import pytest
+
+from qtrader.core import data
+
+HEADER = "time_key,open,high,low,close,volume\n"
+
+
+def write_csv(path, closes):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for i, close in enumerate(closes):
+            f.write(f"2021-03-15 15:{i:02d}:00,1,1,1,{close},1\n")
+
+
+@pytest.fixture
+def csv_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(data, "DATA_CACHE_PATH", str(tmp_path / "cache"))
+    monkeypatch.setattr(data, "DATA_CACHE_FORMAT", "parquet")
+    monkeypatch.setattr(data, "_manifests", {})
+    data_path = tmp_path / "K_1M" / "FUT.TEST"
+    data_path.mkdir(parents=True)
+    csv_file = data_path / "2021-03-15.csv"
+    write_csv(csv_file, [1., 2.])
+    return str(csv_file)
+
+
+@pytest.fixture
+def num_parsed(monkeypatch):
+    num_parsed = []
+    read_data_file = data._read_data_file
+
+    def count_parsed(data_file):
+        num_parsed.append(data_file)
+        return read_data_file(data_file)
+
+    monkeypatch.setattr(data, "_read_data_file", count_parsed)
+    return num_parsed
+
+
+def get_cache_files(csv_file):
+    stat = os.stat(csv_file)
+    return list(data._get_cache_file(csv_file, stat).parent.iterdir())
+
+
+class TestDataCache:
+
+    def test_parsed_once(self, csv_file, num_parsed):
+        first = data._load_data_file(csv_file)
+        second = data._load_data_file(csv_file)
+        # the second load is a cache hit
+        assert len(num_parsed) == 1
+        assert second["close"].tolist() == first["close"].tolist() == [1., 2.]
+        assert len(get_cache_files(csv_file)) == 1
+
+    def test_source_modified(self, csv_file, num_parsed):
+        data._load_data_file(csv_file)
+        stale_cache_file = get_cache_files(csv_file)[0]
+        write_csv(csv_file, [3., 4., 5.])
+        df = data._load_data_file(csv_file)
+        # the modified csv is parsed again, instead of hitting the old cache
+        assert len(num_parsed) == 2
+        assert df["close"].tolist() == [3., 4., 5.]
+        # and the cache of the old csv is replaced
+        cache_files = get_cache_files(csv_file)
+        assert len(cache_files) == 1
+        assert cache_files[0] != stale_cache_file
+        df = data._load_data_file(csv_file)
+        assert len(num_parsed) == 2
+        assert df["close"].tolist() == [3., 4., 5.]
+
+    def test_corrupted_cache(self, csv_file, num_parsed):
+        data._load_data_file(csv_file)
+        cache_file = get_cache_files(csv_file)[0]
+        cache_file.write_bytes(b"not a parquet file")
+        df = data._load_data_file(csv_file)
+        assert len(num_parsed) == 2
+        assert df["close"].tolist() == [1., 2.]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# @Time    : 25/10/2026 10:05 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: data_iterator_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from qtrader.core.constants import Exchange
+from qtrader.core.data import Bar
+from qtrader.core.data import DataSeries
+from qtrader.core.data import DataStream
+from qtrader.core.data import _get_data_iterator
+from qtrader.core.security import Futures
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX)
+START = datetime(2021, 3, 15, 15, 0, 0)
+
+
+def make_bars(num_bars: int, **columns) -> pd.DataFrame:
+    data = pd.DataFrame({
+        "time_key": pd.date_range(START, periods=num_bars, freq="min"),
+        "open": [1000. + i for i in range(num_bars)],
+        "high": [1001. + i for i in range(num_bars)],
+        "low": [999. + i for i in range(num_bars)],
+        "close": [1000.5 + i for i in range(num_bars)],
+        "volume": [10 * i for i in range(num_bars)],
+    })
+    for col, values in columns.items():
+        data[col] = values
+    return data
+
+
+def expected_bars(data: pd.DataFrame):
+    """Bars built row by row"""
+    return [
+        Bar(datetime=row["time_key"].to_pydatetime(), security=GC,
+            **{col: row[col] for col in data.columns if col != "time_key"})
+        for _, row in data.iterrows()]
+
+
+class TestDataIterator:
+
+    def test_bars(self):
+        data = make_bars(5)
+        bars = list(_get_data_iterator(GC, data, "Bar"))
+        assert bars == expected_bars(data)
+        assert all(type(bar.datetime) is datetime for bar in bars)
+
+    def test_fields_out_of_order(self):
+        # `ticker` is not the next field of Bar after `volume`, so the bars
+        # are built with keyword arguments
+        data = make_bars(5, ticker=["GCJ1"] * 3 + ["GCM1"] * 2)
+        bars = list(_get_data_iterator(GC, data, "Bar"))
+        assert bars == expected_bars(data)
+        assert [bar.ticker for bar in bars] == list(data["ticker"])
+        assert all(bar.num_trds == 0 for bar in bars)
+
+    def test_empty(self):
+        assert list(_get_data_iterator(GC, make_bars(0), "Bar")) == []
+
+    def test_time_column_first(self):
+        data = make_bars(2)[["open", "time_key"]]
+        with pytest.raises(AssertionError):
+            list(_get_data_iterator(GC, data, "Bar"))
+
+
+class TestDataStream:
+
+    @pytest.mark.parametrize("strict", [False, True])
+    def test_same_as_series(self, strict):
+        data = make_bars(30)
+        series = DataSeries(GC, data, "Bar")
+        stream = DataStream(
+            GC,
+            lambda: (data.iloc[i:i + 7] for i in range(0, len(data), 7)),
+            "Bar")
+        datetimes = [START + timedelta(seconds=30 * i) for i in range(-2, 64)]
+        for cur_datetime in datetimes:
+            assert stream.get(cur_datetime, strict) == series.get(
+                cur_datetime, strict)
+            assert stream.get_next(cur_datetime, strict) == series.get_next(
+                cur_datetime, strict)
+        # looking up an earlier datetime restarts the stream
+        cur_datetime = START + timedelta(minutes=3)
+        assert stream.get(cur_datetime, strict) == series.get(
+            cur_datetime, strict)
+
+    def test_bars_same_as_iterator(self):
+        data = make_bars(12, ticker=["GCJ1"] * 12)
+        series = DataSeries(GC, data, "Bar")
+        assert [series[i] for i in range(len(series))] == list(
+            _get_data_iterator(GC, data, "Bar"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+# @Time    : 23/10/2026 4:20 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: data_manifest_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import os
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from qtrader.core import data
+from qtrader.core.constants import Exchange
+from qtrader.core.data import DataManifest
+from qtrader.core.security import Futures
+
+HEADER = "time_key,open,high,low,close,volume\n"
+
+
+def write_csv(path, num_rows: int):
+    with open(path, "w") as f:
+        f.write(HEADER)
+        for i in range(num_rows):
+            f.write(f"2021-03-15 15:{i:02d}:00,1,1,1,1,1\n")
+
+
+@pytest.fixture
+def manifest(tmp_path, monkeypatch):
+    # not persisted
+    monkeypatch.setattr(data, "DATA_CACHE_PATH", None)
+    for day in (15, 16):
+        write_csv(tmp_path.joinpath(f"2021-03-{day}.csv"), 2)
+    manifest = DataManifest(str(tmp_path))
+    manifest.refresh()
+    return manifest
+
+
+def load(manifest: DataManifest, file_name: str):
+    path = f"{manifest.data_path}/{file_name}"
+    manifest.update_stats(file_name, os.stat(path), pd.read_csv(path))
+
+
+class TestDataManifest:
+
+    def test_files_in_range(self, manifest):
+        assert manifest.get_files(date(2021, 3, 16)) == ["2021-03-16.csv"]
+        assert manifest.get_files() == ["2021-03-15.csv", "2021-03-16.csv"]
+
+    def test_file_added(self, manifest, tmp_path):
+        write_csv(tmp_path.joinpath("2021-03-17.csv"), 2)
+        manifest.refresh()
+        assert manifest.get_files(date(2021, 3, 16)) == [
+            "2021-03-16.csv", "2021-03-17.csv"]
+
+    def test_file_modified_in_place(self, manifest, tmp_path):
+        load(manifest, "2021-03-15.csv")
+        assert manifest.entries["2021-03-15.csv"]["rows"] == 2
+        dir_mtime_ns = os.stat(tmp_path).st_mtime_ns
+        write_csv(tmp_path.joinpath("2021-03-15.csv"), 5)
+        # the folder is unchanged, but the stats of the file are renewed
+        assert os.stat(tmp_path).st_mtime_ns == dir_mtime_ns
+        manifest.refresh()
+        entry = manifest.entries["2021-03-15.csv"]
+        assert entry["rows"] is None
+        assert entry["size"] == os.stat(
+            tmp_path.joinpath("2021-03-15.csv")).st_size
+        load(manifest, "2021-03-15.csv")
+        assert manifest.entries["2021-03-15.csv"]["rows"] == 5
+
+    def test_unchanged(self, manifest):
+        load(manifest, "2021-03-15.csv")
+        manifest.dirty = False
+        manifest.refresh()
+        assert not manifest.dirty
+        assert manifest.entries["2021-03-15.csv"]["rows"] == 2
+
+    def test_folder_scanned_once_per_load(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(data, "DATA_CACHE_PATH", None)
+        monkeypatch.setitem(data.DATA_PATH, "kline", str(tmp_path))
+        monkeypatch.setattr(data, "_manifests", {})
+        security = Futures(code="FUT.TEST", lot_size=1, security_name="TEST",
+                           exchange=Exchange.SMART)
+        data_path = tmp_path.joinpath("K_1M", security.code)
+        data_path.mkdir(parents=True)
+        start = datetime(2021, 3, 1)
+        num_files = 50
+        for i in range(num_files):
+            write_csv(data_path.joinpath(
+                f"{start + timedelta(days=i):%Y-%m-%d}.csv"), 2)
+        stat = os.stat
+        num_stats = []
+
+        def count_stat(*args, **kwargs):
+            num_stats.append(args[0])
+            return stat(*args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", count_stat)
+        df = data._get_data(security, start, start + timedelta(days=num_files),
+                            "kline", interval="1min")
+        monkeypatch.setattr(os, "stat", stat)
+        assert df.shape[0] == 2 * num_files
+        # each file is looked up when the folder is scanned, and when it is
+        # loaded (not once per file loaded)
+        assert len(num_stats) <= 2 * num_files + 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
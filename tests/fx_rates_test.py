@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# @Time    : 20/10/2026 10:50 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: fx_rates_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+
+from types import SimpleNamespace
+
+import pytest
+
+from qtrader.core.constants import Exchange, TradeMode
+from qtrader.core.fx_rates import FXRateMatrix
+from qtrader.core.security import Currency
+from qtrader.gateways.base_gateway import BaseGateway
+from qtrader_config import TIME_STEP
+
+PRICES = {"USDHKD": 7.8, "EURUSD": 1.1, "USDJPY": 150., "AUDNZD": 1.08}
+CURRENCIES = [
+    Currency(code=f"CASH.IDEALPRO.{pair}", security_name=pair,
+             exchange=Exchange.IDEALPRO)
+    for pair in PRICES]
+
+
+class LiveGateway(BaseGateway):
+    """Live gateway stub: the market datetime is the current time, and
+    every bar read is counted (it would be a broker call)"""
+
+    def __init__(self, **kwargs):
+        super().__init__(
+            securities=[],
+            gateway_name="Backtest",
+            trading_sessions={},
+            currency_tickers=CURRENCIES,
+            trade_mode=TradeMode.LIVETRADE,
+            **kwargs)
+        self.num_fetches = 0
+        self.now = datetime(2021, 3, 15, 15, 0, 0, 1000)
+
+    @property
+    def market_datetime(self):
+        # as datetime.now(), the market datetime never repeats
+        self.now += timedelta(microseconds=1)
+        return self.now
+
+    def get_recent_data(self, security, cur_datetime, **kwargs):
+        self.num_fetches += 1
+        return SimpleNamespace(close=PRICES[security.code.split(".")[-1]])
+
+
+class TestFXRateMatrix:
+
+    def setup_method(self):
+        self.calls = []
+
+        def get_price(currency, cur_datetime):
+            self.calls.append(cur_datetime)
+            return PRICES[currency.code.split(".")[-1]]
+
+        self.fx_rates = FXRateMatrix(CURRENCIES, get_price)
+
+    def test_direct_and_inverted_pairs(self):
+        cur_datetime = datetime(2021, 3, 15, 15, 0, 0)
+        assert self.fx_rates.get_rate("USD", "HKD", cur_datetime) == 7.8
+        assert self.fx_rates.get_rate(
+            "HKD", "USD", cur_datetime) == pytest.approx(1 / 7.8)
+        assert self.fx_rates.get_rate("HKD", "HKD", cur_datetime) == 1.0
+
+    def test_triangulation(self):
+        cur_datetime = datetime(2021, 3, 15, 15, 0, 0)
+        assert self.fx_rates.get_rate(
+            "EUR", "HKD", cur_datetime) == pytest.approx(1.1 * 7.8)
+        assert self.fx_rates.get_rate(
+            "HKD", "JPY", cur_datetime) == pytest.approx(150. / 7.8)
+        # no path between the two groups of currencies
+        assert self.fx_rates.get_rate("USD", "NZD", cur_datetime) is None
+        assert self.fx_rates.get_rate("GBP", "USD", cur_datetime) is None
+
+    def test_prices_are_read_once_per_datetime(self):
+        cur_datetime = datetime(2021, 3, 15, 15, 0, 0)
+        for _ in range(10):
+            self.fx_rates.get_rate("EUR", "JPY", cur_datetime)
+        assert len(self.calls) == len(PRICES)
+        self.fx_rates.get_rate("EUR", "JPY", datetime(2021, 3, 15, 15, 1, 0))
+        assert len(self.calls) == 2 * len(PRICES)
+
+    def test_direct_pairs_only_read_their_ticker(self):
+        cur_datetime = datetime(2021, 3, 15, 15, 0, 0)
+        self.fx_rates.get_rate("USD", "HKD", cur_datetime)
+        self.fx_rates.get_rate("HKD", "USD", cur_datetime)
+        assert len(self.calls) == 1
+
+
+class TestLiveExchangeRate:
+
+    def test_rates_are_read_once_per_time_step(self):
+        gateway = LiveGateway()
+        for _ in range(100):
+            assert gateway.get_exchange_rate("USD", "HKD") == 7.8
+        assert gateway.num_fetches == 1
+        for _ in range(100):
+            assert gateway.get_exchange_rate(
+                "EUR", "HKD") == pytest.approx(1.1 * 7.8)
+        assert gateway.num_fetches == len(PRICES)
+        # next time step
+        gateway.now += timedelta(milliseconds=TIME_STEP)
+        assert gateway.get_exchange_rate("HKD", "USD") == pytest.approx(
+            1 / 7.8)
+        assert gateway.num_fetches == len(PRICES) + 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
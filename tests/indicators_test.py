@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# @Time    : 20/10/2026 5:30 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: indicators_test.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtrader.indicators import ATR
+from qtrader.indicators import BollingerBands
+from qtrader.indicators import EMA
+from qtrader.indicators import MACD
+from qtrader.indicators import RSI
+from qtrader.indicators import RollingMax
+from qtrader.indicators import RollingMin
+from qtrader.indicators import RollingStd
+
+SECURITIES = ["FUT.GC", "FUT.SI", "FUT.CL"]
+
+
+def make_prices(num_bars: int = 300) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return 100 + np.cumsum(
+        rng.normal(0, 1, (num_bars, len(SECURITIES))), axis=0)
+
+
+def run_batch(indicator, *values: np.ndarray) -> np.ndarray:
+    return np.array([
+        indicator.update(*(v[t] for v in values)).copy()
+        for t in range(len(values[0]))])
+
+
+class TestIndicators:
+
+    @pytest.mark.parametrize("adjust", [True, False])
+    def test_ema(self, adjust):
+        prices = make_prices()
+        result = run_batch(EMA(SECURITIES, span=12, adjust=adjust), prices)
+        expected = pd.DataFrame(prices).ewm(span=12, adjust=adjust).mean()
+        assert np.allclose(result, expected.values)
+
+    def test_macd(self):
+        prices = make_prices()
+        macd = MACD(SECURITIES)
+        result = run_batch(macd, prices)
+        df = pd.DataFrame(prices)
+        expected = df.ewm(span=12).mean() - df.ewm(span=26).mean()
+        assert np.allclose(result, expected.values)
+        assert np.allclose(
+            macd.signal, expected.ewm(span=9).mean().values[-1])
+
+    def test_rsi(self):
+        prices = make_prices()
+        result = run_batch(RSI(SECURITIES, period=14), prices)
+        change = pd.DataFrame(prices).diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / 14).mean()
+        loss = (-change).clip(lower=0).ewm(alpha=1 / 14).mean()
+        expected = 100 - 100 / (1 + gain / loss)
+        assert np.allclose(result, expected.values, equal_nan=True)
+
+    def test_atr(self):
+        close = make_prices()
+        high, low = close + 1, close - 2
+        atr = ATR(SECURITIES, period=14)
+        run_batch(atr, high, low, close)
+        prev_close = pd.DataFrame(close).shift()
+        true_range = np.fmax(
+            high - low,
+            np.fmax((high - prev_close).abs(), (low - prev_close).abs()))
+        expected = true_range.ewm(alpha=1 / 14, adjust=False).mean()
+        assert np.allclose(atr.value, expected.values[-1])
+
+    def test_rolling_std_and_bollinger_bands(self):
+        prices = make_prices()
+        df = pd.DataFrame(prices)
+        result = run_batch(RollingStd(SECURITIES, window=20), prices)
+        assert np.allclose(
+            result, df.rolling(20).std().values, equal_nan=True)
+        bands = BollingerBands(SECURITIES, window=20, num_std=2)
+        run_batch(bands, prices)
+        expected = df.rolling(20).mean() + 2 * df.rolling(20).std()
+        assert np.allclose(bands.upper, expected.values[-1])
+
+    @pytest.mark.parametrize("indicator,method", [
+        (RollingMin, "min"), (RollingMax, "max")])
+    def test_rolling_min_max(self, indicator, method):
+        prices = make_prices()
+        result = run_batch(indicator(SECURITIES, window=7), prices)
+        expected = getattr(pd.DataFrame(prices).rolling(7), method)()
+        assert np.allclose(result, expected.values, equal_nan=True)
+
+    def test_single_and_batch_updates_agree(self):
+        prices = make_prices()
+        # some securities have no bar at some time steps
+        prices[np.random.default_rng(1).random(prices.shape) < 0.3] = np.nan
+        batch = MACD(SECURITIES)
+        single = MACD(SECURITIES)
+        for row in prices:
+            batch.update(row)
+            for security, price in zip(SECURITIES, row):
+                if not np.isnan(price):
+                    single.update_security(security, price)
+        assert np.allclose(batch.value, single.value)
+        gc = pd.Series(prices[:, 0]).dropna()
+        expected = gc.ewm(span=12).mean() - gc.ewm(span=26).mean()
+        assert batch["FUT.GC"] == pytest.approx(expected.iloc[-1])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
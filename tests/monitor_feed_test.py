@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+# @Time    : 21/10/2026 5:40 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: monitor_feed_test.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import pandas as pd
+import pytest
+
+from qtrader.core.constants import Exchange
+from qtrader.core.recorder import ParquetRecorder
+from qtrader.core.recorder import read_records
+from qtrader.core.security import Futures
+from qtrader.plugins.monitor.feed import MonitorFeedReader
+from qtrader.plugins.monitor.feed import MonitorFeedRecorder
+from qtrader.plugins.monitor.feed import MonitorFeedWriter
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX, expiry_date="20220828")
+
+
+def make_row(i: int):
+    return {
+        "datetime": [f"2021-03-15 15:{i:02d}:00"],
+        "portfolio_value": [1000.0 + i],
+        "strategy_portfolio_value": [1000.0 + i],
+        "action": [""],
+        "close": [[float(i)]]}
+
+
+class TestMonitorFeed:
+
+    def test_reader_only_reads_new_rows(self, tmp_path):
+        path = tmp_path / "feed"
+        writer = MonitorFeedWriter(path)
+        reader = MonitorFeedReader(path)
+        assert reader.read() == 0
+        for i in range(3):
+            writer.append(make_row(i))
+        assert reader.read() == 3
+        offset = reader.offset
+        assert reader.read() == 0 and reader.offset == offset
+        writer.append(make_row(3))
+        assert reader.read() == 1
+        assert reader.data["close"] == [[[0.0]], [[1.0]], [[2.0]], [[3.0]]]
+        writer.close()
+
+    def test_partially_written_row(self, tmp_path):
+        path = tmp_path / "feed"
+        writer = MonitorFeedWriter(path)
+        writer.append(make_row(0))
+        writer.append(make_row(1))
+        writer.close()
+        content = path.read_bytes()
+        path.write_bytes(content[:-5])
+        reader = MonitorFeedReader(path)
+        assert reader.read() == 1
+        path.write_bytes(content)
+        assert reader.read() == 1
+        assert reader.data["datetime"][-1] == ["2021-03-15 15:01:00"]
+
+    def test_recreated_feed(self, tmp_path):
+        path = tmp_path / "feed"
+        writer = MonitorFeedWriter(path)
+        for i in range(3):
+            writer.append(make_row(i))
+        writer.close()
+        reader = MonitorFeedReader(path)
+        reader.read()
+        path.unlink()
+        writer = MonitorFeedWriter(path)
+        writer.append(make_row(5))
+        writer.close()
+        assert reader.read() == 1
+        assert reader.data["portfolio_value"] == [[1005.0]]
+
+    def test_recorder_appends_each_time_step(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        recorder = MonitorFeedRecorder(
+            ParquetRecorder({"Backtest": [GC]}, close=[]),
+            strategy_name="cta",
+            monitor_name="20210315")
+        reader = MonitorFeedReader(recorder.writer.path)
+        for i in range(3):
+            for field, value in make_row(i).items():
+                recorder.write_record(field, value)
+            assert reader.read() == 1
+        assert reader.data == {
+            field: [make_row(i)[field] for i in range(3)]
+            for field in make_row(0)}
+        # the wrapped recorder still records everything
+        assert len(read_records(recorder.save())) == 3
+
+
+def make_bar_row(i: int):
+    # recorded values of one gateway with one security
+    close = 100.0 + i
+    action = ""
+    if i == 1:
+        action = ("{'sec': 'FUT.GC', 'side': 'LONG', 'offset': 'OPEN', "
+                  "'qty': 1, 'close': 101.0, 'no': 1}|")
+    return {
+        "datetime": [f"2021-03-15 15:{i:02d}:00"],
+        "portfolio_value": [1000.0 + i],
+        "strategy_portfolio_value": [1000.0 + i],
+        "action": [action],
+        "open": [[close]],
+        "high": [[close + 1]],
+        "low": [[close - 1]],
+        "close": [[close]],
+        "volume": [[10.0]],
+        "ma": [[float("nan") if i == 0 else close - 0.5]]}
+
+
+INSTRUMENTS = {
+    "Backtest": {
+        "security": ["FUT.GC"],
+        "show_fields": {"ma": [dict(func=None, style={}, pos=1)]}}}
+
+
+class RecordingPatch:
+    """Records the values extended at each location (as dash.Patch)"""
+
+    def __init__(self, location=(), extended=None):
+        self.location = location
+        self.extended = {} if extended is None else extended
+
+    def __getitem__(self, key):
+        return RecordingPatch(self.location + (key,), self.extended)
+
+    def extend(self, values):
+        self.extended.setdefault(self.location, []).extend(values)
+
+
+class TestLiveFigure:
+
+    def test_series_of_new_rows(self):
+        performance = pytest.importorskip(
+            "qtrader.plugins.analysis.performance")
+        data = performance.convert_records(
+            pd.DataFrame([make_bar_row(i) for i in range(6)]))
+        series = performance.get_signal_series(data, INSTRUMENTS)
+        first = performance.get_signal_series(data.iloc[:3], INSTRUMENTS)
+        last = performance.get_signal_series(data.iloc[3:], INSTRUMENTS)
+        # the series of consecutive rows add up to the series of all rows
+        assert series["datetime"] == first["datetime"] + last["datetime"]
+        assert series["portfolio_value"] == (
+            first["portfolio_value"] + last["portfolio_value"])
+        sec_series = series["securities"][("Backtest", "FUT.GC")]
+        assert sec_series["close"] == [100.0 + i for i in range(6)]
+        assert sec_series["fields"]["ma"][0] is None
+        assert [a["text"] for a in sec_series["actions"]] == ["Entry Long"]
+        assert performance.get_signal_traces(INSTRUMENTS) == [
+            ("portfolio_value",), ("Backtest", "FUT.GC", "ohlc"),
+            ("Backtest", "FUT.GC", "ma")]
+
+    def test_only_new_rows_are_sent(self, tmp_path, monkeypatch):
+        figure = pytest.importorskip("qtrader.plugins.monitor.figure")
+        plotted = []
+        monkeypatch.setattr(
+            figure, "plot_signals",
+            lambda data, instruments: plotted.append(len(data)) or "figure")
+        monkeypatch.setattr(figure, "Patch", RecordingPatch)
+        writer = MonitorFeedWriter(tmp_path / "feed")
+        live_figure = figure.LiveSignalFigure(
+            MonitorFeedReader(tmp_path / "feed"), INSTRUMENTS)
+        assert live_figure.update(None) == (None, None)
+        for i in range(3):
+            writer.append(make_bar_row(i))
+        # the whole figure is plotted for a new client
+        fig, state = live_figure.update(None)
+        assert fig == "figure" and plotted == [3]
+        assert state["rows"] == 3
+        for i in range(3, 5):
+            writer.append(make_bar_row(i))
+        patch, state = live_figure.update(state)
+        assert plotted == [3] and state["rows"] == 5
+        extended = patch.extended
+        assert extended[("data", 0, "y")] == [1003.0, 1004.0]
+        assert extended[("data", 1, "close")] == [103.0, 104.0]
+        assert extended[("data", 2, "y")] == [102.5, 103.5]
+        assert ("layout", "annotations") not in extended
+        # rows are converted once
+        assert len(live_figure.data) == 5
+        # another client is sent the whole figure
+        fig, _ = live_figure.update(None)
+        assert plotted == [3, 5]
+        writer.close()
+
+    def test_recreated_feed_is_plotted_again(self, tmp_path, monkeypatch):
+        figure = pytest.importorskip("qtrader.plugins.monitor.figure")
+        monkeypatch.setattr(
+            figure, "plot_signals", lambda data, instruments: "figure")
+        path = tmp_path / "feed"
+        writer = MonitorFeedWriter(path)
+        for i in range(3):
+            writer.append(make_bar_row(i))
+        writer.close()
+        live_figure = figure.LiveSignalFigure(
+            MonitorFeedReader(path), INSTRUMENTS)
+        _, state = live_figure.update(None)
+        path.unlink()
+        writer = MonitorFeedWriter(path)
+        writer.append(make_bar_row(0))
+        writer.close()
+        fig, new_state = live_figure.update(state)
+        assert fig == "figure"
+        assert new_state["rows"] == 1
+        assert new_state["generation"] != state["generation"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
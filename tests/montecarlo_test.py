@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# @Time    : 19/10/2026 5:40 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: montecarlo_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtrader.plugins.analysis.montecarlo import MonteCarlo
+from qtrader.plugins.analysis.montecarlo import path_statistics
+from qtrader.plugins.analysis.montecarlo import resample_indices
+
+
+class TestMonteCarlo:
+
+    def test_path_statistics(self):
+        pnl = np.array([[100., -300., 50., 200.]])
+        sharpe, max_drawdown, terminal_pnl = path_statistics(
+            pnl, 1000, periods_per_year=252)[0]
+        returns = pd.Series(pnl[0] / 1000)
+        assert sharpe == pytest.approx(
+            np.sqrt(252) * returns.mean() / returns.std())
+        # peak 1100, trough 800
+        assert max_drawdown == pytest.approx(800 / 1100 - 1)
+        assert terminal_pnl == pytest.approx(50)
+
+    def test_block_indices_are_consecutive(self):
+        rng = np.random.default_rng(0)
+        indices = resample_indices(rng, 10, 100, block_size=5)
+        assert indices.shape == (100, 10)
+        steps = np.diff(indices, axis=1)[:, [0, 1, 2, 3, 5, 6, 7, 8]]
+        assert np.all((steps == 1) | (steps == -9))
+
+    def test_results_do_not_depend_on_workers(self):
+        pnl = np.random.default_rng(1).normal(100, 1000, 500)
+        mc = MonteCarlo(pnl, 1e6, block_size=5)
+        simulations = mc.run(3000, seed=7, chunk_size=1000)
+        assert simulations.shape == (3000, 3)
+        # each chunk has its own seed, whichever process runs it
+        pd.testing.assert_frame_equal(
+            simulations,
+            mc.run(3000, seed=7, chunk_size=1000, max_workers=2))
+        intervals = mc.confidence_intervals(simulations, 0.9)
+        assert (intervals["lower"] <= intervals["upper"]).all()
+        # drawdowns are never positive
+        assert intervals.loc["max_drawdown", "upper"] <= 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# @Time    : 22/10/2026 10:20 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: parameter_sweep_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import multiprocessing
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from qtrader.core.parameter_sweep import ParameterSweep
+
+START = datetime(2021, 3, 15, 15, 0, 0)
+END = datetime(2021, 3, 15, 17, 0, 0)
+
+
+@pytest.fixture
+def sweep(make_sweep):
+    # see conftest.py for the strategy and the stub engine; the data are
+    # loaded beyond the runs, so that they are updated until the end
+    return make_sweep(START, END + timedelta(hours=1))
+
+
+class TestParameterSweep:
+
+    def test_grid(self):
+        param_sets = ParameterSweep.grid({"period": [5, 10], "qty": [1]})
+        assert param_sets == [{"period": 5, "qty": 1},
+                              {"period": 10, "qty": 1}]
+
+    def test_run_one(self, sweep):
+        gateway = sweep.load()
+        result = sweep.run_one(gateway, {"period": 10, "qty": 1}, START, END)
+        assert list(result.columns) == [
+            "datetime", "portfolio_value", "strategy_portfolio_value",
+            "action", "close", "period", "qty"]
+        assert result["datetime"].iloc[0] == "2021-03-15 15:00:00"
+        assert result["datetime"].iloc[-1] == "2021-03-15 17:00:00"
+        # the first trade opens one position, the next ones flip it
+        actions = result["action"][result["action"] != ""]
+        assert len(actions) == len(result) // 10
+        assert actions.iloc[0].count("|") == 1
+        assert actions.iloc[1].count("|") == 2
+        assert result["portfolio_value"].iloc[0] == 100000
+        assert result["portfolio_value"].iloc[-1] != 100000
+
+    def test_reset(self, sweep):
+        gateway = sweep.load()
+        sweep.run_one(gateway, {"period": 10, "qty": 1}, START, END)
+        assert gateway.market_datetime == END
+        assert len(gateway.orders.queue) > 0
+        gateway.reset()
+        assert gateway.market_datetime == START
+        assert len(gateway.orders.queue) == 0
+        assert len(gateway.deals.queue) == 0
+        assert gateway.orderids.next_id() == 1
+        assert gateway.dealids.next_id() == 1
+
+    def test_successive_runs_are_identical(self, sweep):
+        gateway = sweep.load()
+        params = {"period": 10, "qty": 1}
+        first = sweep.run_one(gateway, params, START, END)
+        second = sweep.run_one(gateway, params, START, END)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_run_tasks(self, sweep):
+        middle = datetime(2021, 3, 15, 16, 0, 0)
+        tasks = [({"period": 10, "qty": 1}, START, END),
+                 ({"period": 5, "qty": 2}, START, middle),
+                 ({"period": 10, "qty": 1}, START, END)]
+        results = sweep.run_tasks(tasks)
+        assert [r["run"].iloc[0] for r in results] == [0, 1, 2]
+        assert results[1]["datetime"].iloc[-1] == "2021-03-15 16:00:00"
+        assert (results[1]["qty"] == 2).all()
+        pd.testing.assert_frame_equal(
+            results[0].drop(columns="run"), results[2].drop(columns="run"))
+        # same records as a run on its own
+        result = sweep.run_one(sweep.gateway, *tasks[1])
+        pd.testing.assert_frame_equal(results[1].drop(columns="run"), result)
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(),
+        reason="workers use the stub engine of the parent process")
+    def test_run_tasks_in_processes(self, sweep):
+        tasks = [({"period": 10, "qty": 1}, START, END),
+                 ({"period": 5, "qty": 2}, START, END)]
+        expected = sweep.run_tasks(tasks)
+        sweep.max_workers = 2
+        results = sweep.run_tasks(tasks)
+        for result, expected_result in zip(results, expected):
+            pd.testing.assert_frame_equal(result, expected_result)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
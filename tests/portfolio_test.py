@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+# @Time    : 23/10/2026 2:30 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: portfolio_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import pickle
+import threading
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from qtrader.core.balance import AccountBalance
+from qtrader.core.constants import Direction, Exchange, Offset, OrderType
+from qtrader.core.constants import TradeMode
+from qtrader.core.deal import Deal
+from qtrader.core.portfolio import Portfolio
+from qtrader.core.position import Position, PositionData
+from qtrader.core.security import Futures
+from qtrader.core.utility import get_lock
+from qtrader.gateways.backtest.backtest_gateway import BacktestFees
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX, quote_currency="USD")
+SI = Futures(code="FUT.SI", lot_size=5000, security_name="SIN2",
+             exchange=Exchange.NYMEX, quote_currency="USD")
+HSI = Futures(code="FUT.HSI", lot_size=50, security_name="HSIH1",
+              exchange=Exchange.HKFE, quote_currency="HKD")
+PRICES = {GC: 1700., SI: 25., HSI: 29000.}
+
+
+class Market:
+    """Backtest market stub: prices of the bars, and every read of a price
+    or an exchange rate is counted"""
+
+    trade_mode = TradeMode.BACKTEST
+    SHORT_INTEREST_RATE = 0.0
+
+    def __init__(self):
+        self.market_datetime = datetime(2021, 3, 15, 15, 0, 0)
+        self.prices = dict(PRICES)
+        self.num_price_reads = 0
+        self.num_fx_reads = 0
+
+    def get_time_step_key(self):
+        return self.market_datetime
+
+    def get_exchange_rate(self, base: str, quote: str) -> float:
+        self.num_fx_reads += 1
+        return 7.8
+
+    def get_recent_data(self, security, cur_datetime, **kwargs):
+        self.num_price_reads += 1
+        return SimpleNamespace(close=self.prices[security])
+
+    def fees(self, deal: Deal):
+        return BacktestFees(deal)
+
+
+def make_deal(security, direction, offset, quantity, market):
+    return Deal(
+        security=security,
+        direction=direction,
+        offset=offset,
+        order_type=OrderType.MARKET,
+        updated_time=market.market_datetime,
+        filled_avg_price=market.prices[security],
+        filled_quantity=quantity)
+
+
+def full_valuation(portfolio: Portfolio, market: Market) -> float:
+    value = portfolio.account_balance.cash
+    for security, holdings in portfolio.position.holdings.items():
+        fx_rate = 1.0 if security.quote_currency == "USD" else 7.8
+        for direction, position_data in holdings.items():
+            sign = 1 if direction == Direction.LONG else -1
+            value += (sign * market.prices[security] * position_data.quantity
+                      * security.lot_size / fx_rate)
+    return value
+
+
+@pytest.fixture
+def market():
+    return Market()
+
+
+@pytest.fixture
+def portfolio(market):
+    return Portfolio(
+        account_balance=AccountBalance(cash=1000000.),
+        position=Position(),
+        market=market,
+        reporting_currency="USD")
+
+
+class TestPortfolio:
+
+    def test_deal_only_revalues_its_security(self, portfolio, market):
+        for security in (GC, SI):
+            portfolio.update(make_deal(
+                security, Direction.LONG, Offset.OPEN, 2, market))
+        assert portfolio.value == pytest.approx(
+            full_valuation(portfolio, market))
+        num_price_reads = market.num_price_reads
+        portfolio.update(make_deal(
+            GC, Direction.SHORT, Offset.CLOSE, 1, market))
+        assert market.num_price_reads == num_price_reads + 1
+        assert portfolio.value == pytest.approx(
+            full_valuation(portfolio, market))
+        # the position is still in sync, nothing else is revalued
+        assert market.num_price_reads == num_price_reads + 1
+
+    def test_closed_security_is_dropped(self, portfolio, market):
+        portfolio.update(make_deal(
+            GC, Direction.SHORT, Offset.OPEN, 1, market))
+        portfolio.value
+        portfolio.update(make_deal(
+            GC, Direction.LONG, Offset.CLOSE, 1, market))
+        assert GC not in portfolio.market_values
+        assert portfolio.market_value == 0.0
+        assert portfolio.value == pytest.approx(
+            full_valuation(portfolio, market))
+
+    def test_position_updated_without_deal(self, portfolio, market):
+        portfolio.update(make_deal(
+            GC, Direction.LONG, Offset.OPEN, 1, market))
+        portfolio.value
+        # e.g., synchronized with the broker
+        portfolio.position.update(
+            position_data=PositionData(
+                security=SI, direction=Direction.LONG, holding_price=25.,
+                quantity=3, update_time=market.market_datetime),
+            offset=Offset.OPEN)
+        portfolio.update(make_deal(
+            GC, Direction.LONG, Offset.OPEN, 1, market))
+        assert portfolio.value == pytest.approx(
+            full_valuation(portfolio, market))
+
+    def test_revalued_at_next_time_step(self, portfolio, market):
+        portfolio.update(make_deal(
+            HSI, Direction.LONG, Offset.OPEN, 1, market))
+        assert portfolio.value == pytest.approx(
+            full_valuation(portfolio, market))
+        assert market.num_fx_reads == 1
+        market.prices[HSI] = 29100.
+        portfolio.value
+        # same time step: neither the price nor the rate is read again
+        assert market.num_fx_reads == 1
+        market.market_datetime += timedelta(minutes=1)
+        assert portfolio.value == pytest.approx(
+            full_valuation(portfolio, market))
+        assert market.num_fx_reads == 2
+
+
+def update_in_thread(position: Position, market: Market) -> threading.Thread:
+    thread = threading.Thread(target=position.update, kwargs=dict(
+        position_data=PositionData(
+            security=GC, direction=Direction.LONG, holding_price=1700.,
+            quantity=1, update_time=market.market_datetime),
+        offset=Offset.OPEN))
+    thread.start()
+    return thread
+
+
+class TestLocks:
+
+    def test_get_lock(self):
+        assert isinstance(get_lock(TradeMode.BACKTEST), nullcontext)
+        lock = get_lock(TradeMode.LIVETRADE)
+        assert isinstance(lock, type(threading.Lock()))
+        # a new lock each time
+        assert get_lock(TradeMode.LIVETRADE) is not lock
+        assert get_lock() is not get_lock()
+
+    def test_no_lock_in_backtest(self, portfolio):
+        assert isinstance(portfolio.lock, nullcontext)
+        assert isinstance(portfolio.position.lock, nullcontext)
+        # null contexts are reentrant
+        with portfolio.lock, portfolio.lock:
+            pass
+
+    def test_lock_per_instance(self):
+        market = Market()
+        market.trade_mode = TradeMode.LIVETRADE
+        portfolios = [
+            Portfolio(account_balance=AccountBalance(cash=1000000.),
+                      position=Position(), market=market,
+                      reporting_currency="USD")
+            for _ in range(2)]
+        locked, other = portfolios
+        assert locked.lock is not other.lock
+        assert locked.position.lock is not other.position.lock
+        with locked.position.lock:
+            # the position of another portfolio is not blocked
+            thread = update_in_thread(other.position, market)
+            thread.join(timeout=5)
+            assert not thread.is_alive()
+            # but the same position waits for its lock
+            thread = update_in_thread(locked.position, market)
+            thread.join(timeout=0.1)
+            assert thread.is_alive()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+        assert locked.position.holdings[GC][Direction.LONG].quantity == 1
+
+    def test_position_pickled(self):
+        position = Position(trade_mode=TradeMode.LIVETRADE)
+        unpickled = pickle.loads(pickle.dumps(position))
+        assert isinstance(unpickled.lock, type(threading.Lock()))
+        assert unpickled.lock is not position.lock
+        assert unpickled.trade_mode == TradeMode.LIVETRADE
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
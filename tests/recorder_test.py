@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+# @Time    : 21/10/2026 3:30 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: recorder_test.py
+# @Software: PyCharm
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtrader.core.constants import Exchange
+from qtrader.core.recorder import ParquetRecorder
+from qtrader.core.recorder import get_field
+from qtrader.core.recorder import read_records
+from qtrader.core.security import Futures
+
+GC = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+             exchange=Exchange.NYMEX, expiry_date="20220828")
+SI = Futures(code="FUT.SI", lot_size=5000, security_name="SIN2",
+             exchange=Exchange.NYMEX, expiry_date="20220727")
+SECURITIES = {"Backtest": [GC, SI], "Futu": [GC]}
+
+
+def record(recorder: ParquetRecorder, i: int):
+    """Write a time step as the event engine does (one value per gateway)"""
+    dt = (datetime(2021, 3, 15, 15, 0) + timedelta(minutes=i)).strftime(
+        "%Y-%m-%d %H:%M:%S")
+    values = {
+        "datetime": [dt, dt],
+        "portfolio_value": [1000.0 + i, 500],
+        "strategy_portfolio_value": [1000.0 + i, 500],
+        "action": ["{'sec': 'FUT.GC'}|" if i % 3 == 0 else "", ""],
+        "close": [[float(i), None if i < 2 else 2.5], [3.0]],
+        "signal": i,
+    }
+    for field in recorder.get_recorded_fields():
+        recorder.write_record(field, values[field])
+
+
+class TestParquetRecorder:
+
+    def test_chunks_are_written_as_the_engine_runs(self, tmp_path):
+        recorder = ParquetRecorder(
+            SECURITIES, path=str(tmp_path), chunk_size=4, close=[],
+            signal=None)
+        for i in range(10):
+            record(recorder, i)
+            # at most one chunk is kept in memory
+            assert len(recorder.buffers["datetime"]) < 4
+        assert recorder.num_records == 8
+        records = read_records(recorder.save())
+        assert len(records) == 10
+        assert records.attrs == {"signal": "9"}
+
+    def test_numeric_columns(self, tmp_path):
+        recorder = ParquetRecorder(
+            SECURITIES, path=str(tmp_path), chunk_size=3, close=[])
+        for i in range(5):
+            record(recorder, i)
+        records = read_records(recorder.save())
+        close = get_field(records, "close")
+        assert list(close.columns) == [
+            "close:Backtest:FUT.GC", "close:Backtest:FUT.SI",
+            "close:Futu:FUT.GC"]
+        assert (close.dtypes == np.float64).all()
+        assert np.allclose(
+            close.values,
+            [[0, np.nan, 3], [1, np.nan, 3], [2, 2.5, 3], [3, 2.5, 3],
+             [4, 2.5, 3]],
+            equal_nan=True)
+        assert records["datetime:Futu"].iloc[-1] == pd.Timestamp(
+            "2021-03-15 15:04")
+        assert records["action:Backtest"].tolist()[:2] == [
+            "{'sec': 'FUT.GC'}|", ""]
+
+    def test_invalid_field(self):
+        with pytest.raises(ValueError):
+            ParquetRecorder(SECURITIES, close=[1.0])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
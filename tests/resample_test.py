@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# @Time    : 18/10/2026 2:40 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: resample_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtrader.core import data
+from qtrader.core.constants import Exchange
+from qtrader.core.resample import resample_bars
+from qtrader.core.security import Futures
+
+# a session that crosses midnight: 22:00 - 01:00
+SESSIONS = [[datetime(1970, 1, 1, 22, 0, 0), datetime(1970, 1, 1, 1, 0, 0)]]
+
+
+def make_data(bar_convention: str):
+    # 1-minute bars of the session 2021-03-15 22:00 - 2021-03-16 01:00
+    starts = pd.date_range("2021-03-15 22:00:00", periods=180, freq="1min")
+    if bar_convention == "end":
+        starts = starts + pd.Timedelta(minutes=1)
+    prices = np.arange(180, dtype=float)
+    return pd.DataFrame({
+        "time_key": starts,
+        "open": prices,
+        "high": prices + 0.5,
+        "low": prices - 0.5,
+        "close": prices + 0.25,
+        "volume": np.ones(180, dtype=int),
+    })
+
+
+class TestResample:
+
+    @pytest.mark.parametrize("bar_convention,first_label", [
+        ("start", "2021-03-15 22:00:00"),
+        ("end", "2021-03-15 23:00:00"),
+    ])
+    def test_hourly_bars(self, bar_convention, first_label):
+        bars = resample_bars(
+            make_data(bar_convention), "1hour", SESSIONS, bar_convention)
+        assert bars.shape[0] == 3
+        assert bars["time_key"].iloc[0] == pd.Timestamp(first_label)
+        assert bars["open"].tolist() == [0., 60., 120.]
+        assert bars["high"].tolist() == [59.5, 119.5, 179.5]
+        assert bars["low"].tolist() == [-0.5, 59.5, 119.5]
+        assert bars["close"].tolist() == [59.25, 119.25, 179.25]
+        assert bars["volume"].tolist() == [60, 60, 60]
+
+    def test_partial_period_is_truncated_at_session_close(self):
+        bars = resample_bars(make_data("end"), "7min", SESSIONS, "end")
+        # 180 = 25 * 7 + 5, the last period ends at the session close
+        assert bars.shape[0] == 26
+        assert bars["time_key"].iloc[-1] == pd.Timestamp("2021-03-16 01:00:00")
+        assert bars["volume"].iloc[-1] == 5
+
+    def test_daily_bars_are_stamped_with_trading_day(self):
+        bars = resample_bars(make_data("start"), "1day", SESSIONS, "start")
+        assert bars.shape[0] == 1
+        assert bars["time_key"].iloc[0] == pd.Timestamp("2021-03-16")
+        assert bars["volume"].iloc[0] == 180
+
+    def test_bars_outside_sessions_are_dropped(self):
+        data = make_data("start")
+        data.loc[0, "time_key"] = pd.Timestamp("2021-03-15 21:59:00")
+        bars = resample_bars(data, "1hour", SESSIONS, "start")
+        assert bars["volume"].tolist() == [59, 60, 60]
+
+
+class TestResampledCache:
+
+    def test_least_recently_used_are_pruned(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(data, "DATA_CACHE_PATH", str(tmp_path))
+        monkeypatch.setattr(data, "RESAMPLED_CACHE_SIZE", 2)
+        gc = Futures(code="FUT.GC", lot_size=100, security_name="GCQ2",
+                     exchange=Exchange.NYMEX)
+        cache_path = tmp_path.joinpath("resampled", gc.code)
+
+        def get_data(day: int):
+            # a window within the day, which moves forward as the history of
+            # the gateway (built from the day files of the day and before)
+            start = datetime(2021, 3, day, 15, 0, 0)
+            return data._get_data(gc, start, start + timedelta(hours=5),
+                                  "kline", interval="5min")
+
+        first = get_data(15)
+        get_data(16)
+        # a cache hit is the most recently used
+        pd.testing.assert_frame_equal(get_data(15), first)
+        assert len(list(cache_path.iterdir())) == 2
+        get_data(17)
+        cache_files = sorted(cache_path.iterdir())
+        assert len(cache_files) == 2
+        # the window of the 16th has been removed, the first one is kept
+        mtimes = [f.stat().st_mtime_ns for f in cache_files]
+        pd.testing.assert_frame_equal(get_data(15), first)
+        assert sorted(cache_path.iterdir()) == cache_files
+        assert [f.stat().st_mtime_ns for f in cache_files] != mtimes
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
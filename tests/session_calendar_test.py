@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# @Time    : 25/10/2026 11:20 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: session_calendar_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from qtrader.core.session_calendar import SessionCalendar
+from qtrader.core.session_calendar import get_day_sessions
+
+# HK stocks: lunch break between the sessions
+LUNCH_BREAK_SESSIONS = [
+    [datetime(1970, 1, 1, 9, 30, 0), datetime(1970, 1, 1, 12, 0, 0)],
+    [datetime(1970, 1, 1, 13, 0, 0), datetime(1970, 1, 1, 16, 0, 0)],
+]
+# night session across midnight, then the day sessions (e.g., SHFE)
+NIGHT_SESSIONS = [
+    [datetime(1970, 1, 1, 21, 0, 0), datetime(1970, 1, 1, 2, 30, 0)],
+    [datetime(1970, 1, 1, 9, 0, 0), datetime(1970, 1, 1, 11, 30, 0)],
+    [datetime(1970, 1, 1, 13, 30, 0), datetime(1970, 1, 1, 15, 0, 0)],
+]
+START_DATE = date(2021, 3, 15)
+END_DATE = date(2021, 3, 17)
+
+
+def get_sessions(trading_sessions, start_date: date, end_date: date):
+    """Sessions of the calendar days, expanded day by day"""
+    sessions = []
+    day = start_date - timedelta(days=1)
+    while day <= end_date + timedelta(days=1):
+        sessions.extend(get_day_sessions(trading_sessions, day))
+        day += timedelta(days=1)
+    return sorted(sessions)
+
+
+class TestSessionCalendar:
+
+    def test_lunch_break(self):
+        calendar = SessionCalendar(LUNCH_BREAK_SESSIONS, START_DATE, END_DATE)
+        day = datetime(2021, 3, 16)
+        # session ends are inclusive
+        assert calendar.is_open(day.replace(hour=9, minute=30))
+        assert calendar.is_open(day.replace(hour=12))
+        assert not calendar.is_open(day.replace(hour=12, second=1))
+        assert not calendar.is_open(day.replace(hour=12, minute=30))
+        assert calendar.is_open(day.replace(hour=13))
+        assert calendar.next_open(day.replace(hour=12)) == day.replace(
+            hour=13)
+        assert calendar.next_open(day.replace(hour=16)) == day.replace(
+            day=17, hour=9, minute=30)
+        lunch_time = day.replace(hour=12, minute=1).time()
+        assert not calendar.is_trading_time(lunch_time)
+
+    def test_midnight(self):
+        calendar = SessionCalendar(NIGHT_SESSIONS, START_DATE, END_DATE)
+        day = datetime(2021, 3, 16)
+        assert calendar.is_open(day.replace(hour=23, minute=59))
+        assert calendar.is_open(day + timedelta(days=1))
+        assert calendar.is_open(day.replace(day=17, hour=2, minute=30))
+        assert not calendar.is_open(day.replace(day=17, hour=2, minute=31))
+        assert calendar.next_open(day.replace(day=17, hour=2, minute=31)) == (
+            day.replace(day=17, hour=9))
+        assert calendar.next_open(day.replace(hour=15, minute=30)) == (
+            day.replace(hour=21))
+        assert calendar.is_trading_time(day.replace(hour=1).time())
+        assert not calendar.is_trading_time(day.replace(hour=3).time())
+
+    @pytest.mark.parametrize(
+        "trading_sessions", [LUNCH_BREAK_SESSIONS, NIGHT_SESSIONS])
+    def test_same_as_day_sessions(self, trading_sessions):
+        calendar = SessionCalendar(trading_sessions, START_DATE, END_DATE)
+        sessions = get_sessions(trading_sessions, START_DATE, END_DATE)
+        cur_datetime = datetime.combine(START_DATE, datetime.min.time())
+        while cur_datetime.date() <= END_DATE:
+            assert calendar.is_open(cur_datetime) == any(
+                start <= cur_datetime <= end for start, end in sessions)
+            assert calendar.next_open(cur_datetime) == min(
+                start for start, _ in sessions if start > cur_datetime)
+            cur_datetime += timedelta(minutes=15)
+
+    def test_extended_on_demand(self):
+        calendar = SessionCalendar(LUNCH_BREAK_SESSIONS, START_DATE, END_DATE)
+        later = datetime(2021, 4, 1, 10, 0, 0)
+        assert calendar.is_open(later)
+        assert calendar.next_open(later) == later.replace(hour=13)
+        earlier = datetime(2021, 3, 1, 12, 30, 0)
+        assert not calendar.is_open(earlier)
+        assert calendar.next_open(earlier) == earlier.replace(
+            hour=13, minute=0)
+        # without any range to start with
+        calendar = SessionCalendar(LUNCH_BREAK_SESSIONS)
+        assert calendar.is_open(later)
+
+    def test_no_sessions(self):
+        calendar = SessionCalendar([], START_DATE, END_DATE)
+        assert not calendar.is_open(datetime(2021, 3, 16, 10, 0, 0))
+        assert calendar.next_open(datetime(2021, 3, 16, 10, 0, 0)) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# @Time    : 23/10/2026 9:40 AM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: vector_backtest_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from qtrader.core.constants import Direction, Exchange, Offset
+from qtrader.core.security import Futures
+from qtrader.core.vector_backtest import _get_deals
+from qtrader.core.vector_backtest import run_vector_backtest
+from qtrader.core.vector_backtest import signals_to_positions
+from qtrader.core.vector_backtest import validate_vector_backtest
+from qtrader.gateways.backtest.backtest_gateway import BacktestFees
+
+TEST = Futures(code="FUT.TEST", lot_size=10, security_name="TEST",
+               exchange=Exchange.SMART)
+INDEX = pd.date_range("2021-03-15 15:00:00", periods=6, freq="1min")
+CLOSE = pd.DataFrame(
+    {"FUT.TEST": [100., 101., 103., 102., 99., 100.]}, index=INDEX)
+# long at 101, flip to short at 102, close at 100
+POSITIONS = pd.DataFrame({"FUT.TEST": [0, 1, 1, -1, -1, 0]}, index=INDEX)
+# fees are 0.05% of price * quantity of each deal (BacktestFees)
+FEES = [0., 101 * 0.0005, 0., 2 * 102 * 0.0005, 0., 100 * 0.0005]
+CASH = np.array([
+    10000.,
+    10000. - 1010. - FEES[1],
+    10000. - 1010. - FEES[1],
+    10000. - 1010. - FEES[1] + 2040. - FEES[3],
+    10000. - 1010. - FEES[1] + 2040. - FEES[3],
+    10000. - 1010. - FEES[1] + 2040. - FEES[3] - 1000. - FEES[5]])
+PORTFOLIO_VALUE = CASH + np.array([0., 1010., 1030., -1020., -990., 0.])
+
+
+def get_deals(prev_position, position, price=100.):
+    return [(d.direction, d.offset, d.filled_quantity)
+            for d in _get_deals(TEST, prev_position, position, price)]
+
+
+class TestVectorBacktest:
+
+    def test_signals_to_positions(self):
+        signals = pd.DataFrame(
+            {"A": [1, np.nan, 1, -1, -1, 0, -1, 1],
+             "B": [0, -1, 0, 0, 1, 1, 0, 0]})
+        positions = signals_to_positions(signals, quantity=2)
+        assert positions["A"].tolist() == [2, 2, 2, 0, -2, -2, -2, 0]
+        assert positions["B"].tolist() == [0, -2, -2, -2, 0, 2, 2, 2]
+
+    def test_deals(self):
+        assert get_deals(0, 2) == [(Direction.LONG, Offset.OPEN, 2)]
+        assert get_deals(1, 3) == [(Direction.LONG, Offset.OPEN, 2)]
+        assert get_deals(3, 1) == [(Direction.SHORT, Offset.CLOSE, 2)]
+        assert get_deals(-2, 0) == [(Direction.LONG, Offset.CLOSE, 2)]
+
+    def test_flip_closes_then_opens(self):
+        assert get_deals(1, -2) == [
+            (Direction.SHORT, Offset.CLOSE, 1),
+            (Direction.SHORT, Offset.OPEN, 2)]
+        assert get_deals(-3, 1) == [
+            (Direction.LONG, Offset.CLOSE, 3),
+            (Direction.LONG, Offset.OPEN, 1)]
+
+    def test_portfolio_value(self):
+        result = run_vector_backtest(
+            [TEST], CLOSE, POSITIONS, init_capital=10000., fees=BacktestFees)
+        assert result["position_FUT.TEST"].tolist() == [0, 1, 1, -1, -1, 0]
+        np.testing.assert_allclose(result["fees"], FEES)
+        np.testing.assert_allclose(result["cash"], CASH)
+        np.testing.assert_allclose(result["portfolio_value"], PORTFOLIO_VALUE)
+        # pnl of the long (+10) and short (+20) trades, net of fees
+        assert result["portfolio_value"].iloc[-1] == pytest.approx(
+            10030. - sum(FEES))
+
+    def test_securities_start_at_different_times(self):
+        # the second security only has prices from the third bar on, as in
+        # the bar panel of securities that start trading at different times
+        other = Futures(code="FUT.OTHER", lot_size=1, security_name="OTHER",
+                        exchange=Exchange.SMART)
+        close = CLOSE.assign(**{"FUT.OTHER": [np.nan, np.nan, 50., 51., 52.,
+                                              53.]})
+        positions = POSITIONS.assign(**{"FUT.OTHER": [0, 0, 0, 2, 2, 2]})
+        result = run_vector_backtest(
+            [TEST, other], close, positions, init_capital=10000.,
+            fees=BacktestFees)
+        assert not result[["cash", "portfolio_value"]].isna().any().any()
+        np.testing.assert_allclose(
+            result["portfolio_value"].iloc[:3], PORTFOLIO_VALUE[:3])
+        # long 2 at 51, marked at 53
+        other_fee = 2 * 51 * 0.0005
+        np.testing.assert_allclose(
+            result["portfolio_value"].iloc[-1],
+            PORTFOLIO_VALUE[-1] + 2 * (53. - 51.) - other_fee)
+
+    def test_validate(self, tmp_path):
+        result = run_vector_backtest(
+            [TEST], CLOSE, POSITIONS, init_capital=10000., fees=BacktestFees)
+        # the event engine only records the time steps with updated data
+        rows = [0, 1, 3, 5]
+        records = pd.DataFrame({
+            "datetime": [str([INDEX[i].strftime("%Y-%m-%d %H:%M:%S")])
+                         for i in rows],
+            "portfolio_value": [str([float(PORTFOLIO_VALUE[i])]) for i in rows]})
+        result_path = str(tmp_path.joinpath("result.csv"))
+        records.to_csv(result_path, index=False)
+        comparison = validate_vector_backtest(result, result_path)
+        assert comparison.index.tolist() == INDEX[rows].tolist()
+
+        records.loc[2, "portfolio_value"] = str([float(PORTFOLIO_VALUE[3]) + 1])
+        records.to_csv(result_path, index=False)
+        with pytest.raises(ValueError):
+            validate_vector_backtest(result, result_path)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
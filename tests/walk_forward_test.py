@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# @Time    : 22/10/2026 3:10 PM
+# @Author  : Joseph Chen
+# @Email   : josephchenhk@gmail.com
+# @FileName: walk_forward_test.py
+
+"""
+Copyright (C) 2020 Joseph Chen - All Rights Reserved
+You may use, distribute and modify this code under the
+terms of the JXW license, which unfortunately won't be
+written for another century.
+
+You should have received a copy of the JXW license with
+this file. If not, please write to: josephchenhk@gmail.com
+"""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from qtrader.core.walk_forward import WalkForward
+
+START = datetime(2021, 3, 15, 15, 0, 0)
+END = datetime(2021, 3, 16, 2, 30, 0)
+PARAM_SETS = [{"period": 5, "qty": 1}, {"period": 12, "qty": 1}]
+
+
+@pytest.fixture
+def walk_forward(make_sweep):
+    # see conftest.py for the strategy and the stub engine
+    return WalkForward(
+        make_sweep(START, END), in_sample=timedelta(hours=4), out_of_sample=timedelta(hours=2))
+
+
+def make_result():
+    """Out-of-sample records of two windows over three days: a winning long
+    trade (+10 * 100) and a losing short trade (-5 * 100)"""
+    long_open = "{'sec': 'FUT.GC', 'side': 'LONG', 'offset': 'OPEN', 'qty': 1, 'close': 100.0, 'no': 1}|"
+    long_close = "{'sec': 'FUT.GC', 'side': 'SHORT', 'offset': 'CLOSE', 'qty': 1, 'close': 110.0, 'no': 1}|"
+    short_open = "{'sec': 'FUT.GC', 'side': 'SHORT', 'offset': 'OPEN', 'qty': 1, 'close': 110.0, 'no': 2}|"
+    short_close = "{'sec': 'FUT.GC', 'side': 'LONG', 'offset': 'CLOSE', 'qty': 1, 'close': 115.0, 'no': 2}|"
+    return pd.DataFrame({
+        "window": [0, 0, 0, 1, 1, 1],
+        "run": [0, 0, 0, 1, 1, 1],
+        "datetime": [
+            "2021-03-15 10:00:00", "2021-03-15 11:00:00",
+            "2021-03-16 10:00:00", "2021-03-16 11:00:00",
+            "2021-03-17 10:00:00", "2021-03-17 11:00:00"],
+        "portfolio_value": [100000., 100000., 101000., 101000., 100500.,
+                            100500.],
+        "strategy_portfolio_value": [100000., 100000., 101000., 101000.,
+                                     100500., 100500.],
+        "action": [long_open, "", long_close, short_open, short_close, ""],
+        "close": [[100.], [105.], [110.], [110.], [115.], [116.]],
+        "period": [5, 5, 5, 12, 12, 12],
+    })
+
+
+class TestWalkForward:
+
+    def test_windows(self, walk_forward):
+        windows = walk_forward.get_windows()
+        one_step = timedelta(minutes=1)
+        hours = [datetime(2021, 3, 15, 15) + timedelta(hours=2 * k)
+                 for k in range(6)]
+        assert windows == [
+            (hours[0], hours[2], hours[2] + one_step, hours[3]),
+            (hours[1], hours[3], hours[3] + one_step, hours[4]),
+            (hours[2], hours[4], hours[4] + one_step, hours[5]),
+            # the last out-of-sample window is truncated at the end
+            (hours[3], hours[5], hours[5] + one_step, END),
+        ]
+        # the data are not loaded to get the windows
+        assert walk_forward.sweep.gateway is None
+
+    def test_no_window(self, walk_forward):
+        walk_forward.in_sample = END - START
+        assert walk_forward.get_windows() == []
+        with pytest.raises(ValueError):
+            walk_forward.run(PARAM_SETS)
+
+    def test_stitched_equity_is_continuous(self, walk_forward):
+        result = walk_forward.run(PARAM_SETS)
+        windows = walk_forward.get_windows()
+        assert result["window"].unique().tolist() == list(range(len(windows)))
+        assert walk_forward.summary.shape[0] == len(windows)
+        assert set(walk_forward.summary["period"]) <= {5, 12}
+        for k in range(1, len(windows)):
+            previous = result[result["window"] == k - 1]
+            current = result[result["window"] == k]
+            # each window starts flat, with the value at the end of the
+            # previous window
+            assert (current["portfolio_value"].iloc[0]
+                    == previous["portfolio_value"].iloc[-1])
+            assert (current["strategy_portfolio_value"].iloc[0]
+                    == previous["strategy_portfolio_value"].iloc[-1])
+            assert current["datetime"].iloc[0] > previous["datetime"].iloc[-1]
+        # the first window is not shifted
+        first = result[result["window"] == 0]
+        _, _, oos_start, oos_end = windows[0]
+        records = walk_forward.sweep.run_one(
+            walk_forward.sweep.gateway,
+            dict(walk_forward.summary[["period", "qty"]].iloc[0]),
+            oos_start,
+            oos_end)
+        assert (first["portfolio_value"].tolist()
+                == records["portfolio_value"].tolist())
+
+    def test_save_csv(self, walk_forward, tmp_path):
+        walk_forward.summary = pd.DataFrame({"period": [5, 12]})
+        path = walk_forward.save_csv(
+            make_result(), str(tmp_path.joinpath("wf", "result.csv")))
+        records = pd.read_csv(path)
+        assert records.columns.tolist() == [
+            "datetime", "portfolio_value", "strategy_portfolio_value",
+            "action", "close"]
+        assert records["close"].iloc[0] == "[[100.0]]"
+        assert records["portfolio_value"].iloc[-1] == "[100500.0]"
+
+    def test_save_csv_read_by_performance(self, walk_forward, tmp_path):
+        analysis = pytest.importorskip("qtrader.plugins.analysis")
+        walk_forward.summary = pd.DataFrame({"period": [5, 12]})
+        path = walk_forward.save_csv(
+            make_result(), str(tmp_path.joinpath("result.csv")))
+        performance = analysis.PerformanceCTA(
+            instruments={
+                "security": {"Backtest": ["FUT.GC"]},
+                "lot": {"Backtest": [100]},
+                "commission": {"Backtest": [0]},
+                "slippage": {"Backtest": [0]}},
+            result_path=path)
+        performance.calc_statistics()
+        assert performance.daily_portfolio_value.tolist() == [
+            100000., 101000., 100500.]
+        assert performance.win_trades_df["pnl"].tolist() == [1000.]
+        assert performance.loss_trades_df["pnl"].tolist() == [-500.]
+        metrics = performance.strategy_metrics["Metrics"]
+        assert metrics["total_pnl"] == "500.00"
+        assert metrics["num_trades"] == "2"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])